@@ -4,3 +4,14 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from .metrics import install_query_counter
+        from .sqlite import apply_pragmas
+
+        # Queries are counted per request through a context variable,
+        # so they are seen in sync_to_async threads of async views too.
+        connection_created.connect(install_query_counter)
+        connection_created.connect(apply_pragmas)
@@ -0,0 +1,12 @@
+"""SQLite backend starting transactions with BEGIN IMMEDIATE.
+
+A transaction takes the write lock when it starts, so concurrent
+writers wait in the busy handler instead of failing with
+"database is locked" when a read transaction tries to write.
+"""
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute('BEGIN IMMEDIATE')
@@ -0,0 +1,28 @@
+"""File cache for several workers on one host.
+
+Django's FileBasedCache culls on every set(): it lists the whole
+cache directory, up to MAX_ENTRIES files, to count the entries.
+This one counts them every CULL_INTERVAL sets of a process only,
+the directory may go over MAX_ENTRIES by that many files per worker.
+"""
+import itertools
+
+from django.core.cache.backends import filebased
+
+CULL_INTERVAL = 200
+
+
+class FileBasedCache(filebased.FileBasedCache):
+    def __init__(self, dir, params):
+        super().__init__(dir, params)
+        options = params.get('OPTIONS', {})
+        self._cull_interval = int(
+            options.get('CULL_INTERVAL', CULL_INTERVAL)
+        )
+        # next() of a count is atomic, threads don't need a lock.
+        self._sets = itertools.count(1)
+
+    def _cull(self):
+        if next(self._sets) % self._cull_interval:
+            return
+        super()._cull()
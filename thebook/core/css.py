@@ -0,0 +1,154 @@
+"""Drop the CSS rules no template can match.
+
+A rule stays when every class and id of one of its selectors is
+a word of the templates, so only rules that surely match nothing
+are dropped. Rules inside @media and @supports are purged too,
+other at-rules (@keyframes, @font-face) are kept as they are.
+"""
+import re
+
+WORD = re.compile(r'[\w-]+')
+CLASS_OR_ID = re.compile(r'[.#](-?[_a-zA-Z][\w-]*)')
+ATTRIBUTE = re.compile(r'\[[^\]]*\]')
+NESTED_AT_RULES = ('@media', '@supports')
+
+
+def template_words(directories, suffixes=('.html', '.txt')):
+    """Every word of the templates: classes, ids, tags, script names."""
+    words = set()
+    for directory in directories:
+        for path in directory.rglob('*'):
+            if path.suffix in suffixes and path.is_file():
+                words.update(WORD.findall(path.read_text(errors='ignore')))
+    return words
+
+
+def skip_string(css, pos):
+    """Position after the string starting at pos."""
+    quote = css[pos]
+    pos += 1
+    while pos < len(css) and css[pos] != quote:
+        pos += 2 if css[pos] == '\\' else 1
+    return pos + 1
+
+
+def skip_comment(css, pos):
+    end = css.find('*/', pos + 2)
+    return len(css) if end == -1 else end + 2
+
+
+def scan(css, pos, stops):
+    """Position of the first character of stops outside strings
+    and comments, len(css) if there is none.
+    """
+    while pos < len(css):
+        char = css[pos]
+        if char in stops:
+            return pos
+        if char in '\'"':
+            pos = skip_string(css, pos)
+        elif css.startswith('/*', pos):
+            pos = skip_comment(css, pos)
+        else:
+            pos += 1
+    return pos
+
+
+def block_end(css, pos):
+    """Position of the } closing the block opened at pos."""
+    depth = 0
+    while pos < len(css):
+        pos = scan(css, pos, '{}')
+        if pos == len(css):
+            break
+        depth += 1 if css[pos] == '{' else -1
+        if depth == 0:
+            return pos
+        pos += 1
+    return pos
+
+
+def rules(css):
+    """(prelude, block) of the top level rules, block is None
+    for statements like @charset.
+    """
+    pos = 0
+    while pos < len(css):
+        end = scan(css, pos, '{;}')
+        prelude = css[pos:end].strip()
+        if end == len(css) or css[end] != '{':
+            if prelude:
+                yield prelude, None
+            pos = end + 1
+            continue
+        close = block_end(css, end)
+        yield prelude, css[end + 1:close]
+        pos = close + 1
+
+
+def split_selectors(prelude):
+    selectors, depth, start = [], 0, 0
+    for pos, char in enumerate(prelude):
+        if char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            selectors.append(prelude[start:pos])
+            start = pos + 1
+    selectors.append(prelude[start:])
+    return [selector.strip() for selector in selectors]
+
+
+def outside_parentheses(selector):
+    result, depth = [], 0
+    for char in selector:
+        depth += char == '('
+        if depth == 0:
+            result.append(char)
+        depth -= char == ')' and depth > 0
+    return ''.join(result)
+
+
+def is_used(selector, words):
+    if '\\' in selector:
+        return True
+    plain = outside_parentheses(ATTRIBUTE.sub('', selector))
+    return all(name in words for name in CLASS_OR_ID.findall(plain))
+
+
+def comments(css):
+    """Leading /*! ... */ comments, the licenses."""
+    return ''.join(re.findall(r'/\*!.*?\*/', css, re.S)[:1])
+
+
+def purge_rules(css, words):
+    kept = []
+    for prelude, block in rules(css):
+        prelude = re.sub(r'/\*.*?\*/', '', prelude, flags=re.S).strip()
+        if block is None:
+            kept.append(f'{prelude};')
+        elif prelude.startswith(NESTED_AT_RULES):
+            block = purge_rules(block, words)
+            if block:
+                kept.append(f'{prelude}{{{block}}}')
+        elif prelude.startswith('@'):
+            kept.append(f'{prelude}{{{block}}}')
+        else:
+            selectors = [
+                selector for selector in split_selectors(prelude)
+                if is_used(selector, words)
+            ]
+            if selectors:
+                kept.append(f'{",".join(selectors)}{{{block}}}')
+    return ''.join(kept)
+
+
+def purge(css, words):
+    """css without the rules that can't match any of words."""
+    rules_css = purge_rules(css, words)
+    charset = '@charset "UTF-8";'
+    license = comments(css)
+    if rules_css.startswith(charset):
+        return charset + license + rules_css[len(charset):]
+    return license + rules_css
@@ -0,0 +1,40 @@
+"""Copy the primary SQLite database to the SQLite replicas.
+
+A stand-in for replication when replicas are tried locally.
+
+Usage: python manage.py sync_replicas
+"""
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+SQLITE = 'django.db.backends.sqlite3'
+
+
+class Command(BaseCommand):
+    help = 'Copy the primary SQLite database to every SQLite replica.'
+
+    def handle(self, *args, **options):
+        primary = settings.DATABASES['default']
+        if primary['ENGINE'] != SQLITE:
+            raise CommandError('The primary database is not SQLite.')
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError('No replicas, set DATABASE_REPLICA_URLS.')
+        for alias in settings.DATABASE_REPLICAS:
+            replica = settings.DATABASES[alias]
+            if replica['ENGINE'] != SQLITE:
+                self.stdout.write(f'{alias}: not SQLite, skipped.')
+                continue
+            connections[alias].close()
+            source = sqlite3.connect(primary['NAME'])
+            target = sqlite3.connect(replica['NAME'])
+            try:
+                source.backup(target)
+            finally:
+                source.close()
+                target.close()
+            self.stdout.write(self.style.SUCCESS(
+                f'{alias}: copied to {replica["NAME"]}.'
+            ))
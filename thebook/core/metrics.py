@@ -0,0 +1,169 @@
+"""In-process performance stats of the views.
+
+Every resolved view has a few bounded histograms: wall time,
+SQL query count and time, template render time and response size.
+"""
+import math
+import threading
+from contextvars import ContextVar
+from time import perf_counter
+
+# Bucket i holds values up to MIN_VALUE * GROWTH ** i: about 9 % error
+# from a microsecond (or a byte) to 10 ** 9, the last bucket takes the rest.
+MIN_VALUE = 1e-6
+GROWTH = 2 ** (1 / 8)
+BUCKETS = 400
+QUANTILES = (0.5, 0.9, 0.95, 0.99)
+
+METRICS = {
+    'request_seconds': 'Wall time of the request.',
+    'db_queries': 'Number of SQL queries.',
+    'db_seconds': 'Time spent in SQL queries.',
+    'template_seconds': 'Time spent rendering templates.',
+    'response_bytes': 'Size of the response body.',
+}
+
+# Per template and include, with settings.TEMPLATE_PROFILING.
+TEMPLATE_METRICS = {
+    'render_seconds': 'Time spent rendering a template or include.',
+}
+
+
+class Histogram:
+    """Log-scale histogram with a fixed number of buckets."""
+
+    def __init__(self):
+        self.counts = [0] * (BUCKETS + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    @staticmethod
+    def bucket(value):
+        if value <= MIN_VALUE:
+            return 0
+        return min(
+            BUCKETS, math.ceil(math.log(value / MIN_VALUE, GROWTH))
+        )
+
+    def add(self, value):
+        self.counts[self.bucket(value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def percentile(self, quantile):
+        if not self.count:
+            return 0.0
+        rank = quantile * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                if index == BUCKETS:
+                    break
+                return min(MIN_VALUE * GROWTH ** index, self.max)
+        return self.max
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'max': self.max,
+            **{f'p{round(q * 100)}': self.percentile(q) for q in QUANTILES},
+        }
+
+
+class Registry:
+    """Histograms per view name, safe to use from several threads."""
+
+    def __init__(self, metrics=METRICS):
+        self.metrics = metrics
+        self.lock = threading.Lock()
+        self.views = {}
+
+    def record(self, view_name, **values):
+        with self.lock:
+            histograms = self.views.setdefault(
+                view_name, {name: Histogram() for name in self.metrics}
+            )
+            for name, value in values.items():
+                histograms[name].add(value)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                view_name: {
+                    name: histogram.as_dict()
+                    for name, histogram in histograms.items()
+                }
+                for view_name, histograms in self.views.items()
+            }
+
+    def reset(self):
+        with self.lock:
+            self.views = {}
+
+
+registry = Registry()
+templates = Registry(TEMPLATE_METRICS)
+
+
+class RequestStats:
+    """Counters of the request being processed."""
+
+    def __init__(self):
+        self.queries = 0
+        self.query_time = 0.0
+        self.render_time = 0.0
+
+    def query_wrapper(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.query_time += perf_counter() - start
+
+
+current_stats = ContextVar('current_stats', default=None)
+
+
+def count_query(execute, sql, params, many, context):
+    """Execute wrapper of every connection, see CoreConfig.ready."""
+    stats = current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    return stats.query_wrapper(execute, sql, params, many, context)
+
+
+def install_query_counter(sender, connection, **kwargs):
+    if count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_query)
+
+
+def add_render_time(seconds):
+    stats = current_stats.get()
+    if stats is not None:
+        stats.render_time += seconds
+
+
+def prometheus_text(snapshot, prefix='thebook', metrics=METRICS,
+                    label_name='view'):
+    """Stats in the Prometheus text exposition format (summaries)."""
+    lines = []
+    for name, description in metrics.items():
+        metric = f'{prefix}_{name}'
+        lines.append(f'# HELP {metric} {description}')
+        lines.append(f'# TYPE {metric} summary')
+        for view_name, histograms in sorted(snapshot.items()):
+            stats = histograms[name]
+            label = f'{label_name}="{view_name}"'
+            for quantile in QUANTILES:
+                value = stats[f'p{round(quantile * 100)}']
+                lines.append(
+                    f'{metric}{{{label},quantile="{quantile}"}} {value:.6g}'
+                )
+            lines.append(f'{metric}_sum{{{label}}} {stats["sum"]:.6g}')
+            lines.append(f'{metric}_count{{{label}}} {stats["count"]}')
+    return '\n'.join(lines) + '\n'
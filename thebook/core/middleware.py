@@ -0,0 +1,135 @@
+"""Middleware of app core: per-view performance stats
+and read replica routing.
+"""
+import logging
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from . import metrics, routers
+
+logger = logging.getLogger(__name__)
+
+
+class PerformanceMiddleware:
+    """Record wall time, SQL queries, template time and response size.
+
+    Requests running more than settings.PERF_QUERY_BUDGET queries
+    are logged as warnings. Works in sync and async stacks.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats = metrics.RequestStats()
+        token = metrics.current_stats.set(stats)
+        start = perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.current_stats.reset(token)
+        self.record(request, response, stats, perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        stats = metrics.RequestStats()
+        token = metrics.current_stats.set(stats)
+        start = perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.current_stats.reset(token)
+        self.record(request, response, stats, perf_counter() - start)
+        return response
+
+    def record(self, request, response, stats, seconds):
+        view_name = (
+            request.resolver_match.view_name
+            if request.resolver_match else 'unresolved'
+        )
+        metrics.registry.record(
+            view_name,
+            request_seconds=seconds,
+            db_queries=stats.queries,
+            db_seconds=stats.query_time,
+            template_seconds=stats.render_time,
+            response_bytes=(
+                0 if response.streaming else len(response.content)
+            ),
+        )
+        budget = settings.PERF_QUERY_BUDGET
+        if budget is not None and stats.queries > budget:
+            logger.warning(
+                '%s %s (%s) ran %d queries, budget is %d',
+                request.method, request.path, view_name,
+                stats.queries, budget,
+            )
+
+
+class ReplicaMiddleware:
+    """Let GET requests to app posts read from replicas.
+
+    A request that writes sets a cookie keeping the user
+    on the primary for settings.REPLICA_PIN_SECONDS,
+    so they see their own writes despite replication lag.
+    """
+    sync_capable = True
+    async_capable = True
+    namespaces = ('posts',)
+    # GET views that write read what they change from the primary.
+    primary_views = ('posts:profile_follow', 'posts:profile_unfollow')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = routers.RoutingState()
+        token = routers.routing_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            routers.routing_state.reset(token)
+        return self.pin(state, response)
+
+    async def __acall__(self, request):
+        state = routers.RoutingState()
+        token = routers.routing_state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            routers.routing_state.reset(token)
+        return self.pin(state, response)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = routers.routing_state.get()
+        if (
+            state is not None
+            and request.method in ('GET', 'HEAD')
+            and request.resolver_match.namespace in self.namespaces
+            and request.resolver_match.view_name not in self.primary_views
+            and routers.PIN_COOKIE not in request.COOKIES
+        ):
+            state.use_replica()
+
+    def pin(self, state, response):
+        if state.wrote and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                routers.PIN_COOKIE,
+                '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
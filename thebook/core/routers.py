@@ -0,0 +1,51 @@
+"""Database router sending reads of GET requests to read replicas.
+
+ReplicaMiddleware decides per request whether reads may go to
+a replica and picks one for the whole request; writes and every
+read after a write go to the primary.
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+
+PIN_COOKIE = 'read_primary'
+
+
+class RoutingState:
+    """Routing of the request being processed."""
+
+    def __init__(self):
+        # Replica of all reads of the request, None for the primary.
+        self.replica = None
+        self.wrote = False
+
+    def use_replica(self):
+        if settings.DATABASE_REPLICAS:
+            self.replica = random.choice(settings.DATABASE_REPLICAS)
+
+
+routing_state = ContextVar('routing_state', default=None)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = routing_state.get()
+        if state is None or state.wrote:
+            return None
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = routing_state.get()
+        if state is not None:
+            state.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
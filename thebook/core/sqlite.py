@@ -0,0 +1,52 @@
+"""Production tuning of SQLite, enabled by settings.SQLITE_TUNING.
+
+Every new connection gets settings.SQLITE_PRAGMAS (WAL, synchronous,
+mmap and cache sizes, busy timeout); writes are retried
+when the database stays locked longer than the busy timeout.
+"""
+import random
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.db import OperationalError, transaction
+
+RETRY_DELAY = 0.05
+
+
+def apply_pragmas(sender, connection, **kwargs):
+    """connection_created handler, see CoreConfig.ready."""
+    if connection.vendor != 'sqlite' or not settings.SQLITE_TUNING:
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def is_locked(error):
+    return 'locked' in str(error) or 'busy' in str(error)
+
+
+def retry_on_locked(func):
+    """Run func in a transaction, retried a few times
+    if SQLite is locked by other writers.
+
+    Transactions begin immediate and take the write lock: wrap
+    the writes only, not reads such as rendering a form.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if not settings.SQLITE_TUNING:
+            return func(*args, **kwargs)
+        for attempt in range(settings.SQLITE_WRITE_RETRIES):
+            try:
+                with transaction.atomic():
+                    return func(*args, **kwargs)
+            except OperationalError as error:
+                if not is_locked(error):
+                    raise
+            # Random backoff, so retried writers don't collide again.
+            time.sleep(RETRY_DELAY * 2 ** attempt * random.random())
+        with transaction.atomic():
+            return func(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,157 @@
+"""Serving of collected static files by the application itself.
+
+The Docker image runs gunicorn with no reverse proxy in front,
+so the WSGI and ASGI applications are wrapped to answer requests
+under STATIC_URL from STATIC_ROOT. The file list is read once at
+startup. Fingerprinted files (names from the staticfiles.json
+manifest, see core.staticfiles) are cached as immutable, and a
+.br or .gz variant is sent when the client accepts it.
+"""
+import json
+import mimetypes
+import os
+from urllib.parse import urlsplit
+from wsgiref.util import FileWrapper
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.http import http_date
+
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+CHUNK_SIZE = 64 * 1024
+
+
+def accepted_encodings(header):
+    encodings = set()
+    for part in header.split(','):
+        name, _, params = part.strip().partition(';')
+        if params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00'):
+            encodings.add(name.strip().lower())
+    return encodings
+
+
+class StaticFile:
+    def __init__(self, path, immutable):
+        self.variants = {
+            encoding: (path + suffix, os.path.getsize(path + suffix))
+            for encoding, suffix in ENCODINGS
+            if os.path.exists(path + suffix)
+        }
+        self.variants[None] = (path, os.path.getsize(path))
+        content_type, _ = mimetypes.guess_type(path)
+        self.headers = [
+            ('Content-Type', content_type or 'application/octet-stream'),
+            ('Last-Modified', http_date(os.path.getmtime(path))),
+            ('Cache-Control', (
+                f'public, max-age={settings.STATIC_CACHE_MAX_AGE}, immutable'
+                if immutable else 'public, max-age=60'
+            )),
+        ]
+        if len(self.variants) > 1:
+            self.headers.append(('Vary', 'Accept-Encoding'))
+
+    def response(self, accept_encoding):
+        """(path, headers) of the best variant for the client."""
+        accepted = accepted_encodings(accept_encoding)
+        encoding = next(
+            (name for name, _ in ENCODINGS
+             if name in accepted and name in self.variants),
+            None,
+        )
+        path, size = self.variants[encoding]
+        headers = self.headers + [('Content-Length', str(size))]
+        if encoding is not None:
+            headers.append(('Content-Encoding', encoding))
+        return path, headers
+
+
+class StaticFiles:
+    """Url path -> StaticFile of everything in STATIC_ROOT."""
+
+    def __init__(self, root=None, url=None):
+        root = str(root or settings.STATIC_ROOT)
+        prefix = urlsplit(url or settings.STATIC_URL).path
+        self.prefix = prefix if prefix.startswith('/') else f'/{prefix}'
+        self.files = {}
+        if not os.path.isdir(root):
+            return
+        hashed = self.hashed_names(root)
+        suffixes = tuple(suffix for _, suffix in ENCODINGS)
+        for directory, _, names in os.walk(root):
+            for name in names:
+                path = os.path.join(directory, name)
+                if name.endswith(suffixes):
+                    continue
+                relative = os.path.relpath(path, root).replace(os.sep, '/')
+                self.files[self.prefix + relative] = StaticFile(
+                    path, relative in hashed
+                )
+
+    @staticmethod
+    def hashed_names(root):
+        try:
+            with open(os.path.join(root, 'staticfiles.json')) as file:
+                return set(json.load(file)['paths'].values())
+        except (OSError, ValueError, KeyError):
+            return set()
+
+    def find(self, method, path):
+        if method not in ('GET', 'HEAD') or not path.startswith(self.prefix):
+            return None
+        return self.files.get(path)
+
+
+class StaticFilesWSGI:
+    def __init__(self, application, files=None):
+        self.application = application
+        self.files = files or StaticFiles()
+
+    def __call__(self, environ, start_response):
+        static_file = self.files.find(
+            environ['REQUEST_METHOD'], environ.get('PATH_INFO', '')
+        )
+        if static_file is None:
+            return self.application(environ, start_response)
+        path, headers = static_file.response(
+            environ.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        start_response('200 OK', headers)
+        if environ['REQUEST_METHOD'] == 'HEAD':
+            return []
+        file_wrapper = environ.get('wsgi.file_wrapper', FileWrapper)
+        return file_wrapper(open(path, 'rb'), CHUNK_SIZE)
+
+
+def read(path):
+    with open(path, 'rb') as file:
+        return file.read()
+
+
+class StaticFilesASGI:
+    def __init__(self, application, files=None):
+        self.application = application
+        self.files = files or StaticFiles()
+
+    async def __call__(self, scope, receive, send):
+        static_file = None
+        if scope['type'] == 'http':
+            static_file = self.files.find(scope['method'], scope['path'])
+        if static_file is None:
+            await self.application(scope, receive, send)
+            return
+        headers = dict(scope['headers'])
+        path, response_headers = static_file.response(
+            headers.get(b'accept-encoding', b'').decode('latin-1')
+        )
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (name.lower().encode(), value.encode())
+                for name, value in response_headers
+            ],
+        })
+        body = b''
+        if scope['method'] != 'HEAD':
+            body = await sync_to_async(read, thread_sensitive=False)(path)
+        await send({'type': 'http.response.body', 'body': body})
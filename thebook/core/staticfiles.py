@@ -0,0 +1,98 @@
+"""Storage of collected static files: fingerprinted, purged
+and precompressed.
+
+collectstatic copies the files, drops unused rules of
+settings.STATIC_PURGE_CSS, names every file by its content hash
+(ManifestStaticFilesStorage) and writes .gz and, when the brotli
+package is installed, .br variants of the text files next to
+the hashed ones. core.static serves them.
+"""
+import gzip
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+from django.template import engines
+from django.template.utils import get_app_template_dirs
+
+from . import css
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSED_SUFFIXES = (
+    '.css', '.js', '.map', '.svg', '.json', '.txt', '.xml', '.html', '.ico'
+)
+# Smaller files are not worth a second request header round.
+MIN_COMPRESS_SIZE = 256
+
+
+def template_directories():
+    directories = [
+        directory
+        for engine in engines.all()
+        for directory in engine.template_dirs
+    ]
+    return [
+        Path(directory)
+        for directory in directories + list(get_app_template_dirs('templates'))
+    ]
+
+
+def compressed(content):
+    """{suffix: content} of the useful compressed variants."""
+    variants = {'.gz': gzip.compress(content, 9, mtime=0)}
+    if brotli is not None:
+        variants['.br'] = brotli.compress(content, quality=11)
+    return {
+        suffix: data for suffix, data in variants.items()
+        if len(data) < len(content)
+    }
+
+
+class StaticStorage(ManifestStaticFilesStorage):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.words = None
+
+    def _save(self, name, content):
+        if name in settings.STATIC_PURGE_CSS:
+            content = ContentFile(self.purge(content.read()))
+        return super()._save(name, content)
+
+    def purge(self, content):
+        if self.words is None:
+            self.words = css.template_words(template_directories())
+            self.words.update(settings.STATIC_PURGE_SAFELIST)
+        return css.purge(content.decode(), self.words).encode()
+
+    def post_process(self, paths, dry_run=False, **options):
+        # Hash the purged copies, not the source files.
+        paths = {
+            path: (self, path) if path in settings.STATIC_PURGE_CSS
+            else source
+            for path, source in paths.items()
+        }
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in sorted(set(self.hashed_files.values())):
+            for compressed_name in self.compress(name):
+                yield name, compressed_name, True
+
+    def compress(self, name):
+        if not name.endswith(COMPRESSED_SUFFIXES):
+            return []
+        with self.open(name) as file:
+            content = file.read()
+        if len(content) < MIN_COMPRESS_SIZE:
+            return []
+        names = []
+        for suffix, data in compressed(content).items():
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            names.append(self._save(name + suffix, ContentFile(data)))
+        return names
@@ -0,0 +1,40 @@
+"""Django template backend that reports render time to core.metrics.
+
+With settings.TEMPLATE_PROFILING the time of every rendered template
+also goes to core.metrics.templates, see core.template_loaders
+for the includes.
+"""
+from time import perf_counter
+
+from django.conf import settings
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates
+from django.template.backends.django import Template as DjangoTemplate
+from django.template.backends.django import reraise
+
+from . import metrics
+
+
+class Template(DjangoTemplate):
+    def render(self, context=None, request=None):
+        start = perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            seconds = perf_counter() - start
+            metrics.add_render_time(seconds)
+            if settings.TEMPLATE_PROFILING:
+                metrics.templates.record(
+                    self.template.name or '<string>', render_seconds=seconds
+                )
+
+
+class ProfilingDjangoTemplates(DjangoTemplates):
+    def from_string(self, template_code):
+        return Template(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return Template(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
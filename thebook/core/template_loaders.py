@@ -0,0 +1,92 @@
+"""Template loader that inlines includes and profiles them.
+
+Wrap it with the cached loader. With settings.TEMPLATE_INLINE_INCLUDES
+every {% include 'name' %} with a constant name is replaced by the
+source of the included template when the template is loaded, so the
+include is not looked up and rendered through a new template once per
+loop item. Includes with 'only' keep their own context and stay.
+An inlined include is put into {% with %} or {% scope %}
+(core.templatetags.inlining), so variables it sets, e.g. with
+{% regroup %}, don't leak into the including template.
+
+With settings.TEMPLATE_PROFILING every include is put into
+{% rendertime %} (core.templatetags.profiling), which records its
+render time in core.metrics.templates.
+"""
+import re
+
+from django.conf import settings
+from django.template import Origin, TemplateDoesNotExist
+from django.template.loaders.base import Loader as BaseLoader
+
+INCLUDE = re.compile(
+    r'{%\s*include\s+(?P<quote>[\'"])(?P<name>[^\'"]+)(?P=quote)'
+    r'(?P<options>[^%]*?)\s*%}'
+)
+
+
+def with_values(options):
+    """Values of "with a=b", '' without options, None for 'only'."""
+    bits = options.split()
+    if not bits:
+        return ''
+    if bits[0] != 'with' or len(bits) < 2 or 'only' in bits:
+        return None
+    return ' '.join(bits[1:])
+
+
+class Loader(BaseLoader):
+    def __init__(self, engine, loaders):
+        super().__init__(engine)
+        self.loaders = engine.get_template_loaders(loaders)
+        self.inline = settings.TEMPLATE_INLINE_INCLUDES
+        self.profile = settings.TEMPLATE_PROFILING
+
+    def get_dirs(self):
+        for loader in self.loaders:
+            if hasattr(loader, 'get_dirs'):
+                yield from loader.get_dirs()
+
+    def get_template_sources(self, template_name):
+        for loader in self.loaders:
+            for source in loader.get_template_sources(template_name):
+                origin = Origin(source.name, source.template_name, self)
+                origin.source = source
+                yield origin
+
+    def get_contents(self, origin):
+        return self.expand(
+            origin.source.loader.get_contents(origin.source),
+            {origin.template_name},
+        )
+
+    def read(self, template_name):
+        for origin in self.get_template_sources(template_name):
+            try:
+                return origin.source.loader.get_contents(origin.source)
+            except TemplateDoesNotExist:
+                continue
+        return None
+
+    def expand(self, contents, seen):
+        """contents with the includes inlined and profiled."""
+        def replace(match):
+            name = match['name']
+            values = with_values(match['options'])
+            source = None
+            if self.inline and values is not None and name not in seen:
+                source = self.read(name)
+            if source is None:
+                return self.profiled(name, match[0])
+            inlined = self.expand(source, seen | {name})
+            if values:
+                inlined = f'{{% with {values} %}}{inlined}{{% endwith %}}'
+            else:
+                inlined = f'{{% scope %}}{inlined}{{% endscope %}}'
+            return self.profiled(name, inlined)
+        return INCLUDE.sub(replace, contents)
+
+    def profiled(self, name, contents):
+        if not self.profile:
+            return contents
+        return f"{{% rendertime '{name}' %}}{contents}{{% endrendertime %}}"
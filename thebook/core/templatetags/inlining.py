@@ -0,0 +1,26 @@
+"""Scope of an inlined include, see core.template_loaders.
+"""
+from django import template
+
+register = template.Library()
+
+
+class ScopeNode(template.Node):
+    def __init__(self, nodelist):
+        self.nodelist = nodelist
+
+    def render(self, context):
+        # As {% include %} does: variables set inside stay inside.
+        with context.push():
+            return self.nodelist.render(context)
+
+
+@register.tag
+def scope(parser, token):
+    """{% scope %}...{% endscope %}"""
+    bits = token.split_contents()
+    if len(bits) != 1:
+        raise template.TemplateSyntaxError(f'{bits[0]} takes no arguments.')
+    nodelist = parser.parse(('endscope',))
+    parser.delete_first_token()
+    return ScopeNode(nodelist)
@@ -0,0 +1,37 @@
+"""Render time of a part of a template, see core.template_loaders.
+"""
+from time import perf_counter
+
+from django import template
+
+from .. import metrics
+
+register = template.Library()
+
+
+class RenderTimeNode(template.Node):
+    def __init__(self, name, nodelist):
+        self.name = name
+        self.nodelist = nodelist
+
+    def render(self, context):
+        start = perf_counter()
+        try:
+            return self.nodelist.render(context)
+        finally:
+            metrics.templates.record(
+                self.name, render_seconds=perf_counter() - start
+            )
+
+
+@register.tag
+def rendertime(parser, token):
+    """{% rendertime 'name' %}...{% endrendertime %}"""
+    bits = token.split_contents()
+    if len(bits) != 2 or bits[1][0] not in '\'"' or bits[1][0] != bits[1][-1]:
+        raise template.TemplateSyntaxError(
+            f'{bits[0]} takes one quoted name.'
+        )
+    nodelist = parser.parse(('endrendertime',))
+    parser.delete_first_token()
+    return RenderTimeNode(bits[1][1:-1], nodelist)
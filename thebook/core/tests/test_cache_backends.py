@@ -0,0 +1,24 @@
+"""Tests for the file cache app core."""
+import os
+import tempfile
+
+from django.test import SimpleTestCase
+
+from ..cache_backends import FileBasedCache
+
+
+class FileBasedCacheTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def test_cull_every_interval(self):
+        """The directory is listed every CULL_INTERVAL sets only."""
+        cache = FileBasedCache(self.directory, {
+            'OPTIONS': {'MAX_ENTRIES': 10, 'CULL_INTERVAL': 5},
+        })
+        for number in range(40):
+            cache.set(f'key {number}', number)
+            self.assertLessEqual(len(os.listdir(self.directory)), 15)
+        self.assertEqual(cache.get('key 39'), 39)
@@ -0,0 +1,50 @@
+"""Tests for the gunicorn settings."""
+import runpy
+from unittest import mock
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+CONFIG = str(settings.BASE_DIR / 'gunicorn.conf.py')
+
+
+def load(**environ):
+    with mock.patch.dict('os.environ', environ):
+        return runpy.run_path(CONFIG)
+
+
+class GunicornConfigTests(SimpleTestCase):
+    def test_profiles(self):
+        """Workers and threads follow the profile and the CPU count."""
+        config = load(GUNICORN_PROFILE='sync', CACHE_BACKEND='file')
+        self.assertEqual(config['workers'], config['CPUS'] * 2 + 1)
+        self.assertEqual(config['wsgi_app'], 'thebook.wsgi:application')
+        config = load(GUNICORN_PROFILE='gthread', WEB_CONCURRENCY='3')
+        self.assertEqual((config['workers'], config['threads']), (3, 4))
+        config = load()
+        self.assertEqual(config['wsgi_app'], 'thebook.asgi:application')
+        self.assertTrue(config['preload_app'])
+
+    def test_big_worker_is_recycled(self):
+        """Worker over the memory limit stops after the request."""
+        config = load(GUNICORN_MAX_WORKER_MEMORY_MB='1')
+        worker = mock.Mock(alive=True)
+        server = mock.Mock()
+        server.cfg.preload_app = False
+        config['post_fork'](server, worker)
+        for _ in range(config['MEMORY_CHECK_INTERVAL'] - 1):
+            config['post_request'](worker, None, None, None)
+        self.assertTrue(worker.alive)
+        config['post_request'](worker, None, None, None)
+        self.assertFalse(worker.alive)
+
+    def test_one_worker_with_locmem_cache(self):
+        """The locmem cache gets one worker, more are warned about."""
+        self.assertEqual(load(CACHE_BACKEND='locmem')['workers'], 1)
+        server = mock.Mock()
+        server.cfg.workers = 2
+        load(CACHE_BACKEND='locmem')['on_starting'](server)
+        server.log.warning.assert_called_once()
+        server.log.reset_mock()
+        load(CACHE_BACKEND='file')['on_starting'](server)
+        server.log.warning.assert_not_called()
@@ -0,0 +1,102 @@
+"""Tests for performance stats app core."""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..metrics import Histogram, registry
+
+User = get_user_model()
+
+
+class HistogramTests(TestCase):
+    def test_percentiles_are_close(self):
+        """Percentiles are within a bucket of the exact values."""
+        histogram = Histogram()
+        for value in range(1, 1001):
+            histogram.add(value / 1000)
+        stats = histogram.as_dict()
+        self.assertEqual(stats['count'], 1000)
+        self.assertEqual(stats['max'], 1)
+        self.assertAlmostEqual(stats['p50'], 0.5, delta=0.05)
+        self.assertAlmostEqual(stats['p99'], 0.99, delta=0.1)
+
+    def test_size_is_bounded(self):
+        """Huge values land in the last bucket."""
+        histogram = Histogram()
+        histogram.add(10 ** 12)
+        self.assertEqual(len(histogram.counts), len(Histogram().counts))
+        self.assertEqual(histogram.percentile(0.5), 10 ** 12)
+
+
+class PerformanceMiddlewareTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        cls.user = User.objects.create_user(username='user')
+
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+        self.staff_client = Client()
+        self.staff_client.force_login(self.staff)
+
+    def test_view_stats_are_recorded(self):
+        """Requests are counted per view name."""
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:index'))
+        stats = registry.snapshot()['posts:index']
+        self.assertEqual(stats['request_seconds']['count'], 2)
+        self.assertGreater(stats['db_queries']['max'], 0)
+        self.assertGreater(stats['template_seconds']['sum'], 0)
+        self.assertGreater(stats['response_bytes']['max'], 0)
+
+    def test_endpoints_are_for_staff_only(self):
+        """Stats are hidden from other users."""
+        user_client = Client()
+        user_client.force_login(self.user)
+        for name in (
+            'core:performance',
+            'core:performance_templates',
+            'core:performance_prometheus',
+        ):
+            with self.subTest(name=name):
+                response = user_client.get(reverse(name))
+                self.assertEqual(response.status_code, 302)
+                response = self.staff_client.get(reverse(name))
+                self.assertEqual(response.status_code, 200)
+
+    def test_prometheus_text(self):
+        """Prometheus format has quantiles per view."""
+        self.client.get(reverse('posts:index'))
+        response = self.staff_client.get(
+            reverse('core:performance_prometheus')
+        )
+        self.assertContains(
+            response,
+            'thebook_db_queries{view="posts:index",quantile="0.5"}'
+        )
+        self.assertContains(
+            response, 'thebook_request_seconds_count{view="posts:index"} 1'
+        )
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_token_access(self):
+        """Scrapers with the token get the stats without a session."""
+        response = self.client.get(
+            reverse('core:performance_prometheus'),
+            HTTP_AUTHORIZATION='Bearer secret',
+        )
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(PERF_QUERY_BUDGET=0)
+    def test_query_budget_is_logged(self):
+        """Requests over the query budget are logged."""
+        with self.assertLogs('core.middleware', 'WARNING'):
+            self.client.get(reverse('posts:index'))
+
+    @override_settings(PERF_QUERY_BUDGET=None)
+    def test_query_budget_disabled(self):
+        with self.assertNoLogs('core.middleware', 'WARNING'):
+            self.client.get(reverse('posts:index'))
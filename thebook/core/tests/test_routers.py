@@ -0,0 +1,88 @@
+"""Tests for read replica routing app core."""
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.models import Post
+
+from ..routers import PIN_COOKIE, ReplicaRouter, RoutingState, routing_state
+
+User = get_user_model()
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'])
+class ReplicaRouterTests(TestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.state = RoutingState()
+        token = routing_state.set(self.state)
+        self.addCleanup(routing_state.reset, token)
+
+    def test_reads_go_to_replica_when_allowed(self):
+        """Requests allowed by the middleware read from a replica."""
+        self.assertIsNone(self.router.db_for_read(Post))
+        self.state.use_replica()
+        self.assertEqual(self.router.db_for_read(Post), 'replica1')
+
+    def test_reads_after_write_go_to_primary(self):
+        """Once a request writes, it reads from the primary."""
+        self.state.use_replica()
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+        self.assertIsNone(self.router.db_for_read(Post))
+
+    def test_replicas_are_not_migrated(self):
+        """Migrations run on the primary only."""
+        self.assertFalse(self.router.allow_migrate('replica1', 'posts'))
+        self.assertIsNone(self.router.allow_migrate('default', 'posts'))
+
+
+# The primary stands in for a replica: routing is seen
+# through the choice of a replica.
+@override_settings(DATABASE_REPLICAS=['default'])
+class ReplicaMiddlewareTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.post = Post.objects.create(author=cls.user, text='post')
+
+    def setUp(self):
+        cache.clear()
+        self.user_client = Client()
+        self.user_client.force_login(self.user)
+        patcher = mock.patch(
+            'core.routers.random.choice', return_value='default'
+        )
+        self.choice = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_get_reads_from_replica(self):
+        """GET pages of app posts read from one replica."""
+        self.client.get(reverse('posts:index'))
+        self.choice.assert_called_once()
+
+    def test_other_apps_read_from_primary(self):
+        """Pages of other apps read from the primary."""
+        self.user_client.get(reverse('users:signup'))
+        self.assertFalse(self.choice.called)
+
+    def test_follow_reads_from_primary(self):
+        """Views writing on GET don't read from a lagging replica."""
+        for name in ('posts:profile_follow', 'posts:profile_unfollow'):
+            self.user_client.get(reverse(name, kwargs={'username': 'user'}))
+        self.assertFalse(self.choice.called)
+
+    def test_user_reads_own_writes(self):
+        """After a write the user reads from the primary."""
+        response = self.user_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.id}),
+            {'text': 'comment'},
+        )
+        self.assertIn(PIN_COOKIE, response.cookies)
+        self.choice.reset_mock()
+        self.user_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        )
+        self.assertFalse(self.choice.called)
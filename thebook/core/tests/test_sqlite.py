@@ -0,0 +1,87 @@
+"""Tests for SQLite tuning app core."""
+import os
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import OperationalError, connections, transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..backends.sqlite3.base import DatabaseWrapper
+from ..sqlite import retry_on_locked
+
+
+@override_settings(SQLITE_TUNING=True)
+class SqliteTuningTests(TestCase):
+    def test_pragmas_of_new_connections(self):
+        """New connections get the pragmas of the settings."""
+        connection = connections.create_connection('default')
+        self.addCleanup(connection.close)
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+            cursor.execute('PRAGMA synchronous')
+            # 1 is NORMAL.
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+    def test_locked_writes_are_retried(self):
+        """Locked writes are retried a few times."""
+        view = mock.Mock(side_effect=[
+            OperationalError('database is locked'),
+            OperationalError('database is locked'),
+            'response',
+        ])
+        with mock.patch('core.sqlite.time.sleep'):
+            self.assertEqual(retry_on_locked(view)('request'), 'response')
+        self.assertEqual(view.call_count, 3)
+
+    def test_other_errors_are_raised(self):
+        """Only lock errors are retried."""
+        view = mock.Mock(side_effect=OperationalError('no such table'))
+        with self.assertRaises(OperationalError):
+            retry_on_locked(view)('request')
+        self.assertEqual(view.call_count, 1)
+
+    @override_settings(SQLITE_WRITE_RETRIES=1)
+    def test_retries_are_bounded(self):
+        """The error is raised when retries run out."""
+        view = mock.Mock(side_effect=OperationalError('database is locked'))
+        with mock.patch('core.sqlite.time.sleep'):
+            with self.assertRaises(OperationalError):
+                retry_on_locked(view)('request')
+        self.assertEqual(view.call_count, 2)
+
+    def test_form_pages_read_without_lock(self):
+        """Only saving a form runs in a retried transaction."""
+        user = get_user_model().objects.create_user(username='user')
+        self.client.force_login(user)
+        with mock.patch(
+            'core.sqlite.transaction', wraps=transaction
+        ) as retried:
+            self.client.get(reverse('posts:post_create'))
+            retried.atomic.assert_not_called()
+            self.client.post(reverse('posts:post_create'), {'text': 'post'})
+            retried.atomic.assert_called_once()
+
+
+class ImmediateTransactionTests(SimpleTestCase):
+    def test_transactions_begin_immediate(self):
+        """Transactions take the write lock when they start."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = {
+            **connections['default'].settings_dict,
+            'NAME': os.path.join(directory.name, 'db.sqlite3'),
+        }
+        connection = DatabaseWrapper(settings, alias='immediate')
+        self.addCleanup(connection.close)
+        with CaptureQueriesContext(connection) as queries:
+            # As transaction.atomic() does.
+            connection.set_autocommit(
+                False, force_begin_transaction_with_broken_autocommit=True
+            )
+            connection.cursor().execute('CREATE TABLE t (id integer)')
+            connection.commit()
+        self.assertEqual(queries[0]['sql'], 'BEGIN IMMEDIATE')
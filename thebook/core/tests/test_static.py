@@ -0,0 +1,130 @@
+"""Tests for the static files pipeline app core."""
+import gzip
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+from ..css import purge
+from ..static import StaticFiles, StaticFilesASGI, StaticFilesWSGI
+
+STATIC_ROOT = Path(tempfile.gettempdir(), 'thebook-test-static')
+
+
+@override_settings(
+    STATIC_ROOT=STATIC_ROOT,
+    STATICFILES_FINDERS=[
+        'django.contrib.staticfiles.finders.FileSystemFinder',
+    ],
+    STORAGES={
+        'default': {
+            'BACKEND': 'django.core.files.storage.FileSystemStorage',
+        },
+        'staticfiles': {'BACKEND': 'core.staticfiles.StaticStorage'},
+    },
+)
+class StaticPipelineTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command('collectstatic', interactive=False, verbosity=0)
+        cls.files = StaticFiles(STATIC_ROOT, '/static/')
+        cls.css = next(
+            path for path in cls.files.files
+            if path.startswith('/static/css/bootstrap.min.')
+            and path.count('.') == 3
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(STATIC_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def application(self, environ, start_response):
+        start_response('404 Not Found', [])
+        return [b'django']
+
+    def wsgi(self, path, **headers):
+        environ = {'REQUEST_METHOD': 'GET', 'PATH_INFO': path, **headers}
+        response = {}
+
+        def start_response(status, headers):
+            response.update(status=status, headers=dict(headers))
+        app = StaticFilesWSGI(self.application, self.files)
+        response['body'] = b''.join(app(environ, start_response))
+        return response
+
+    def test_css_is_hashed_purged_and_compressed(self):
+        """Unused bootstrap rules are dropped, a gzip variant is written."""
+        source = Path(settings.STATICFILES_DIRS[0], 'css/bootstrap.min.css')
+        path = Path(STATIC_ROOT, self.css[len('/static/'):])
+        content = path.read_bytes()
+        self.assertLess(len(content), source.stat().st_size / 2)
+        self.assertIn(b'.navbar{', content)
+        self.assertNotIn(b'.carousel{', content)
+        self.assertEqual(
+            gzip.decompress(Path(f'{path}.gz').read_bytes()), content
+        )
+
+    def test_wsgi_serves_immutable_files(self):
+        """Hashed files are immutable, gzip is sent when accepted."""
+        response = self.wsgi(self.css, HTTP_ACCEPT_ENCODING='gzip, br;q=0')
+        self.assertEqual(response['status'], '200 OK')
+        self.assertIn('immutable', response['headers']['Cache-Control'])
+        self.assertEqual(response['headers']['Content-Encoding'], 'gzip')
+        self.assertEqual(response['headers']['Content-Type'], 'text/css')
+        plain = self.wsgi(self.css)
+        self.assertEqual(gzip.decompress(response['body']), plain['body'])
+        self.assertNotIn('Content-Encoding', plain['headers'])
+
+    def test_wsgi_passes_other_requests(self):
+        """Unhashed names are cached briefly, other urls go to Django."""
+        response = self.wsgi('/static/css/bootstrap.min.css')
+        self.assertEqual(
+            response['headers']['Cache-Control'], 'public, max-age=60'
+        )
+        for path in ('/static/missing.css', '/'):
+            with self.subTest(path=path):
+                self.assertEqual(self.wsgi(path)['body'], b'django')
+
+    async def test_asgi_serves_files(self):
+        """ASGI wrapper sends the same file."""
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        app = StaticFilesASGI(None, self.files)
+        scope = {
+            'type': 'http',
+            'method': 'GET',
+            'path': self.css,
+            'headers': [(b'accept-encoding', b'gzip')],
+        }
+        await app(scope, None, send)
+        headers = dict(messages[0]['headers'])
+        self.assertEqual(headers[b'content-encoding'], b'gzip')
+        self.assertEqual(
+            int(headers[b'content-length']), len(messages[1]['body'])
+        )
+
+
+class PurgeTests(SimpleTestCase):
+    def test_purge(self):
+        """Rules with unknown classes go, @media blocks are purged."""
+        css = (
+            '/*! license */a{color:red}.used,.unused{margin:0}'
+            '.unused>.used{padding:0}.used:not(.unused){top:0}'
+            '@media (min-width:1px){.unused{left:0}}'
+            '@media print{.used{right:0}}'
+            '@keyframes spin{from{opacity:0}}'
+        )
+        self.assertEqual(
+            purge(css, {'used'}),
+            '/*! license */a{color:red}.used{margin:0}'
+            '.used:not(.unused){top:0}@media print{.used{right:0}}'
+            '@keyframes spin{from{opacity:0}}',
+        )
@@ -0,0 +1,70 @@
+"""Tests for template loading and profiling app core."""
+from django.template import Context, Engine
+from django.test import SimpleTestCase, override_settings
+
+from .. import metrics
+
+TEMPLATES = {
+    'page.html': (
+        '{% for post in posts %}'
+        "{% include 'row.html' %}"
+        "{% include 'cell.html' with value=post %}"
+        '{% endfor %}'
+        "{% include 'row.html' only %}"
+        "{% if missing %}{% include 'missing.html' %}{% endif %}"
+    ),
+    'scoped.html': "{% include 'assign.html' %}[{{ name }}]",
+    'assign.html': "{% firstof 'set' as name %}",
+    'row.html': "[{{ post }}{% include 'cell.html' with value='!' %}]",
+    'cell.html': '<{{ value }}>',
+}
+
+
+def engine():
+    return Engine(
+        loaders=[
+            ('django.template.loaders.cached.Loader', [
+                ('core.template_loaders.Loader', [
+                    ('django.template.loaders.locmem.Loader', TEMPLATES),
+                ]),
+            ]),
+        ],
+        builtins=[
+            'core.templatetags.inlining',
+            'core.templatetags.profiling',
+        ],
+    )
+
+
+class TemplateLoaderTests(SimpleTestCase):
+    def setUp(self):
+        metrics.templates.reset()
+
+    def render(self):
+        template = engine().get_template('page.html')
+        return template, template.render(Context({'posts': [1, 2]}))
+
+    @override_settings(TEMPLATE_INLINE_INCLUDES=True)
+    def test_includes_are_inlined(self):
+        """Inlined includes render the same page."""
+        template, content = self.render()
+        with self.settings(TEMPLATE_INLINE_INCLUDES=False):
+            self.assertEqual(content, self.render()[1])
+        self.assertEqual(content, '[1<!>]<1>[2<!>]<2>[<!>]')
+        self.assertEqual(template.source.count('{% include'), 2)
+
+    @override_settings(TEMPLATE_INLINE_INCLUDES=True)
+    def test_inlined_variables_stay_inside(self):
+        """Variables set by an inlined include don't leak out."""
+        template = engine().get_template('scoped.html')
+        self.assertEqual(template.render(Context()), '[]')
+
+    @override_settings(
+        TEMPLATE_INLINE_INCLUDES=True, TEMPLATE_PROFILING=True
+    )
+    def test_includes_are_profiled(self):
+        """Every render of an include is recorded."""
+        self.render()
+        snapshot = metrics.templates.snapshot()
+        self.assertEqual(snapshot['row.html']['render_seconds']['count'], 3)
+        self.assertEqual(snapshot['cell.html']['render_seconds']['count'], 5)
@@ -0,0 +1,46 @@
+"""Tests for views app core."""
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.http import Http404
+from django.test import RequestFactory, TestCase
+
+from ..views import serve_media
+
+HASHED = f'{"0" * 64}.gif'
+
+
+class ServeMediaTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_root = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        for name in ('image.gif', HASHED):
+            with open(f'{cls.media_root}/{name}', 'wb') as file:
+                file.write(b'GIF89a')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+        super().tearDownClass()
+
+    def test_media_is_immutable(self):
+        """Hashed media files are cached for long, missing ones are 404."""
+        request = RequestFactory().get(f'/media/{HASHED}')
+        response = serve_media(request, HASHED, document_root=self.media_root)
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn(
+            f'max-age={settings.MEDIA_CACHE_MAX_AGE}',
+            response['Cache-Control'],
+        )
+        with self.assertRaises(Http404):
+            serve_media(request, 'missing.gif', document_root=self.media_root)
+
+    def test_unhashed_media_is_cached_briefly(self):
+        """A file under its own name may be replaced, it isn't immutable."""
+        request = RequestFactory().get('/media/image.gif')
+        response = serve_media(
+            request, 'image.gif', document_root=self.media_root
+        )
+        self.assertEqual(response['Cache-Control'], 'public, max-age=60')
@@ -0,0 +1,21 @@
+"""Urls for app core.
+"""
+from django.urls import path
+
+from . import views
+
+app_name = 'core'
+
+urlpatterns = [
+    path('', views.performance, name='performance'),
+    path(
+        'templates/',
+        views.performance_templates,
+        name='performance_templates'
+    ),
+    path(
+        'prometheus/',
+        views.performance_prometheus,
+        name='performance_prometheus'
+    ),
+]
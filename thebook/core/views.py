@@ -0,0 +1,77 @@
+"""Views of app core.
+"""
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import patch_cache_control
+from django.utils.crypto import constant_time_compare
+from django.views.static import serve
+from posts.storage import HASHED_NAME
+
+from . import metrics
+
+
+def has_metrics_token(request):
+    token = settings.METRICS_TOKEN
+    header = request.headers.get('Authorization', '')
+    return bool(token) and constant_time_compare(header, f'Bearer {token}')
+
+
+def metrics_access(view):
+    """Staff users, or scrapers sending settings.METRICS_TOKEN."""
+    staff_view = staff_member_required(view)
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if has_metrics_token(request):
+            return view(request, *args, **kwargs)
+        return staff_view(request, *args, **kwargs)
+    return wrapper
+
+
+@metrics_access
+def performance(request):
+    return JsonResponse(metrics.registry.snapshot())
+
+
+@metrics_access
+def performance_templates(request):
+    return JsonResponse(metrics.templates.snapshot())
+
+
+@metrics_access
+def performance_prometheus(request):
+    text = metrics.prometheus_text(metrics.registry.snapshot())
+    templates = metrics.templates.snapshot()
+    if templates:
+        text += metrics.prometheus_text(
+            templates, metrics=metrics.TEMPLATE_METRICS,
+            label_name='template',
+        )
+    return HttpResponse(
+        text,
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
+
+
+def serve_media(request, path, document_root=None):
+    """Uploaded media in DEBUG.
+
+    Files under content hash names (posts.storage) never change and
+    are cached by browsers for long, other files for a minute.
+    """
+    response = serve(request, path, document_root=document_root)
+    if response.status_code not in (200, 304):
+        return response
+    if HASHED_NAME.search(path):
+        patch_cache_control(
+            response,
+            public=True,
+            max_age=settings.MEDIA_CACHE_MAX_AGE,
+            immutable=True,
+        )
+    else:
+        patch_cache_control(response, public=True, max_age=60)
+    return response
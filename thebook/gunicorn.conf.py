@@ -0,0 +1,133 @@
+"""Gunicorn settings of the production server.
+
+Usage: gunicorn -c gunicorn.conf.py
+
+GUNICORN_PROFILE picks the worker model:
+    asgi     uvicorn workers running thebook.asgi (default);
+    gthread  thread workers running thebook.wsgi;
+    sync     one request per worker process, thebook.wsgi.
+Workers and threads are sized from the CPUs the container may use,
+WEB_CONCURRENCY and GUNICORN_THREADS override them.
+
+The application is preloaded in the master (GUNICORN_PRELOAD), so the
+workers share its memory copy-on-write and start without importing
+Django. See python manage.py benchmark --server to compare profiles.
+Workers are recycled after GUNICORN_MAX_REQUESTS requests and,
+for the WSGI profiles, when they grow over
+GUNICORN_MAX_WORKER_MEMORY_MB.
+
+Several workers need a cache they share, e.g. CACHE_BACKEND=file:
+with the locmem cache a write would drop cached pages and objects
+in one worker only, so the default is one worker.
+"""
+import os
+
+
+def cpu_count():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def env_int(name, default):
+    return int(os.getenv(name, default))
+
+
+CPUS = cpu_count()
+
+PROFILES = {
+    # Async views, the event loop waits for SQLite in its thread pool.
+    'asgi': {
+        'wsgi_app': 'thebook.asgi:application',
+        'worker_class': 'uvicorn.workers.UvicornWorker',
+        'workers': max(CPUS, 2),
+        'threads': 1,
+    },
+    # Threads overlap the waits for SQLite, cache and slow clients.
+    'gthread': {
+        'wsgi_app': 'thebook.wsgi:application',
+        'worker_class': 'gthread',
+        'workers': CPUS + 1,
+        'threads': 4,
+    },
+    'sync': {
+        'wsgi_app': 'thebook.wsgi:application',
+        'worker_class': 'sync',
+        'workers': CPUS * 2 + 1,
+        'threads': 1,
+    },
+}
+
+profile = PROFILES[os.getenv('GUNICORN_PROFILE', 'asgi')]
+
+wsgi_app = profile['wsgi_app']
+worker_class = profile['worker_class']
+# As in settings.CACHES.
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'locmem')
+workers = env_int(
+    'WEB_CONCURRENCY', 1 if CACHE_BACKEND == 'locmem' else profile['workers']
+)
+threads = env_int('GUNICORN_THREADS', profile['threads'])
+bind = os.getenv('GUNICORN_BIND', f'0.0.0.0:{os.getenv("PORT", 8000)}')
+
+preload_app = os.getenv('GUNICORN_PRELOAD', 'True') == 'True'
+
+# No reverse proxy in front: clients keep their connections
+# for a few seconds, slow or stuck requests are cut.
+timeout = env_int('GUNICORN_TIMEOUT', 30)
+graceful_timeout = env_int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+keepalive = env_int('GUNICORN_KEEPALIVE', 5)
+
+max_requests = env_int('GUNICORN_MAX_REQUESTS', 1000)
+max_requests_jitter = max_requests // 10
+MAX_WORKER_MEMORY = env_int('GUNICORN_MAX_WORKER_MEMORY_MB', 300) * 2 ** 20
+# Requests between two memory checks of a worker.
+MEMORY_CHECK_INTERVAL = 50
+
+# Heartbeat files in memory, not on the overlay filesystem.
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+
+def rss():
+    """Resident memory of this process in bytes, 0 if unknown."""
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return 0
+
+
+def on_starting(server):
+    if server.cfg.workers > 1 and CACHE_BACKEND == 'locmem':
+        server.log.warning(
+            '%d workers have their own locmem cache each, pages and '
+            'objects changed in one are served stale by the others: '
+            'set CACHE_BACKEND=file.', server.cfg.workers
+        )
+
+
+def post_fork(server, worker):
+    worker.handled_requests = 0
+    if server.cfg.preload_app:
+        # Connections opened while preloading can't be shared by processes.
+        from django.db import connections
+        connections.close_all()
+
+
+def post_request(worker, req, environ, resp):
+    """Recycle a worker that grew over MAX_WORKER_MEMORY.
+
+    Uvicorn workers don't call this hook, they are recycled
+    by max_requests only.
+    """
+    worker.handled_requests += 1
+    if worker.handled_requests % MEMORY_CHECK_INTERVAL:
+        return
+    memory = rss()
+    if memory > MAX_WORKER_MEMORY:
+        worker.log.info(
+            'Worker %s uses %d MB, restarting', worker.pid, memory // 2 ** 20
+        )
+        worker.alive = False
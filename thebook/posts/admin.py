@@ -3,7 +3,7 @@ There Group, Book, Post and Comment.
 """
 from django.contrib import admin
 
-from .models import Book, Comment, Group, Post
+from .models import Book, Comment, Follow, Group, Post
 
 
 class GroupAdmin(admin.ModelAdmin):
@@ -35,7 +35,13 @@ class CommentAdmin(admin.ModelAdmin):
     empty_value_display = '-empty-'
 
 
+class FollowAdmin(admin.ModelAdmin):
+    list_display = ('user', 'author')
+    search_fields = ('user__username', 'author__username')
+
+
 admin.site.register(Comment, CommentAdmin)
 admin.site.register(Group, GroupAdmin)
 admin.site.register(Book, BookAdmin)
 admin.site.register(Post, PostAdmin)
+admin.site.register(Follow, FollowAdmin)
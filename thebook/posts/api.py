@@ -0,0 +1,248 @@
+"""Read-only JSON API of app posts, version 1.
+
+The same data as the feed, book and post pages, without templates:
+rows are read with values() in one query per page (related names
+come through joins) and encoded straight to JSON, with orjson when
+it is installed.
+
+Query parameters:
+    fields   comma-separated names of the fields to return;
+    cursor   page cursor from the next or previous field;
+    limit    page size, up to MAX_LIMIT;
+    format   'compact' gives field names once and rows as lists.
+Responses have ETags of the page cache scopes (cache.conditional_page).
+"""
+import json
+import re
+
+from django.http import Http404, HttpResponse
+
+from . import cache
+from .models import Book, Comment, Post
+from .pagination import CursorPaginator
+from .storage import image_storage
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+COMPACT = 'compact'
+
+
+def isoformat(value):
+    return value.isoformat() if value is not None else None
+
+
+def image_url(name):
+    return image_storage.url(name) if name else None
+
+
+class Resource:
+    """Fields of a model in the API: name -> (lookup, converter)."""
+
+    def __init__(self, queryset, fields, keys=('id',)):
+        self.queryset = queryset
+        self.fields = {
+            name: field if isinstance(field, tuple) else (field, None)
+            for name, field in fields.items()
+        }
+        self.keys = keys
+
+    def names(self, request):
+        """Requested field names, ValueError for unknown ones."""
+        raw = request.GET.get('fields')
+        if not raw:
+            return list(self.fields)
+        names = [name.strip() for name in raw.split(',') if name.strip()]
+        unknown = [name for name in names if name not in self.fields]
+        if unknown:
+            raise ValueError(f'Unknown fields: {", ".join(unknown)}.')
+        return names
+
+    def values(self, queryset, names):
+        lookups = {self.fields[name][0] for name in names}
+        return queryset.values(*lookups.union(self.keys))
+
+    def row(self, values, names):
+        row = []
+        for name in names:
+            lookup, converter = self.fields[name]
+            value = values[lookup]
+            row.append(value if converter is None else converter(value))
+        return row
+
+
+POSTS = Resource(
+    Post.objects.all(),
+    {
+        'id': 'id',
+        'text': 'text',
+        'pub_date': ('pub_date', isoformat),
+        'author': 'author__username',
+        'group': 'group__slug',
+        'book': 'book_id',
+        'image': ('image', image_url),
+        'thumbnails': 'thumbnails',
+        'comment_count': 'comment_count',
+    },
+    keys=('pub_date', 'id'),
+)
+BOOKS = Resource(
+    Book.objects.all(),
+    {
+        'id': 'id',
+        'title': 'title',
+        'author_book': 'author_book',
+        'description': 'description',
+        'image': ('image_book', image_url),
+        'thumbnails': 'thumbnails',
+        'post_count': 'post_count',
+    },
+)
+COMMENTS = Resource(
+    Comment.objects.all(),
+    {
+        'id': 'id',
+        'text': 'text',
+        'author': 'author__username',
+        'created': ('created', isoformat),
+    },
+    keys=('created', 'id'),
+)
+POST_FILTERS = {
+    'group': 'group__slug',
+    'book': 'book_id',
+    'author': 'author__username',
+}
+# Page cache scope of each filter and its kwarg.
+FILTER_SCOPES = {
+    'group': (cache.GROUP, 'slug'),
+    'book': (cache.BOOK, 'book_id'),
+    'author': (cache.AUTHOR, 'username'),
+}
+# Slugs, ids and usernames; other values aren't put in cache keys.
+SCOPE_VALUE = re.compile(r'[\w.@+-]{1,150}')
+
+
+def dumps(data):
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(
+        data, ensure_ascii=False, separators=(',', ':')
+    ).encode()
+
+
+def json_response(data, status=200):
+    return HttpResponse(
+        dumps(data), content_type='application/json', status=status
+    )
+
+
+def limit(request):
+    try:
+        return min(max(int(request.GET['limit']), 1), MAX_LIMIT)
+    except (KeyError, ValueError):
+        return DEFAULT_LIMIT
+
+
+def page_response(request, resource, queryset):
+    """One cursor page of queryset rows."""
+    try:
+        names = resource.names(request)
+    except ValueError as error:
+        return json_response({'error': str(error)}, status=400)
+    page = CursorPaginator(
+        resource.values(queryset, names), limit(request), resource.keys
+    ).get_page(request.GET.get('cursor'))
+    rows = [resource.row(values, names) for values in page]
+    data = {'next': page.next_cursor, 'previous': page.previous_cursor}
+    if request.GET.get('format') == COMPACT:
+        data.update(fields=names, rows=rows)
+    else:
+        data['results'] = [dict(zip(names, row)) for row in rows]
+    return json_response(data)
+
+
+def object_response(request, resource, queryset):
+    """One row of queryset, 404 if there is none."""
+    try:
+        names = resource.names(request)
+    except ValueError as error:
+        return json_response({'error': str(error)}, status=400)
+    values = resource.values(queryset, names).first()
+    if values is None:
+        raise Http404('No object found.')
+    row = resource.row(values, names)
+    if request.GET.get('format') == COMPACT:
+        return json_response({'fields': names, 'row': row})
+    return json_response(dict(zip(names, row)))
+
+
+def post_list_scopes(request):
+    """Scopes of the filters, so other posts keep a filtered page cached.
+
+    Group slugs and book ids of the posts are in the CATALOG scope.
+    """
+    scopes = []
+    for parameter, (scope, name) in FILTER_SCOPES.items():
+        value = request.GET.get(parameter)
+        if value is None:
+            continue
+        if not SCOPE_VALUE.fullmatch(value):
+            return [cache.FEED]
+        scopes.append(scope.format(**{name: value}))
+    return scopes + [cache.CATALOG] if scopes else [cache.FEED]
+
+
+@cache.conditional_page(post_list_scopes, cache.AUTHORS)
+@cache.cache_anonymous_page(post_list_scopes, cache.AUTHORS)
+def post_list(request):
+    """Feed of posts, filtered by ?group=slug, ?book=id or ?author=name.
+    """
+    filters = {
+        lookup: request.GET[parameter]
+        for parameter, lookup in POST_FILTERS.items()
+        if parameter in request.GET
+    }
+    try:
+        queryset = POSTS.queryset.filter(**filters)
+    except ValueError:
+        return json_response({'error': 'Invalid filter.'}, status=400)
+    return page_response(request, POSTS, queryset)
+
+
+@cache.conditional_page(cache.POST, cache.CATALOG, cache.AUTHORS)
+@cache.cache_anonymous_page(cache.POST, cache.CATALOG, cache.AUTHORS)
+def post_detail(request, post_id):
+    return object_response(
+        request, POSTS, POSTS.queryset.filter(pk=post_id)
+    )
+
+
+@cache.conditional_page(cache.POST, cache.AUTHORS)
+@cache.cache_anonymous_page(cache.POST, cache.AUTHORS)
+def comment_list(request, post_id):
+    """Comments of a post, newest first."""
+    if not Post.objects.filter(pk=post_id).exists():
+        raise Http404('No Post found.')
+    return page_response(
+        request, COMMENTS, COMMENTS.queryset.filter(post_id=post_id)
+    )
+
+
+@cache.conditional_page(cache.BOOKS)
+@cache.cache_anonymous_page(cache.BOOKS)
+def book_list(request):
+    """Books by id, descending."""
+    return page_response(request, BOOKS, BOOKS.queryset)
+
+
+@cache.conditional_page(cache.BOOK)
+@cache.cache_anonymous_page(cache.BOOK)
+def book_detail(request, book_id):
+    return object_response(
+        request, BOOKS, BOOKS.queryset.filter(pk=book_id)
+    )
@@ -0,0 +1,19 @@
+"""Urls of the JSON API of app posts, version 1.
+"""
+from django.urls import path
+
+from . import api
+
+app_name = 'api_v1'
+
+urlpatterns = [
+    path('posts/', api.post_list, name='post_list'),
+    path('posts/<int:post_id>/', api.post_detail, name='post_detail'),
+    path(
+        'posts/<int:post_id>/comments/',
+        api.comment_list,
+        name='comment_list'
+    ),
+    path('books/', api.book_list, name='book_list'),
+    path('books/<int:book_id>/', api.book_detail, name='book_detail'),
+]
@@ -0,0 +1,26 @@
+"""Urls for app posts with the async read-only views.
+"""
+from django.urls import path
+
+from . import async_views
+from .urls import urlpatterns as sync_urlpatterns
+
+app_name = 'posts'
+
+ASYNC_VIEWS = {
+    'index': async_views.index,
+    'books': async_views.books,
+    'group_list': async_views.group_posts,
+    'book_list': async_views.book_posts,
+    'profile': async_views.profile,
+    'post_detail': async_views.post_detail,
+}
+
+urlpatterns = [
+    path(
+        str(pattern.pattern),
+        ASYNC_VIEWS.get(pattern.name, pattern.callback),
+        name=pattern.name
+    )
+    for pattern in sync_urlpatterns
+]
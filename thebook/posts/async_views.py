@@ -0,0 +1,152 @@
+"""Async variants of the read-only views of app posts.
+
+They are served under ASGI (see thebook/async_urls.py) and render
+the same templates as posts/views.py. Queries use the async ORM
+interface, independent ones run together with asyncio.gather.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.core.paginator import Paginator
+from django.http import Http404
+from django.shortcuts import render
+
+from . import cache, lookups, related
+from .forms import CommentForm
+from .models import Book, Follow, Post
+from .pagination import CursorPaginator
+from .views import PAGES_NUMBER, comments_paginator
+
+arender = sync_to_async(render)
+
+
+async def aget_object_or_404(queryset, **kwargs):
+    try:
+        return await queryset.aget(**kwargs)
+    except queryset.model.DoesNotExist:
+        raise Http404(f'No {queryset.model._meta.object_name} found.')
+
+
+async def alist(queryset):
+    return [row async for row in queryset]
+
+
+async def load_user(request):
+    """request.user, loaded outside the event loop."""
+    await sync_to_async(lambda: request.user.is_authenticated)()
+    return request.user
+
+
+async def feed_page(request, posts):
+    paginator = CursorPaginator(posts, PAGES_NUMBER)
+    return await paginator.aget_page(request.GET.get('cursor'))
+
+
+@cache.conditional_page(cache.FEED, cache.AUTHORS)
+@cache.cache_anonymous_page(cache.FEED, cache.AUTHORS)
+async def index(request):
+    """Main page with list of posts.
+    """
+    context = {
+        'title': 'Last changes.',
+        'page_obj': await feed_page(request, Post.objects.feed()),
+        'index': True,
+    }
+    return await arender(request, 'posts/index.html', context)
+
+
+@cache.cache_anonymous_page(cache.BOOKS)
+async def books(request):
+    """Page with list of all books.
+    """
+    paginator = Paginator(Book.objects.all(), PAGES_NUMBER)
+    page_obj = await sync_to_async(paginator.get_page)(
+        request.GET.get('page')
+    )
+    context = {
+        'title': 'All books.',
+        'page_obj': page_obj,
+    }
+    return await arender(request, 'posts/books.html', context)
+
+
+@cache.conditional_page(cache.GROUP, cache.AUTHORS)
+@cache.cache_anonymous_page(cache.GROUP, cache.AUTHORS)
+async def group_posts(request, slug):
+    """Group page.
+    """
+    group = await lookups.GROUPS.aget_or_404(slug)
+    context = {
+        'title': f'Записи сообщества {group}',
+        'group': group,
+        'page_obj': await feed_page(request, group.posts.feed()),
+    }
+    return await arender(request, 'posts/group_list.html', context)
+
+
+@cache.conditional_page(cache.BOOK, cache.RELATED, cache.AUTHORS)
+@cache.cache_anonymous_page(cache.BOOK, cache.RELATED, cache.AUTHORS)
+async def book_posts(request, book_id):
+    """Book page with posts about this book.
+    """
+    book = await lookups.BOOKS.aget_or_404(book_id)
+    page_obj, related_books = await asyncio.gather(
+        feed_page(request, book.posts.feed()),
+        alist(related.for_book(book.pk)),
+    )
+    context = {
+        'title': f'Posts about {book}',
+        'book': book,
+        'page_obj': page_obj,
+        'related_books': related_books,
+    }
+    return await arender(request, 'posts/book_list.html', context)
+
+
+async def is_following(user, username):
+    if not user.is_authenticated:
+        return False
+    return await Follow.objects.filter(
+        user=user, author__username=username
+    ).aexists()
+
+
+async def profile(request, username):
+    """Author page with his posts.
+    """
+    user = await load_user(request)
+    author, following = await asyncio.gather(
+        lookups.USERS.aget_or_404(username),
+        is_following(user, username),
+    )
+    context = {
+        'title': f'Author {author}',
+        'author': author,
+        'num_post_list': author.profile.post_count,
+        'page_obj': await feed_page(request, author.posts.feed()),
+        'author_equel_user': user == author,
+        'following': following,
+    }
+    return await arender(request, 'posts/profile.html', context)
+
+
+@cache.conditional_page(
+    cache.POST, cache.CATALOG, cache.RELATED, cache.AUTHORS
+)
+async def post_detail(request, post_id):
+    """Post detail page."""
+    user, post, comments, related_posts = await asyncio.gather(
+        load_user(request),
+        aget_object_or_404(Post.objects.feed(), pk=post_id),
+        comments_paginator(post_id).aget_page(request.GET.get('cursor')),
+        alist(related.for_post(post_id)),
+    )
+    context = {
+        'post': post,
+        'post_id': post.pk,
+        'author_equel_user': user == post.author,
+        'form': CommentForm(),
+        'comments': comments,
+        'related_posts': related_posts,
+    }
+    return await arender(request, 'posts/post_detail.html', context)
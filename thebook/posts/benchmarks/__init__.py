@@ -0,0 +1,5 @@
+"""Benchmarks of the views of apps posts and users, run by
+python manage.py benchmark.
+
+Results can be saved as a baseline and compared with it later.
+"""
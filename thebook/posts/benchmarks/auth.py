@@ -0,0 +1,62 @@
+"""Login, signup and session throughput."""
+from django.db import transaction
+from django.test import Client
+
+from ..models import User
+from .cases import Case
+from .sequential import run_case
+
+AUTH_PASSWORD = 'Benchmark-password-1'
+
+
+class CookielessClient(Client):
+    """Client that forgets cookies: sessions of rolled back
+    requests don't exist anymore.
+    """
+
+    def request(self, **request):
+        self.cookies.clear()
+        return super().request(**request)
+
+
+def run_auth(requests, warmup=0):
+    """Login and signup throughput (password hashing, session writes)
+    and a logged-in page (session and user reads).
+
+    The users are created in a transaction that is rolled back.
+    """
+    with transaction.atomic():
+        try:
+            user = User.objects.create_user(
+                'benchmark-login', password=AUTH_PASSWORD
+            )
+            member = Client()
+            member.force_login(user)
+            cases = {
+                'users:login post': Case(
+                    'users:login', method='post', writes=True, data={
+                        'username': user.username,
+                        'password': AUTH_PASSWORD,
+                    },
+                ),
+                'users:signup post': Case(
+                    'users:signup', method='post', writes=True, data={
+                        'username': 'benchmark-signup',
+                        'email': 'benchmark@example.com',
+                        'password1': AUTH_PASSWORD,
+                        'password2': AUTH_PASSWORD,
+                    },
+                ),
+                'posts:follow_index session': Case(
+                    'posts:follow_index', login=True
+                ),
+            }
+            return {
+                name: run_case(
+                    member if case.login else CookielessClient(),
+                    case, requests, warmup,
+                )
+                for name, case in cases.items()
+            }
+        finally:
+            transaction.set_rollback(True)
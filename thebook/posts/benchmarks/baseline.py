@@ -0,0 +1,36 @@
+"""Results saved as a baseline and compared with it later."""
+import json
+
+
+def compare(results, baseline, tolerance):
+    """Regressions of results against baseline.
+
+    p95 latency may grow by tolerance (a fraction), query counts
+    may not grow at all.
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result.get('queries', 0) > base.get('queries', 0):
+            regressions.append(
+                f'{name}: {result["queries"]} queries, '
+                f'baseline {base.get("queries", 0)}'
+            )
+        if result['p95'] > base['p95'] * (1 + tolerance):
+            regressions.append(
+                f'{name}: p95 {result["p95"]:.1f} ms, '
+                f'baseline {base["p95"]:.1f} ms'
+            )
+    return regressions
+
+
+def load_baseline(path):
+    with open(path) as file:
+        return json.load(file)
+
+
+def save_baseline(path, results):
+    with open(path, 'w') as file:
+        json.dump(results, file, indent=2, sort_keys=True)
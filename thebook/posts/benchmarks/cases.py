@@ -0,0 +1,118 @@
+"""Urls to benchmark: every named url of apps posts and users,
+with the busiest group, book, author and post of the database.
+"""
+from django.db import transaction
+from django.urls import reverse
+from users import urls as users_urls
+from users.models import Profile
+
+from .. import api_urls
+from .. import urls as posts_urls
+from ..models import Book, Group, Post
+
+# Views with async variants, compared under WSGI and ASGI.
+READ_VIEWS = (
+    'posts:index', 'posts:books', 'posts:group_list', 'posts:book_list',
+    'posts:profile', 'posts:post_detail',
+)
+# Views written to by the mixed benchmark.
+WRITE_VIEWS = ('posts:add_comment', 'posts:post_create')
+
+
+class Case:
+    """One url to benchmark.
+
+    Cases with writes run in a transaction that is rolled back,
+    so the database doesn't change between requests.
+    """
+
+    def __init__(self, name, kwargs=None, method='get', data=None,
+                 login=False, writes=False):
+        self.name = name
+        self.url = reverse(name, kwargs=kwargs)
+        self.method = method
+        self.data = data
+        self.login = login
+        self.writes = writes
+
+    def request(self, client):
+        send = getattr(client, self.method)
+        if not self.writes:
+            return send(self.url, self.data)
+        with transaction.atomic():
+            try:
+                return send(self.url, self.data)
+            finally:
+                transaction.set_rollback(True)
+
+
+def url_names():
+    """Names of every url of apps posts and users."""
+    return {
+        f'{module.app_name}:{pattern.name}'
+        for module in (posts_urls, api_urls, users_urls)
+        for pattern in module.urlpatterns
+    }
+
+
+def busiest(model, counter):
+    return model.objects.order_by(f'-{counter}', 'pk').first()
+
+
+def build_cases():
+    """(cases of every url, user to log in as), None without data."""
+    post = busiest(Post, 'comment_count')
+    group = busiest(Group, 'post_count')
+    book = busiest(Book, 'post_count')
+    if post is None or group is None or book is None:
+        return None
+    author = busiest(Profile, 'post_count').user
+    # Another author to follow and unfollow.
+    other = Profile.objects.exclude(
+        user=post.author
+    ).order_by('-post_count', 'pk').first() or Profile(user=author)
+    return [
+        Case('posts:index'),
+        Case('posts:group_list', {'slug': group.slug}),
+        Case('posts:book_list', {'book_id': book.pk}),
+        Case('posts:profile', {'username': author.username}),
+        Case(
+            'posts:profile_follow', {'username': other.user.username},
+            method='post', login=True, writes=True
+        ),
+        Case(
+            'posts:profile_unfollow', {'username': other.user.username},
+            method='post', login=True, writes=True
+        ),
+        Case('posts:follow_index', login=True),
+        Case('posts:post_detail', {'post_id': post.pk}),
+        Case('posts:comments', {'post_id': post.pk}),
+        Case(
+            'posts:post_create', method='post',
+            data={'text': 'Benchmark post.'}, login=True, writes=True
+        ),
+        Case('posts:post_edit', {'post_id': post.pk}, login=True),
+        Case('posts:book_edit', {'book_id': book.pk}, login=True),
+        Case('posts:book_create', login=True),
+        Case('posts:books'),
+        Case('posts:search', data={'q': 'book'}),
+        Case(
+            'posts:add_comment', {'post_id': post.pk}, method='post',
+            data={'text': 'Benchmark comment.'}, login=True, writes=True
+        ),
+        Case('api_v1:post_list'),
+        Case('api_v1:post_detail', {'post_id': post.pk}),
+        Case('api_v1:comment_list', {'post_id': post.pk}),
+        Case('api_v1:book_list', data={'format': 'compact'}),
+        Case('api_v1:book_detail', {'book_id': book.pk}),
+        Case('users:signup'),
+        Case('users:logout', method='post'),
+        Case('users:login'),
+    ], post.author
+
+
+def check(case, response):
+    if response.status_code >= 400:
+        raise RuntimeError(
+            f'{case.name} {case.url}: status {response.status_code}'
+        )
@@ -0,0 +1,76 @@
+"""Read views under concurrent clients, via WSGI and ASGI."""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+from asgiref.sync import sync_to_async
+from django.db import connections
+from django.test import AsyncClient, Client, override_settings
+
+from .cases import READ_VIEWS, check
+from .stats import shares, summarize
+
+ASGI_URLCONF = 'thebook.async_urls'
+INTERFACES = ('wsgi', 'asgi')
+
+
+def run_wsgi(case, requests, concurrency, user=None):
+    """Stats of requests sent by concurrency threads via WSGI."""
+    def worker(count):
+        client = Client()
+        if user is not None:
+            client.force_login(user)
+        timings = []
+        try:
+            for _ in range(count):
+                start = perf_counter()
+                response = client.get(case.url, case.data)
+                timings.append(perf_counter() - start)
+                check(case, response)
+        finally:
+            connections.close_all()
+        return timings
+
+    start = perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        timings = sum(executor.map(worker, shares(requests, concurrency)), [])
+    return summarize(timings, elapsed=perf_counter() - start)
+
+
+def run_asgi(case, requests, concurrency, user=None):
+    """Stats of requests sent by concurrency tasks via ASGI."""
+    async def worker(count):
+        client = AsyncClient()
+        if user is not None:
+            await sync_to_async(client.force_login)(user)
+        timings = []
+        for _ in range(count):
+            start = perf_counter()
+            response = await client.get(case.url, case.data)
+            timings.append(perf_counter() - start)
+            check(case, response)
+        return timings
+
+    async def main():
+        return await asyncio.gather(
+            *[worker(count) for count in shares(requests, concurrency)]
+        )
+
+    with override_settings(ROOT_URLCONF=ASGI_URLCONF):
+        start = perf_counter()
+        timings = sum(asyncio.run(main()), [])
+        elapsed = perf_counter() - start
+    return summarize(timings, elapsed=elapsed)
+
+
+def run_concurrent(cases, user, requests, concurrency,
+                   interfaces=INTERFACES, logged_in=False):
+    """Results by 'url name interface' of the read views."""
+    runners = {'wsgi': run_wsgi, 'asgi': run_asgi}
+    return {
+        f'{case.name} {interface}': runners[interface](
+            case, requests, concurrency, user if logged_in else None
+        )
+        for case in cases if case.name in READ_VIEWS
+        for interface in interfaces
+    }
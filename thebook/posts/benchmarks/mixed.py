@@ -0,0 +1,79 @@
+"""Reads while writes are happening."""
+import itertools
+import threading
+from time import perf_counter
+
+from django.db import OperationalError, connections
+from django.test import Client
+
+from .cases import READ_VIEWS, WRITE_VIEWS, check
+from .stats import summarize
+
+
+class MixedLoad:
+    """Write throughput and read latency while writes are happening.
+
+    Writer threads add comments and posts for real (they are not
+    rolled back), reader threads request the read views meanwhile.
+    Requests failing with "database is locked" are counted as errors.
+    """
+
+    def __init__(self, cases, user):
+        self.user = user
+        self.write_cases = [case for case in cases if case.name in WRITE_VIEWS]
+        self.read_cases = [case for case in cases if case.name in READ_VIEWS]
+        self.stop = threading.Event()
+        self.timings = {
+            case.name: [] for case in self.write_cases + self.read_cases
+        }
+        self.errors = dict.fromkeys(self.timings, 0)
+
+    def work(self, client, cycle):
+        try:
+            for case in itertools.cycle(cycle):
+                if self.stop.is_set():
+                    return
+                start = perf_counter()
+                try:
+                    check(case, getattr(client, case.method)(
+                        case.url, case.data
+                    ))
+                except (OperationalError, RuntimeError):
+                    self.errors[case.name] += 1
+                    continue
+                self.timings[case.name].append(perf_counter() - start)
+        finally:
+            connections.close_all()
+
+    def thread(self, number, writers):
+        client = Client()
+        if number < writers:
+            client.force_login(self.user)
+        cycle = self.write_cases if number < writers else self.read_cases
+        # Threads start at different cases.
+        shift = number % len(cycle)
+        return threading.Thread(
+            target=self.work, args=(client, cycle[shift:] + cycle[:shift])
+        )
+
+    def run(self, duration, writers, readers):
+        threads = [
+            self.thread(number, writers)
+            for number in range(writers + readers)
+        ]
+        start = perf_counter()
+        for thread in threads:
+            thread.start()
+        self.stop.wait(duration)
+        self.stop.set()
+        for thread in threads:
+            thread.join()
+        elapsed = perf_counter() - start
+        results = {}
+        for case in self.write_cases + self.read_cases:
+            kind = 'write' if case.name in WRITE_VIEWS else 'read'
+            results[f'{case.name} {kind}'] = {
+                **summarize(self.timings[case.name], elapsed=elapsed),
+                'errors': self.errors[case.name],
+            }
+        return results
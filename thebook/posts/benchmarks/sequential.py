@@ -0,0 +1,46 @@
+"""Every case requested one by one in process, through the test
+client, with the queries of every request counted.
+"""
+from time import perf_counter
+
+from core.metrics import RequestStats
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+
+from .cases import check
+from .stats import summarize
+
+
+def run_case(client, case, requests, warmup=0, cold=False):
+    """Latency (ms) percentiles, throughput and queries of a case."""
+    timings = []
+    queries = []
+    for number in range(warmup + requests):
+        if cold:
+            cache.clear()
+        stats = RequestStats()
+        with connection.execute_wrapper(stats.query_wrapper):
+            start = perf_counter()
+            response = case.request(client)
+            elapsed = perf_counter() - start
+        check(case, response)
+        if number >= warmup:
+            timings.append(elapsed)
+            queries.append(stats.queries)
+    return summarize(timings, queries)
+
+
+def run(cases, user, requests, warmup=0, cold=False, logged_in=False,
+        client_class=Client):
+    """Results of the cases by url name."""
+    anonymous = client_class()
+    member = client_class()
+    member.force_login(user)
+    return {
+        case.name: run_case(
+            member if case.login or logged_in else anonymous,
+            case, requests, warmup, cold
+        )
+        for case in cases
+    }
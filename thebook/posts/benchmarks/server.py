@@ -0,0 +1,147 @@
+"""Profiles of gunicorn.conf.py started and requested over HTTP."""
+import itertools
+import os
+import shutil
+import subprocess
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from urllib.error import URLError
+from urllib.parse import urlencode
+
+from django.conf import settings
+
+from .cases import READ_VIEWS
+from .stats import shares, summarize
+
+# Profiles of gunicorn.conf.py, started by the server benchmark.
+SERVER_PROFILES = ('sync', 'gthread', 'asgi')
+SERVER_START_TIMEOUT = 60
+
+
+class Server:
+    """gunicorn started with a profile of gunicorn.conf.py.
+
+    startup is the time until the first page is served,
+    memory the proportional set size of the master and workers.
+    """
+
+    def __init__(self, profile, port):
+        self.profile = profile
+        self.address = f'127.0.0.1:{port}'
+        self.process = None
+        self.startup = None
+
+    def __enter__(self):
+        gunicorn = shutil.which('gunicorn')
+        if gunicorn is None:
+            raise RuntimeError('gunicorn is not installed.')
+        start = perf_counter()
+        self.process = subprocess.Popen(
+            [gunicorn, '-c', 'gunicorn.conf.py'],
+            cwd=settings.BASE_DIR,
+            env={
+                # Profiles run their own worker counts on a shared cache.
+                'CACHE_BACKEND': 'file',
+                **os.environ,
+                'GUNICORN_PROFILE': self.profile,
+                'GUNICORN_BIND': self.address,
+            },
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        while not self.ready():
+            if (
+                self.process.poll() is not None
+                or perf_counter() - start > SERVER_START_TIMEOUT
+            ):
+                self.__exit__()
+                raise RuntimeError(f'gunicorn {self.profile} did not start.')
+            time.sleep(0.05)
+        self.startup = perf_counter() - start
+        return self
+
+    def __exit__(self, *exc_info):
+        self.process.terminate()
+        try:
+            self.process.wait(SERVER_START_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+    def url(self, case):
+        query = f'?{urlencode(case.data)}' if case.data else ''
+        return f'http://{self.address}{case.url}{query}'
+
+    def ready(self):
+        try:
+            with urllib.request.urlopen(f'http://{self.address}/', timeout=1):
+                return True
+        except (URLError, OSError):
+            return False
+
+    def pids(self):
+        pid = self.process.pid
+        try:
+            with open(f'/proc/{pid}/task/{pid}/children') as file:
+                return [pid] + [int(child) for child in file.read().split()]
+        except OSError:
+            return [pid]
+
+    def memory(self):
+        """Megabytes of the server processes, None if unknown."""
+        total = 0
+        for pid in self.pids():
+            try:
+                with open(f'/proc/{pid}/smaps_rollup') as file:
+                    total += sum(
+                        int(line.split()[1]) for line in file
+                        if line.startswith('Pss:')
+                    )
+            except OSError:
+                return None
+        return total / 1024
+
+
+def run_server(cases, profile, requests, concurrency, port):
+    """Startup, memory and stats of anonymous read views over HTTP."""
+    with Server(profile, port) as server:
+        urls = [server.url(case) for case in cases if case.name in READ_VIEWS]
+        errors = []
+
+        def worker(count):
+            timings = []
+            for url in itertools.islice(itertools.cycle(urls), count):
+                start = perf_counter()
+                try:
+                    with urllib.request.urlopen(url, timeout=30) as response:
+                        response.read()
+                except (URLError, OSError):
+                    errors.append(url)
+                    continue
+                timings.append(perf_counter() - start)
+            return timings
+
+        start = perf_counter()
+        with ThreadPoolExecutor(concurrency) as executor:
+            timings = sum(
+                executor.map(worker, shares(requests, concurrency)), []
+            )
+        elapsed = perf_counter() - start
+        return {
+            **summarize(timings, elapsed=elapsed),
+            'errors': len(errors),
+            'workers': len(server.pids()) - 1,
+            'startup': server.startup,
+            'memory': server.memory(),
+        }
+
+
+def run_servers(cases, profiles, requests, concurrency, port=8765):
+    """Results by 'server profile' of every profile."""
+    return {
+        f'server {profile}': run_server(
+            cases, profile, requests, concurrency, port
+        )
+        for profile in profiles
+    }
@@ -0,0 +1,33 @@
+"""Latency percentiles and throughput of request timings."""
+
+QUANTILES = (50, 95, 99)
+
+
+def percentile(ordered, quantile):
+    """Nearest-rank percentile of sorted values."""
+    rank = max(round(quantile / 100 * len(ordered) + 0.5), 1)
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(timings, queries=None, elapsed=None):
+    """Stats of request timings; throughput is per elapsed seconds
+    of concurrent requests, per summed timings of sequential ones.
+    """
+    ordered = sorted(timings) or [0]
+    result = {
+        'requests': len(timings),
+        'throughput': len(timings) / (elapsed or sum(timings) or 1),
+    }
+    if queries is not None:
+        result['queries'] = max(queries)
+    for quantile in QUANTILES:
+        result[f'p{quantile}'] = percentile(ordered, quantile) * 1000
+    return result
+
+
+def shares(requests, concurrency):
+    """Requests of every concurrent client."""
+    return [
+        requests // concurrency + (number < requests % concurrency)
+        for number in range(concurrency)
+    ]
@@ -0,0 +1,248 @@
+"""Page cache for anonymous feed traffic.
+
+Every cached page depends on a few scopes: the whole feed,
+one group, one book, one author or one post.
+Each scope has a version number in the cache and the version
+is part of the page key, so bumping it on write makes the old pages
+unreachable without touching pages of other scopes.
+
+Versions are clock readings, so they also serve as ETag and
+Last-Modified validators: conditional_page answers 304 Not Modified
+after a cache lookup, without rendering the page.
+"""
+import asyncio
+import hashlib
+import time
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+VERSION_KEY = 'posts:version:{}'
+PAGE_KEY = 'posts:pages:{}'
+
+# Scopes, formatted with the view kwargs.
+FEED = 'feed'
+BOOKS = 'books'
+GROUP = 'group:{slug}'
+BOOK = 'book:{book_id}'
+AUTHOR = 'author:{username}'
+POST = 'post:{post_id}'
+# Groups and books, shown by title on the post pages.
+CATALOG = 'catalog'
+# Related books and posts, see posts.related.
+RELATED = 'related'
+# Usernames, shown with posts and comments.
+AUTHORS = 'authors'
+
+
+def post_scopes(group_slug, book_id, username, post_id):
+    """Scopes of the pages showing a post."""
+    scopes = [
+        FEED,
+        AUTHOR.format(username=username),
+        POST.format(post_id=post_id),
+    ]
+    if group_slug is not None:
+        scopes.append(GROUP.format(slug=group_slug))
+    if book_id is not None:
+        scopes += [BOOKS, BOOK.format(book_id=book_id)]
+    return scopes
+
+
+def format_scopes(scopes, request, kwargs):
+    """Scopes formatted with the view kwargs, callables are called
+    with the request and return a list of scopes.
+    """
+    formatted = []
+    for scope in scopes:
+        if callable(scope):
+            formatted += scope(request)
+        else:
+            formatted.append(scope.format(**kwargs))
+    return formatted
+
+
+def get_versions(scopes):
+    """Current versions of scopes, missing ones are started."""
+    keys = [VERSION_KEY.format(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # Start from the clock so an evicted version never repeats.
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_versions(*scopes):
+    """Invalidate every page built with the given scopes.
+
+    Inside a transaction the versions change when it commits: a page
+    rendered meanwhile from the old rows is stored under old versions.
+    """
+    keys = [VERSION_KEY.format(scope) for scope in set(scopes)]
+    transaction.on_commit(lambda: store_versions(keys))
+
+
+def store_versions(keys):
+    versions = cache.get_many(keys)
+    now = time.time_ns()
+    cache.set_many(
+        {key: max(now, versions.get(key, 0) + 1) for key in keys}, None
+    )
+
+
+def page_key(request, scopes):
+    versions = get_versions(scopes)
+    raw = '|'.join(
+        [request.path, request.GET.urlencode()]
+        + [f'{scope}={version}' for scope, version in zip(scopes, versions)]
+    )
+    return PAGE_KEY.format(hashlib.md5(raw.encode()).hexdigest())
+
+
+def cached_page(request, scopes):
+    """(page key, cached response) of a request.
+
+    The key is None for requests that are never cached,
+    the response is None if the page is not in the cache.
+    """
+    if (
+        request.method not in ('GET', 'HEAD')
+        or request.user.is_authenticated
+    ):
+        return None, None
+    key = page_key(request, scopes)
+    cached = cache.get(key)
+    if cached is None:
+        return key, None
+    content, headers = cached
+    return key, HttpResponse(content, headers=headers)
+
+
+def store_page(key, response):
+    if (
+        key is not None
+        and response.status_code == 200
+        and not response.streaming
+    ):
+        # Headers of the view (Content-Type, Vary, Cache-Control,
+        # Content-Language...) are replayed with the content.
+        cache.set(
+            key,
+            (response.content, dict(response.headers)),
+            settings.FEED_CACHE_TIMEOUT,
+        )
+
+
+def validators(request, scopes):
+    """(ETag, Last-Modified timestamp) of a page built with scopes."""
+    versions = get_versions(scopes)
+    parts = [request.path, request.GET.urlencode(), str(request.user.pk)]
+    if request.user.is_authenticated:
+        # Pages of users render forms with the CSRF token, which
+        # changes on login: a page kept from before would be rejected.
+        parts.append(request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''))
+    raw = '|'.join(
+        parts
+        + [f'{scope}={version}' for scope, version in zip(scopes, versions)]
+    )
+    etag = f'"{hashlib.md5(raw.encode()).hexdigest()}"'
+    # Rounded up: a page is never older than its Last-Modified.
+    return etag, -(-max(versions) // 10 ** 9)
+
+
+def not_modified(request, scopes):
+    """(validators, 304 response or None) of a request."""
+    if request.method not in ('GET', 'HEAD'):
+        return None, None
+    etag, last_modified = validators(request, scopes)
+    # Only the ETag decides: Last-Modified has whole seconds, a change
+    # in the second the page was fetched would be answered 304.
+    response = get_conditional_response(request, etag=etag)
+    return (etag, last_modified), response
+
+
+def set_validators(response, checked):
+    if checked is None or response.status_code not in (200, 304):
+        return response
+    etag, last_modified = checked
+    response.headers['ETag'] = etag
+    response.headers['Last-Modified'] = http_date(last_modified)
+    # Stored copies are checked with the server on every use.
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+def conditional_page(*scopes):
+    """Answer 304 Not Modified when the page scopes did not change.
+
+    scopes are formatted with the view kwargs like in
+    cache_anonymous_page. The ETag also covers the query string
+    (page, cursor), the user and their CSRF cookie. Works with sync
+    and async views.
+    """
+    def decorator(view):
+        if asyncio.iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                checked, response = await sync_to_async(not_modified)(
+                    request, format_scopes(scopes, request, kwargs)
+                )
+                if response is None:
+                    response = await view(request, *args, **kwargs)
+                return set_validators(response, checked)
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            checked, response = not_modified(
+                request, format_scopes(scopes, request, kwargs)
+            )
+            if response is None:
+                response = view(request, *args, **kwargs)
+            return set_validators(response, checked)
+        return wrapper
+    return decorator
+
+
+def cache_anonymous_page(*scopes):
+    """Cache a GET page for logged-out users.
+
+    scopes are the scopes the page depends on, formatted
+    with the view kwargs, e.g. GROUP for group_posts(request, slug),
+    or functions of the request, see format_scopes.
+    Works with sync and async views.
+    """
+    def decorator(view):
+        if asyncio.iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                key, cached = await sync_to_async(cached_page)(
+                    request, format_scopes(scopes, request, kwargs)
+                )
+                if cached is not None:
+                    return cached
+                response = await view(request, *args, **kwargs)
+                await sync_to_async(store_page)(key, response)
+                return response
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            key, cached = cached_page(
+                request, format_scopes(scopes, request, kwargs)
+            )
+            if cached is not None:
+                return cached
+            response = view(request, *args, **kwargs)
+            store_page(key, response)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,103 @@
+"""Denormalized counters: Profile.post_count, Post.comment_count,
+Book.post_count and Group.post_count.
+"""
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from users.models import Profile
+
+from .models import Book, Comment, Follow, Group, Post, User
+
+
+def change(model, pk, field, delta, key='pk'):
+    """Atomically add delta to a counter of one row."""
+    if pk is None or not delta:
+        return
+    model.objects.filter(**{key: pk}).update(**{field: F(field) + delta})
+
+
+def change_post_counters(author_id, group_id, book_id, delta):
+    change(Profile, author_id, 'post_count', delta, key='user_id')
+    change(Group, group_id, 'post_count', delta)
+    change(Book, book_id, 'post_count', delta)
+
+
+def move_post_counters(old, new):
+    """Move counters of a post between authors, groups and books.
+
+    old and new are (author_id, group_id, book_id).
+    """
+    for model, key, old_pk, new_pk in zip(
+        (Profile, Group, Book), ('user_id', 'pk', 'pk'), old, new
+    ):
+        if old_pk != new_pk:
+            change(model, old_pk, 'post_count', -1, key=key)
+            change(model, new_pk, 'post_count', 1, key=key)
+
+
+def count_of(model, field):
+    """Subquery: number of rows of model pointing to the outer row."""
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(count=Count('pk'))
+            .values('count')
+        ),
+        0
+    )
+
+
+def rows(model, only, key='pk'):
+    """Rows of model to recount: all, or the pks of model in only."""
+    if only is None:
+        return model.objects.all()
+    if model not in only:
+        return model.objects.none()
+    return model.objects.filter(**{f'{key}__in': only[model]})
+
+
+def recount(only=None):
+    """Recompute counters in a few bulk UPDATE statements.
+
+    only maps User, Group, Book and Post to pks of the rows
+    to recount, by default every counter is recomputed.
+    """
+    Profile.objects.bulk_create(
+        [
+            Profile(user_id=user_id)
+            for user_id in rows(User, only).filter(
+                profile__isnull=True
+            ).values_list('pk', flat=True)
+        ],
+        ignore_conflicts=True,
+    )
+    users = None if only is None else {Profile: only.get(User, ())}
+    profiles = rows(Profile, users, key='user_id')
+    profiles.update(
+        post_count=Coalesce(
+            Subquery(
+                Post.objects.filter(author=OuterRef('user_id'))
+                .order_by()
+                .values('author')
+                .annotate(count=Count('pk'))
+                .values('count')
+            ),
+            0
+        )
+    )
+    profiles.update(
+        follower_count=Coalesce(
+            Subquery(
+                Follow.objects.filter(author=OuterRef('user_id'))
+                .order_by()
+                .values('author')
+                .annotate(count=Count('pk'))
+                .values('count')
+            ),
+            0
+        )
+    )
+    rows(Group, only).update(post_count=count_of(Post, 'group'))
+    rows(Book, only).update(post_count=count_of(Post, 'book'))
+    rows(Post, only).update(comment_count=count_of(Comment, 'post'))
@@ -1,11 +1,32 @@
 """Forms for app Post: PostForm, BookForm, CommentForm.
 """
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
 
+from . import images
 from .models import Book, Comment, Post
 
 
-class PostForm(forms.ModelForm):
+class ImageIngestionMixin:
+    """Pass a new upload of image_field through images.ingest
+    and record its width and height on the instance.
+    """
+    image_field = 'image'
+
+    def clean_image_upload(self):
+        upload = self.cleaned_data.get(self.image_field)
+        if not isinstance(upload, UploadedFile):
+            if not upload:
+                self.instance.image_width = None
+                self.instance.image_height = None
+            return upload
+        image, width, height = images.ingest(upload)
+        self.instance.image_width = width
+        self.instance.image_height = height
+        return image
+
+
+class PostForm(ImageIngestionMixin, forms.ModelForm):
     class Meta:
         model = Post
         fields = ('text', 'group', 'book', 'image')
@@ -16,8 +37,13 @@ class PostForm(forms.ModelForm):
             'image': 'Upload image'
         }
 
+    def clean_image(self):
+        return self.clean_image_upload()
+
+
+class BookForm(ImageIngestionMixin, forms.ModelForm):
+    image_field = 'image_book'
 
-class BookForm(forms.ModelForm):
     class Meta:
         model = Book
         fields = ('title', 'author_book', 'description', 'image_book')
@@ -29,6 +55,9 @@ class BookForm(forms.ModelForm):
 
         }
 
+    def clean_image_book(self):
+        return self.clean_image_upload()
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,68 @@
+"""Ingestion of uploaded images.
+
+An upload is validated from its header before decoding, downscaled to
+IMAGE_MAX_SIDE, re-encoded to IMAGE_FORMAT without metadata and named
+by the hash of its content, so identical uploads share one file.
+"""
+import hashlib
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+ALLOWED_FORMATS = ('JPEG', 'PNG', 'WEBP', 'GIF')
+EXTENSIONS = {'WEBP': 'webp', 'JPEG': 'jpg', 'PNG': 'png'}
+
+
+def content_name(upload):
+    """Hash of the upload and of the settings, read in chunks."""
+    digest = hashlib.sha256()
+    digest.update(
+        f'{settings.IMAGE_MAX_SIDE}:{settings.IMAGE_FORMAT}:'
+        f'{settings.IMAGE_QUALITY}:'.encode()
+    )
+    for chunk in upload.chunks():
+        digest.update(chunk)
+    upload.seek(0)
+    return f'{digest.hexdigest()}.{EXTENSIONS[settings.IMAGE_FORMAT]}'
+
+
+def ingest(upload):
+    """Return (file, width, height) ready to be saved to an ImageField."""
+    if upload.size > settings.IMAGE_MAX_UPLOAD_SIZE:
+        raise ValidationError(
+            'The file is too big, maximum is %(size)s MB.',
+            params={'size': settings.IMAGE_MAX_UPLOAD_SIZE // 2 ** 20},
+        )
+    upload.seek(0)
+    # Only the header is read here, pixels are decoded on demand.
+    image = Image.open(upload)
+    if image.format not in ALLOWED_FORMATS:
+        raise ValidationError('Unsupported image format.')
+    if image.width * image.height > settings.IMAGE_MAX_PIXELS:
+        raise ValidationError('The image has too many pixels.')
+    max_side = settings.IMAGE_MAX_SIDE
+    if image.format == 'JPEG':
+        # Let the decoder scale down by 1/2..1/8 while reading.
+        image.draft('RGB', (max_side, max_side))
+    image = ImageOps.exif_transpose(image)
+    keep_alpha = settings.IMAGE_FORMAT != 'JPEG' and (
+        'A' in image.getbands() or 'transparency' in image.info
+    )
+    mode = 'RGBA' if keep_alpha else 'RGB'
+    if image.mode != mode:
+        image = image.convert(mode)
+    image.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+    content = BytesIO()
+    # No exif or icc arguments: metadata is not copied.
+    image.save(
+        content,
+        settings.IMAGE_FORMAT,
+        quality=settings.IMAGE_QUALITY,
+        optimize=True,
+    )
+    upload.seek(0)
+    name = content_name(upload)
+    return ContentFile(content.getvalue(), name=name), *image.size
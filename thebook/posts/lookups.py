@@ -0,0 +1,203 @@
+"""Cache of the objects the routes are looked up by: Group by slug,
+Book by pk and User by username.
+
+Two levels: a small LRU dictionary in the process, whose entries
+live LOOKUP_CACHE_TTL seconds, and the shared Django cache behind it
+for LOOKUP_CACHE_TIMEOUT seconds. Saving or deleting an object, or
+changing its counters, drops both entries (posts.signals) and bumps
+the version of the object in the shared cache. Entries are stored
+with the version they were read at, so the dictionaries of other
+processes don't serve a dropped object: a hit costs one read
+of a version number instead of unpickling the object.
+
+Cached objects are shared between requests and must not be changed,
+views that edit objects read them from the database.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import Http404
+
+from .models import Book, Group, User
+
+LOOKUP_KEY = 'posts:lookup:{}:{}'
+VERSION_KEY = 'posts:lookup-version:{}:{}'
+
+
+class LocalCache:
+    """Thread-safe LRU dictionary with expiring entries."""
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl, size):
+        if ttl <= 0 or size <= 0:
+            return
+        with self.lock:
+            self.entries[key] = (time.monotonic() + ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > size:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class Lookup:
+    """Objects of queryset by the value of one field."""
+
+    def __init__(self, name, queryset, field):
+        self.name = name
+        self.queryset = queryset
+        self.field = field
+        self.local = LocalCache()
+
+    def key(self, value):
+        return LOOKUP_KEY.format(self.name, value)
+
+    def version_key(self, value):
+        return VERSION_KEY.format(self.name, value)
+
+    def version(self, value):
+        """Current version of the object, a missing one is started."""
+        key = self.version_key(value)
+        version = cache.get(key)
+        if version is None:
+            cache.add(key, time.time_ns(), None)
+            return cache.get(key)
+        return version
+
+    async def aversion(self, value):
+        key = self.version_key(value)
+        version = await cache.aget(key)
+        if version is None:
+            await cache.aadd(key, time.time_ns(), None)
+            return await cache.aget(key)
+        return version
+
+    @staticmethod
+    def fresh(entry, version):
+        """Object of a (version, object) entry read at version."""
+        if entry is None or entry[0] != version:
+            return None
+        return entry[1]
+
+    def remember(self, key, instance):
+        self.local.set(
+            key, instance,
+            settings.LOOKUP_CACHE_TTL, settings.LOOKUP_CACHE_SIZE
+        )
+
+    def get(self, value):
+        """The object or None."""
+        key = self.key(value)
+        # Read before the object: a change committed meanwhile
+        # bumps the version, and the entry is read again.
+        version = self.version(value)
+        instance = self.fresh(self.local.get(key), version)
+        if instance is None:
+            instance = self.fresh(cache.get(key), version)
+        if instance is None:
+            instance = self.queryset.filter(**{self.field: value}).first()
+            if instance is None:
+                return None
+            cache.set(
+                key, (version, instance), settings.LOOKUP_CACHE_TIMEOUT
+            )
+        self.remember(key, (version, instance))
+        return instance
+
+    async def aget(self, value):
+        key = self.key(value)
+        version = await self.aversion(value)
+        instance = self.fresh(self.local.get(key), version)
+        if instance is None:
+            instance = self.fresh(await cache.aget(key), version)
+        if instance is None:
+            instance = await self.queryset.filter(
+                **{self.field: value}
+            ).afirst()
+            if instance is None:
+                return None
+            await cache.aset(
+                key, (version, instance), settings.LOOKUP_CACHE_TIMEOUT
+            )
+        self.remember(key, (version, instance))
+        return instance
+
+    def get_or_404(self, value):
+        instance = self.get(value)
+        if instance is None:
+            raise Http404(f'No {self.queryset.model._meta.object_name} found.')
+        return instance
+
+    async def aget_or_404(self, value):
+        instance = await self.aget(value)
+        if instance is None:
+            raise Http404(f'No {self.queryset.model._meta.object_name} found.')
+        return instance
+
+    def forget(self, *values):
+        """Drop the objects with these values, None is skipped.
+
+        Inside a transaction they are dropped when it commits.
+        """
+        values = [value for value in values if value is not None]
+        transaction.on_commit(lambda: self.drop(values))
+
+    def drop(self, values):
+        keys = [self.key(value) for value in values]
+        for key in keys:
+            self.local.delete(key)
+        cache.delete_many(keys)
+        cache.set_many(
+            {self.version_key(value): time.time_ns() for value in values},
+            None,
+        )
+
+
+GROUPS = Lookup('group', Group.objects.all(), 'slug')
+BOOKS = Lookup('book', Book.objects.all(), 'pk')
+USERS = Lookup('user', User.objects.select_related('profile'), 'username')
+LOOKUPS = (GROUPS, BOOKS, USERS)
+
+
+def forget_all(batch_size=1000):
+    """Drop every object, after writes that skip the signals."""
+    for lookup in LOOKUPS:
+        values = lookup.queryset.values_list(lookup.field, flat=True)
+        batch = []
+        for value in values.iterator(chunk_size=batch_size):
+            batch.append(value)
+            if len(batch) == batch_size:
+                lookup.forget(*batch)
+                batch = []
+        lookup.forget(*batch)
+
+
+def clear_local():
+    """Empty the dictionaries of this process."""
+    for lookup in LOOKUPS:
+        lookup.local.clear()
@@ -0,0 +1,172 @@
+"""Benchmark every view of apps posts and users.
+
+Usage: python manage.py benchmark [--requests N] [--cold]
+       [--baseline FILE] [--save-baseline FILE]
+       [--concurrency N [--interface wsgi|asgi]]
+       [--writers N [--readers N] [--duration SECONDS]]
+       [--server sync|gthread|asgi [--concurrency N]]
+       [--auth]
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from ...benchmarks import (auth, baseline, cases, interfaces, mixed,
+                           sequential, server)
+
+
+class Command(BaseCommand):
+    help = 'Measure latency, throughput and queries of every view.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument(
+            '--cold',
+            action='store_true',
+            help='Clear the cache before every request.',
+        )
+        parser.add_argument(
+            '--logged-in',
+            action='store_true',
+            help='Request public pages as a logged-in user too.',
+        )
+        parser.add_argument(
+            '--only',
+            action='append',
+            help='Url name to benchmark, may be repeated.',
+        )
+        parser.add_argument(
+            '--baseline',
+            help='JSON file of earlier results, regressions fail.',
+        )
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=0.25,
+            help='Allowed growth of p95 latency against the baseline.',
+        )
+        parser.add_argument('--save-baseline', help='Write results here.')
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=0,
+            help='Concurrent clients: compare read views under WSGI '
+                 'and ASGI instead of timing every view one by one.',
+        )
+        parser.add_argument(
+            '--writers',
+            type=int,
+            default=0,
+            help='Threads adding comments and posts (for real): show '
+                 'write throughput and read latency meanwhile.',
+        )
+        parser.add_argument(
+            '--readers',
+            type=int,
+            default=4,
+            help='Threads reading while --writers write.',
+        )
+        parser.add_argument(
+            '--duration',
+            type=float,
+            default=10,
+            help='Seconds of the --writers benchmark.',
+        )
+        parser.add_argument(
+            '--interface',
+            choices=interfaces.INTERFACES,
+            action='append',
+            help='Interface of the concurrent benchmark, may be repeated.',
+        )
+
+        parser.add_argument(
+            '--server',
+            choices=server.SERVER_PROFILES,
+            action='append',
+            help='Start gunicorn with this profile of gunicorn.conf.py '
+                 'and request the read views over HTTP, may be repeated.',
+        )
+
+        parser.add_argument(
+            '--auth',
+            action='store_true',
+            help='Time login, signup and a logged-in page with the '
+                 'password hasher and session engine in use.',
+        )
+
+    def handle(self, *args, **options):
+        built = cases.build_cases()
+        if built is None:
+            raise CommandError('No data, run python manage.py seed first.')
+        selected, user = built
+        missing = cases.url_names() - {case.name for case in selected}
+        if missing:
+            raise CommandError(
+                'No benchmark case for ' + ', '.join(sorted(missing))
+            )
+        if options['only']:
+            selected = [
+                case for case in selected if case.name in options['only']
+            ]
+        try:
+            results = self.run(selected, user, options)
+        except RuntimeError as error:
+            raise CommandError(error)
+        self.write_results(results)
+        if options['save_baseline']:
+            baseline.save_baseline(options['save_baseline'], results)
+        if options['baseline']:
+            regressions = baseline.compare(
+                results,
+                baseline.load_baseline(options['baseline']),
+                options['tolerance'],
+            )
+            if regressions:
+                raise CommandError(
+                    'Regressions:\n' + '\n'.join(regressions)
+                )
+            self.stdout.write(self.style.SUCCESS('No regressions.'))
+
+    def run(self, selected, user, options):
+        if options['auth']:
+            return auth.run_auth(options['requests'], options['warmup'])
+        if options['server']:
+            return server.run_servers(
+                selected, options['server'], options['requests'],
+                options['concurrency'] or 8,
+            )
+        if options['writers']:
+            return mixed.MixedLoad(selected, user).run(
+                options['duration'], options['writers'], options['readers']
+            )
+        if options['concurrency']:
+            return interfaces.run_concurrent(
+                selected, user, options['requests'], options['concurrency'],
+                options['interface'] or interfaces.INTERFACES,
+                options['logged_in'],
+            )
+        return sequential.run(
+            selected, user, options['requests'], options['warmup'],
+            options['cold'], options['logged_in'],
+        )
+
+    def write_results(self, results):
+        self.stdout.write(
+            f'{"view":<31}{"req/s":>9}{"p50 ms":>9}{"p95 ms":>9}'
+            f'{"p99 ms":>9}{"queries":>9}{"errors":>9}'
+        )
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name:<31}{result["throughput"]:>9.1f}'
+                f'{result["p50"]:>9.2f}{result["p95"]:>9.2f}'
+                f'{result["p99"]:>9.2f}{result.get("queries", "-"):>9}'
+                f'{result.get("errors", "-"):>9}'
+            )
+        for name, result in results.items():
+            if 'startup' in result:
+                memory = result['memory']
+                self.stdout.write(
+                    f'{name}: {result["workers"]} workers, started in '
+                    f'{result["startup"]:.2f} s, '
+                    + ('memory unknown' if memory is None
+                       else f'{memory:.0f} MB')
+                )
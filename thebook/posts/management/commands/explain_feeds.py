@@ -0,0 +1,81 @@
+"""Show the database plan of every feed query.
+
+Usage: python manage.py explain_feeds [--strict]
+"""
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from ...models import Book, Comment, Group, Post, User
+from ...pagination import CursorPaginator
+from ...views import PAGES_NUMBER
+
+# SQLite plan lines meaning a full table scan or an extra sort.
+SQLITE_SLOW_PLAN = re.compile(
+    r'SCAN (posts_post|posts_comment)\s*$|USE TEMP B-TREE'
+)
+
+
+def first_pk(model):
+    return model.objects.values_list('pk', flat=True).first() or 0
+
+
+def feed_querysets():
+    """Querysets of the views, the same as built in posts/views.py."""
+    return {
+        'posts:index': (Post.objects.feed(), ('pub_date', 'id')),
+        'posts:group_list': (
+            Post.objects.feed().filter(group_id=first_pk(Group)),
+            ('pub_date', 'id')
+        ),
+        'posts:book_list': (
+            Post.objects.feed().filter(book_id=first_pk(Book)),
+            ('pub_date', 'id')
+        ),
+        'posts:profile': (
+            Post.objects.feed().filter(author_id=first_pk(User)),
+            ('pub_date', 'id')
+        ),
+        'posts:post_detail': (
+            Comment.objects.with_author().filter(post_id=first_pk(Post)),
+            ('created', 'id')
+        ),
+    }
+
+
+class Command(BaseCommand):
+    help = 'Run EXPLAIN for the query of each feed view.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--strict',
+            action='store_true',
+            help='Fail if a plan has a full table scan or a sort (SQLite).',
+        )
+
+    def handle(self, *args, **options):
+        slow = []
+        for name, (queryset, keys) in feed_querysets().items():
+            paginator = CursorPaginator(queryset, PAGES_NUMBER, keys)
+            pages = {
+                'first page': paginator.page_queryset(),
+                'next page': paginator.page_queryset([timezone.now(), 1]),
+            }
+            for page, page_queryset in pages.items():
+                plan = page_queryset.explain()
+                self.stdout.write(self.style.MIGRATE_HEADING(
+                    f'{name} ({page})'
+                ))
+                self.stdout.write(plan)
+                if connection.vendor == 'sqlite' and any(
+                    SQLITE_SLOW_PLAN.search(line)
+                    for line in plan.splitlines()
+                ):
+                    slow.append(f'{name} ({page})')
+        if slow:
+            message = 'Slow plans: ' + ', '.join(slow)
+            if options['strict']:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(message))
@@ -0,0 +1,42 @@
+"""Export books, posts or comments as JSON Lines or CSV.
+
+Usage: python manage.py export_data {books,posts,comments} [FILE]
+       [--format jsonl|csv] [--batch-size N]
+"""
+from django.core.management.base import BaseCommand
+
+from ... import transfer
+
+
+def file_format(path, chosen):
+    if chosen:
+        return chosen
+    return 'csv' if path and path.endswith('.csv') else 'jsonl'
+
+
+class Command(BaseCommand):
+    help = 'Stream rows of a model to a JSON Lines or CSV file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', choices=transfer.MODELS)
+        parser.add_argument(
+            'file', nargs='?', help='Output file, stdout by default.'
+        )
+        parser.add_argument('--format', choices=transfer.FORMATS)
+        parser.add_argument(
+            '--batch-size', type=int, default=transfer.BATCH_SIZE
+        )
+
+    def handle(self, *args, **options):
+        model = transfer.MODELS[options['model']]
+        rows = transfer.export_rows(model, options['batch_size'])
+        chosen = file_format(options['file'], options['format'])
+        columns = transfer.COLUMNS[model]
+        if not options['file']:
+            transfer.write_rows(rows, self.stdout, chosen, columns)
+            return
+        with open(options['file'], 'w', newline='') as file:
+            total = transfer.write_rows(rows, file, chosen, columns)
+        self.stdout.write(self.style.SUCCESS(
+            f'Exported {total} {options["model"]}.'
+        ))
@@ -0,0 +1,47 @@
+"""Generate thumbnails of existing images.
+
+Usage: python manage.py generate_thumbnails [--all] [--workers N]
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from ... import thumbnails
+
+
+class Command(BaseCommand):
+    help = 'Generate missing thumbnails of post and book images.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Regenerate thumbnails that already exist.',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Number of threads, 1 means in this thread.',
+        )
+
+    def handle(self, *args, **options):
+        jobs = []
+        for model, field in thumbnails.IMAGE_FIELDS.items():
+            queryset = model.objects.exclude(**{field: ''})
+            if not options['all']:
+                queryset = queryset.filter(thumbnails={})
+            jobs += [
+                (model, pk)
+                for pk in queryset.values_list('pk', flat=True).iterator()
+            ]
+        if options['workers'] > 1:
+            with ThreadPoolExecutor(options['workers']) as executor:
+                for model, pk in jobs:
+                    executor.submit(thumbnails.generate_in_worker, model, pk)
+        else:
+            for model, pk in jobs:
+                thumbnails.generate(model, pk)
+        self.stdout.write(
+            self.style.SUCCESS(f'Generated thumbnails of {len(jobs)} images.')
+        )
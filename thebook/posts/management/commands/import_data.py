@@ -0,0 +1,43 @@
+"""Import books, posts or comments from JSON Lines or CSV.
+
+Usage: python manage.py import_data {books,posts,comments} FILE
+       [--format jsonl|csv] [--batch-size N]
+"""
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ... import transfer
+from .export_data import file_format
+
+
+class Command(BaseCommand):
+    help = 'Create or update rows of a model in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', choices=transfer.MODELS)
+        parser.add_argument('file', help='Input file, - for stdin.')
+        parser.add_argument('--format', choices=transfer.FORMATS)
+        parser.add_argument(
+            '--batch-size', type=int, default=transfer.BATCH_SIZE
+        )
+
+    def handle(self, *args, **options):
+        model = transfer.MODELS[options['model']]
+        path = options['file']
+        chosen = file_format(path, options['format'])
+        file = sys.stdin if path == '-' else open(path, newline='')
+        try:
+            created, updated = transfer.import_rows(
+                model,
+                transfer.read_rows(file, chosen),
+                options['batch_size'],
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        finally:
+            if file is not sys.stdin:
+                file.close()
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {created}, updated {updated} {options["model"]}.'
+        ))
@@ -0,0 +1,22 @@
+"""Fill the search index from scratch, e.g. after a bulk load.
+
+Usage: python manage.py rebuild_search_index [--batch-size N]
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from ... import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index of posts, books, comments.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=search.BATCH_SIZE
+        )
+
+    def handle(self, *args, **options):
+        if not search.is_enabled():
+            raise CommandError('Search index is used with SQLite only.')
+        total = search.rebuild(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {total} documents.'))
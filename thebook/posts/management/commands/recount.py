@@ -0,0 +1,17 @@
+"""Recompute denormalized counters.
+
+Usage: python manage.py recount
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from ...counters import recount
+
+
+class Command(BaseCommand):
+    help = 'Recompute post and comment counters in bulk.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            recount()
+        self.stdout.write(self.style.SUCCESS('Counters are recomputed.'))
@@ -0,0 +1,26 @@
+"""Recompute related books and similar posts.
+
+Usage: python manage.py related [--size K]
+
+Run it periodically, e.g. nightly from cron.
+"""
+from django.core.management.base import BaseCommand
+
+from ... import related
+
+
+class Command(BaseCommand):
+    help = 'Recompute the stored neighbours of books and posts.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--size',
+            type=int,
+            help='Neighbours per book and post, RELATED_SIZE by default.',
+        )
+
+    def handle(self, *args, **options):
+        books, posts = related.rebuild(options['size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Stored {books} related books and {posts} related posts.'
+        ))
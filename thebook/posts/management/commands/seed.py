@@ -0,0 +1,48 @@
+"""Fill the database with generated data for benchmarks.
+
+Usage: python manage.py seed [--users N] [--posts N] [--comments N] ...
+"""
+from django.core.management.base import BaseCommand
+
+from ...seed import BATCH_SIZE, seed
+
+
+class Command(BaseCommand):
+    help = 'Generate users, groups, books, posts, comments and follows.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--books', type=int, default=500)
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument('--comments', type=int, default=300000)
+        parser.add_argument(
+            '--follows',
+            type=int,
+            default=20,
+            help='Authors followed by every user.',
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=365,
+            help='Posts are spread over this many past days.',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        totals = seed(
+            users=options['users'],
+            groups=options['groups'],
+            books=options['books'],
+            posts=options['posts'],
+            comments=options['comments'],
+            follows=options['follows'],
+            seed=options['seed'],
+            days=options['days'],
+            batch_size=options['batch_size'],
+        )
+        for model, total in totals.items():
+            self.stdout.write(f'{model}: {total}')
+        self.stdout.write(self.style.SUCCESS('Database is seeded.'))
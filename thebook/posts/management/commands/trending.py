@@ -0,0 +1,29 @@
+"""Decay the trend scores of books and groups and refresh the top lists.
+
+Usage: python manage.py trending [--rebuild]
+
+Run it periodically, e.g. hourly from cron; --rebuild recomputes
+the scores from all posts and comments.
+"""
+from django.core.management.base import BaseCommand
+
+from ... import trending
+
+
+class Command(BaseCommand):
+    help = 'Rebase trend scores and refresh the trending lists.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Recompute the scores from all posts and comments.',
+        )
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            trending.rebuild()
+        else:
+            trending.rebase()
+        trending.refresh()
+        self.stdout.write(self.style.SUCCESS('Trend scores are updated.'))
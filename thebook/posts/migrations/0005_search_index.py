@@ -0,0 +1,49 @@
+from django.db import migrations
+
+KIND_BITS = 2
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        'CREATE VIRTUAL TABLE IF NOT EXISTS posts_search USING fts5('
+        "title, author, body, tokenize='unicode61 remove_diacritics 2')"
+    )
+    Book = apps.get_model('posts', 'Book')
+    Comment = apps.get_model('posts', 'Comment')
+    Post = apps.get_model('posts', 'Post')
+    documents = [
+        ((pk << KIND_BITS) | 1, '', '', text)
+        for pk, text in Post.objects.values_list('pk', 'text')
+    ] + [
+        ((pk << KIND_BITS) | 2, title, author_book, description)
+        for pk, title, author_book, description in Book.objects.values_list(
+            'pk', 'title', 'author_book', 'description'
+        )
+    ] + [
+        ((pk << KIND_BITS) | 3, '', '', text)
+        for pk, text in Comment.objects.values_list('pk', 'text')
+    ]
+    with schema_editor.connection.cursor() as cursor:
+        cursor.executemany(
+            'INSERT INTO posts_search (rowid, title, author, body) '
+            'VALUES (%s, %s, %s, %s)',
+            documents
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS posts_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0004_follow'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.1 on 2026-10-18 15:30
+
+from django.db import migrations, models
+import posts.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_thumbnails'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='book',
+            name='image_book',
+            field=models.ImageField(blank=True, storage=posts.storage.DeduplicatingStorage(), upload_to='posts/', verbose_name='Image'),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, storage=posts.storage.DeduplicatingStorage(), upload_to='posts/', verbose_name='Image'),
+        ),
+    ]
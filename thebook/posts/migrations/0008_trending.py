@@ -0,0 +1,83 @@
+# Generated by Django 4.2.1 on 2026-10-18 16:19
+
+import math
+import time
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_scores(apps, schema_editor):
+    """Start the epoch and score the posts and comments written so far,
+    as posts.trending.rebuild() does.
+    """
+    Book = apps.get_model('posts', 'Book')
+    Comment = apps.get_model('posts', 'Comment')
+    Group = apps.get_model('posts', 'Group')
+    Post = apps.get_model('posts', 'Post')
+    TrendEpoch = apps.get_model('posts', 'TrendEpoch')
+    now = time.time()
+    TrendEpoch.objects.create(pk=1, epoch=now)
+    tau = settings.TRENDING_HALF_LIFE * 3600 / math.log(2)
+    scores = {Group: {}, Book: {}}
+    rows = [
+        (row, 1.0) for row in Post.objects.values_list(
+            'group_id', 'book_id', 'pub_date'
+        ).order_by().iterator()
+    ] + [
+        (row, 0.5) for row in Comment.objects.filter(
+            post__isnull=False
+        ).values_list(
+            'post__group_id', 'post__book_id', 'created'
+        ).order_by().iterator()
+    ]
+    for (group_id, book_id, created), weight in rows:
+        score = weight * math.exp((created.timestamp() - now) / tau)
+        for model, pk in ((Group, group_id), (Book, book_id)):
+            if pk is not None:
+                scores[model][pk] = scores[model].get(pk, 0) + score
+    for model, model_scores in scores.items():
+        model.objects.bulk_update(
+            [
+                model(pk=pk, trend_score=score)
+                for pk, score in model_scores.items()
+            ],
+            ['trend_score'],
+            batch_size=500,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_image_ingestion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendEpoch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('epoch', models.FloatField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='trend_score',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='group',
+            name='trend_score',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['-trend_score'], name='book_trend_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='group',
+            index=models.Index(fields=['-trend_score'], name='group_trend_idx'),
+        ),
+        migrations.RunPython(fill_scores, migrations.RunPython.noop),
+    ]
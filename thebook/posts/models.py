@@ -4,33 +4,89 @@ Group, Book, Post and Comment.
 from django.contrib.auth import get_user_model
 from django.db import models
 
+from .storage import image_storage
+
 User = get_user_model()
 
 
-class Group(models.Model):
+class PostQuerySet(models.QuerySet):
+    def feed(self):
+        """Posts with author, group and book joined in the same query."""
+        return self.select_related('author', 'group', 'book')
+
+
+class CommentQuerySet(models.QuerySet):
+    def with_author(self):
+        """Comments with author joined in the same query."""
+        return self.select_related('author')
+
+
+class CountersMixin:
+    """Don't write counters on save: they are changed with F()
+    and the instance may hold stale values.
+    """
+    counter_fields = ('post_count', 'comment_count', 'trend_score')
+
+    def save(self, *args, **kwargs):
+        if (
+            not self._state.adding
+            and kwargs.get('update_fields') is None
+            and not kwargs.get('force_insert')
+        ):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.counter_fields
+            ]
+        super().save(*args, **kwargs)
+
+
+class Group(CountersMixin, models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(unique=True)
     description = models.TextField(max_length=500)
+    post_count = models.PositiveIntegerField(default=0, editable=False)
+    trend_score = models.FloatField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-trend_score'], name='group_trend_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
 
-class Book(models.Model):
+class Book(CountersMixin, models.Model):
     title = models.CharField(max_length=200)
     author_book = models.CharField(max_length=200)
     description = models.TextField(max_length=500)
     image_book = models.ImageField(
         'Image',
         upload_to='posts/',
+        storage=image_storage,
         blank=True
     )
+    image_width = models.PositiveIntegerField(
+        null=True, blank=True, editable=False
+    )
+    image_height = models.PositiveIntegerField(
+        null=True, blank=True, editable=False
+    )
+    post_count = models.PositiveIntegerField(default=0, editable=False)
+    thumbnails = models.JSONField(default=dict, blank=True, editable=False)
+    trend_score = models.FloatField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-trend_score'], name='book_trend_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
 
-class Post(models.Model):
+class Post(CountersMixin, models.Model):
     text = models.TextField(max_length=500)
     pub_date = models.DateTimeField(auto_now_add=True)
     author = models.ForeignKey(
@@ -56,11 +112,39 @@ class Post(models.Model):
     image = models.ImageField(
         'Image',
         upload_to='posts/',
+        storage=image_storage,
         blank=True
     )
+    image_width = models.PositiveIntegerField(
+        null=True, blank=True, editable=False
+    )
+    image_height = models.PositiveIntegerField(
+        null=True, blank=True, editable=False
+    )
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    thumbnails = models.JSONField(default=dict, blank=True, editable=False)
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ['-pub_date', ]
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'], name='post_pub_date_idx'
+            ),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_pub_date_idx'
+            ),
+            models.Index(
+                fields=['book', '-pub_date', '-id'],
+                name='post_book_pub_date_idx'
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_pub_date_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.text[:15]
@@ -86,8 +170,147 @@ class Comment(models.Model):
         verbose_name='Post'
     )
 
+    objects = CommentQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created', ]
+        indexes = [
+            models.Index(
+                fields=['post', '-created', '-id'],
+                name='comment_post_created_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.text[:15]
+
+
+class Follow(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='follower'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='following'
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'], name='unique_follow'
+            ),
+            models.CheckConstraint(
+                check=~models.Q(user=models.F('author')),
+                name='no_self_follow'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user} follows {self.author}'
+
+
+class TimelineEntry(models.Model):
+    """Post of a followed author in the follow feed of a user.
+
+    Filled when a post is written, pub_date is copied from the post
+    so that a page of the feed is one range scan on the index.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries'
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'], name='unique_timeline_entry'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='timeline_user_pub_date_idx'
+            ),
+        ]
+
+
+class TrendEpoch(models.Model):
+    """Unix time the trend scores of books and groups are relative to.
+
+    One row, moved forward by python manage.py trending.
+    """
+    epoch = models.FloatField()
+
+    def __str__(self):
+        return f'Trend epoch {self.epoch}'
+
+
+class RelatedBook(models.Model):
+    """Precomputed neighbour of a book, see posts.related."""
+    book = models.ForeignKey(
+        Book,
+        on_delete=models.CASCADE,
+        related_name='related_books'
+    )
+    related = models.ForeignKey(
+        Book,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    score = models.FloatField()
+    same_author = models.BooleanField(default=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['book', 'related'], name='unique_related_book'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['book', '-score'], name='related_book_score_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.book} -> {self.related}'
+
+
+class RelatedPost(models.Model):
+    """Precomputed neighbour of a post, see posts.related."""
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='related_posts'
+    )
+    related = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    score = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['post', 'related'], name='unique_related_post'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['post', '-score'], name='related_post_score_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.post} -> {self.related}'
@@ -0,0 +1,168 @@
+"""Keyset (cursor) pagination for the feeds.
+
+Pages are fetched with a range condition on the ordering keys
+instead of OFFSET, so page N costs the same as page 1
+and no COUNT(*) over the table is needed.
+"""
+import base64
+import json
+from collections.abc import Sequence
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+def encode_cursor(direction, values):
+    """Pack direction and key values into an opaque url-safe string."""
+    raw = json.dumps([direction, [str(value) for value in values]])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Unpack a cursor, return (direction, values) or None if invalid."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        direction, values = json.loads(base64.urlsafe_b64decode(padded))
+    except (TypeError, ValueError):
+        return None
+    if direction not in (NEXT, PREVIOUS) or not isinstance(values, list):
+        return None
+    if not all(isinstance(value, str) for value in values):
+        return None
+    return direction, values
+
+
+def keyset_filter(keys, values, descending=True):
+    """Build Q for rows strictly after values in (keys) ordering.
+
+    For keys (a, b) and descending order it gives:
+    a <= va AND (a < va OR (a = va AND b < vb)),
+    the first condition lets the database use a range scan on the index.
+    """
+    lookup = 'lt' if descending else 'gt'
+    condition = Q()
+    for position, key in enumerate(keys):
+        equal = dict(zip(keys[:position], values[:position]))
+        condition |= Q(**equal, **{f'{key}__{lookup}': values[position]})
+    return Q(**{f'{keys[0]}__{lookup}e': values[0]}) & condition
+
+
+class CursorPage(Sequence):
+    """One page of objects with cursors to its neighbours."""
+
+    cursor_based = True
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """Paginate a queryset by a unique descending key, e.g. (pub_date, id).
+
+    The last key must be unique so that the ordering is total.
+    Rows may be model instances or dicts of a values() queryset.
+    """
+
+    def __init__(self, queryset, per_page, keys=('pub_date', 'id')):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.keys = keys
+
+    def _values(self, row):
+        if isinstance(row, dict):
+            return [row[key] for key in self.keys]
+        return [getattr(row, key) for key in self.keys]
+
+    def _to_python(self, values):
+        model = self.queryset.model
+        return [
+            model._meta.get_field(key).to_python(value)
+            for key, value in zip(self.keys, values)
+        ]
+
+    def page_queryset(self, values=None, backwards=False):
+        """Queryset of one page plus one extra row to detect more pages."""
+        queryset = self.queryset
+        if values is not None:
+            queryset = queryset.filter(
+                keyset_filter(self.keys, values, descending=not backwards)
+            )
+        if backwards:
+            ordering = list(self.keys)
+        else:
+            ordering = [f'-{key}' for key in self.keys]
+        return queryset.order_by(*ordering)[:self.per_page + 1]
+
+    def fetch(self, values=None, backwards=False):
+        """Rows of one page plus one extra row, in page_queryset order."""
+        return list(self.page_queryset(values, backwards))
+
+    async def afetch(self, values=None, backwards=False):
+        """fetch() with the async ORM interface."""
+        return [row async for row in self.page_queryset(values, backwards)]
+
+    def _decode(self, cursor):
+        """(key values, backwards) of cursor, (None, False) if invalid."""
+        decoded = decode_cursor(cursor)
+        if decoded is None or len(decoded[1]) != len(self.keys):
+            return None, False
+        direction, raw_values = decoded
+        try:
+            return self._to_python(raw_values), direction == PREVIOUS
+        except (ValidationError, TypeError, ValueError):
+            return None, False
+
+    def _page(self, rows, values, backwards):
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+        has_next = values is not None if backwards else has_more
+        has_previous = has_more if backwards else values is not None
+        return CursorPage(
+            rows,
+            next_cursor=(
+                encode_cursor(NEXT, self._values(rows[-1]))
+                if rows and has_next else None
+            ),
+            previous_cursor=(
+                encode_cursor(PREVIOUS, self._values(rows[0]))
+                if rows and has_previous else None
+            ),
+        )
+
+    def get_page(self, cursor=None):
+        """Return the page for cursor; an invalid cursor means first page."""
+        values, backwards = self._decode(cursor)
+        return self._page(self.fetch(values, backwards), values, backwards)
+
+    async def aget_page(self, cursor=None):
+        values, backwards = self._decode(cursor)
+        return self._page(
+            await self.afetch(values, backwards), values, backwards
+        )
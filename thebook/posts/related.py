@@ -0,0 +1,265 @@
+"""Related books and similar posts, computed in a batch.
+
+Posts are compared by TF-IDF vectors of their text. Books are compared
+by their title and description, and get a bonus for the same
+author_book and for users who wrote posts about both of them.
+The RELATED_SIZE best neighbours of every book and post are stored
+in RelatedBook and RelatedPost: a page reads them with one indexed
+query. python manage.py related recomputes the tables.
+
+Similarities are sparse matrix products when NumPy and SciPy are
+installed, otherwise dot products over an inverted index.
+"""
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+
+from . import cache
+from .models import Book, Post, RelatedBook, RelatedPost
+
+try:
+    import numpy
+    from scipy import sparse
+except ImportError:
+    numpy = sparse = None
+
+WORD = re.compile(r'\w{3,}')
+# Terms in more than this share of the documents are skipped.
+MAX_DOCUMENT_FREQUENCY = 0.5
+# Text neighbours per book taken before the bonuses are added.
+BOOK_CANDIDATES = 5
+SAME_AUTHOR_BONUS = 0.5
+CO_POSTING_BONUS = 0.5
+# Users with posts about more books don't relate them.
+MAX_BOOKS_OF_USER = 50
+# Rows of the similarity matrix multiplied at once.
+CHUNK_SIZE = 256
+# Without NumPy, terms of more documents are skipped: they cost most
+# and add least to the scores.
+MAX_POSTINGS = 1000
+BATCH_SIZE = 1000
+
+
+def tokens(text):
+    return WORD.findall(text.lower())
+
+
+def tfidf(texts):
+    """Sparse unit vectors {term: weight} of texts.
+
+    Terms of one document or of most documents don't tell documents
+    apart and are dropped.
+    """
+    counts = [Counter(tokens(text)) for text in texts]
+    frequency = Counter(term for count in counts for term in count)
+    limit = MAX_DOCUMENT_FREQUENCY * len(texts)
+    idf = {
+        term: math.log(len(texts) / df)
+        for term, df in frequency.items()
+        if 1 < df <= limit
+    }
+    vectors = []
+    for count in counts:
+        vector = {
+            term: (1 + math.log(number)) * idf[term]
+            for term, number in count.items() if term in idf
+        }
+        norm = math.sqrt(sum(weight ** 2 for weight in vector.values()))
+        vectors.append(
+            {term: weight / norm for term, weight in vector.items()}
+        )
+    return vectors
+
+
+def nearest_python(vectors, k):
+    """Top k (index, similarity) of every vector, by an inverted index."""
+    postings = defaultdict(list)
+    for index, vector in enumerate(vectors):
+        for term, weight in vector.items():
+            postings[term].append((index, weight))
+    result = []
+    for index, vector in enumerate(vectors):
+        scores = defaultdict(float)
+        for term, weight in vector.items():
+            if len(postings[term]) > MAX_POSTINGS:
+                continue
+            for other, other_weight in postings[term]:
+                scores[other] += weight * other_weight
+        scores.pop(index, None)
+        result.append(
+            heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        )
+    return result
+
+
+def matrix(vectors):
+    """CSR matrix of the vectors, one row per document."""
+    columns = {}
+    data, indices, indptr = [], [], [0]
+    for vector in vectors:
+        for term, weight in vector.items():
+            indices.append(columns.setdefault(term, len(columns)))
+            data.append(weight)
+        indptr.append(len(indices))
+    return sparse.csr_matrix(
+        (data, indices, indptr), shape=(len(vectors), len(columns))
+    )
+
+
+def nearest_numpy(vectors, k):
+    """Top k (index, similarity) of every vector, by matrix products."""
+    rows = matrix(vectors)
+    columns = rows.T.tocsc()
+    result = []
+    for start in range(0, rows.shape[0], CHUNK_SIZE):
+        products = (rows[start:start + CHUNK_SIZE] @ columns).tocsr()
+        for offset in range(products.shape[0]):
+            begin, end = products.indptr[offset:offset + 2]
+            others = products.indices[begin:end]
+            scores = products.data[begin:end]
+            keep = others != start + offset
+            others, scores = others[keep], scores[keep]
+            if len(scores) > k:
+                top = numpy.argpartition(-scores, k)[:k]
+                others, scores = others[top], scores[top]
+            order = numpy.argsort(-scores, kind='stable')
+            result.append([
+                (int(other), float(score))
+                for other, score in zip(others[order], scores[order])
+            ])
+    return result
+
+
+def nearest(vectors, k):
+    if sparse is not None and vectors:
+        return nearest_numpy(vectors, k)
+    return nearest_python(vectors, k)
+
+
+def similar_posts(k):
+    """{post id: [(related id, score)]} by the text of the posts."""
+    ids, texts = [], []
+    for pk, text in Post.objects.order_by().values_list('pk', 'text'):
+        ids.append(pk)
+        texts.append(text)
+    neighbours = nearest(tfidf(texts), k)
+    return {
+        ids[index]: [(ids[other], score) for other, score in row]
+        for index, row in enumerate(neighbours)
+    }
+
+
+def co_posting():
+    """{(book id, book id): cosine of the sets of their post authors}."""
+    books_of_user = defaultdict(set)
+    for user_id, book_id in Post.objects.filter(
+        book__isnull=False
+    ).order_by().values_list('author_id', 'book_id').distinct():
+        books_of_user[user_id].add(book_id)
+    users_of_book = Counter()
+    pairs = Counter()
+    for books in books_of_user.values():
+        users_of_book.update(books)
+        if len(books) <= MAX_BOOKS_OF_USER:
+            for book in books:
+                for other in books:
+                    if book != other:
+                        pairs[book, other] += 1
+    return {
+        (book, other): count / math.sqrt(
+            users_of_book[book] * users_of_book[other]
+        )
+        for (book, other), count in pairs.items()
+    }
+
+
+def same_author_pairs(rows):
+    """(book id, book id) pairs of books with the same author_book."""
+    by_author = defaultdict(list)
+    for pk, author_book in rows:
+        by_author[author_book.strip().lower()].append(pk)
+    return {
+        (book, other)
+        for books in by_author.values()
+        for book in books for other in books
+        if book != other
+    }
+
+
+def related_books(k):
+    """{book id: [(related id, score, same author)]}."""
+    rows = list(Book.objects.order_by().values_list(
+        'pk', 'title', 'description', 'author_book'
+    ))
+    ids = [row[0] for row in rows]
+    scores = defaultdict(lambda: defaultdict(float))
+    neighbours = nearest(
+        tfidf([f'{row[1]} {row[2]}' for row in rows]),
+        k * BOOK_CANDIDATES,
+    )
+    for index, row in enumerate(neighbours):
+        for other, score in row:
+            scores[ids[index]][ids[other]] += score
+    same_author = same_author_pairs((row[0], row[3]) for row in rows)
+    for book, other in same_author:
+        scores[book][other] += SAME_AUTHOR_BONUS
+    for (book, other), score in co_posting().items():
+        scores[book][other] += CO_POSTING_BONUS * score
+    return {
+        book: [
+            (other, score, (book, other) in same_author)
+            for other, score in heapq.nlargest(
+                k, others.items(), key=lambda item: item[1]
+            )
+        ]
+        for book, others in scores.items()
+    }
+
+
+def rebuild(k=None):
+    """Recompute both tables, return the numbers of stored rows."""
+    k = k or settings.RELATED_SIZE
+    books = related_books(k)
+    posts = similar_posts(k)
+    with transaction.atomic():
+        RelatedBook.objects.all().delete()
+        RelatedBook.objects.bulk_create(
+            [
+                RelatedBook(
+                    book_id=book, related_id=other,
+                    score=score, same_author=same,
+                )
+                for book, row in books.items()
+                for other, score, same in row
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        RelatedPost.objects.all().delete()
+        RelatedPost.objects.bulk_create(
+            [
+                RelatedPost(post_id=post, related_id=other, score=score)
+                for post, row in posts.items()
+                for other, score in row
+            ],
+            batch_size=BATCH_SIZE,
+        )
+    cache.bump_versions(cache.RELATED)
+    return RelatedBook.objects.count(), RelatedPost.objects.count()
+
+
+def for_book(book_id):
+    """Stored neighbours of a book with the books, best first."""
+    return RelatedBook.objects.filter(book_id=book_id).select_related(
+        'related'
+    ).order_by('-score')
+
+
+def for_post(post_id):
+    """Stored neighbours of a post with the posts, best first."""
+    return RelatedPost.objects.filter(post_id=post_id).select_related(
+        'related'
+    ).order_by('-score')
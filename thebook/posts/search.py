@@ -0,0 +1,205 @@
+"""Full-text search over posts, books and comments.
+
+On SQLite the index is the FTS5 table posts_search, kept up to date
+by signals and ranked with bm25. Other databases fall back to
+icontains lookups ranked with the same weights.
+"""
+import re
+
+from django.db import connection, transaction
+from django.db.models import Case, FloatField, Q, Value, When
+
+from .models import Book, Comment, Post
+
+TABLE = 'posts_search'
+BATCH_SIZE = 1000
+# Object kind is stored in the low bits of the FTS rowid.
+KINDS = {Post: 1, Book: 2, Comment: 3}
+KIND_BITS = 2
+# bm25 weights of the columns title, author, body.
+WEIGHTS = (10.0, 5.0, 1.0)
+
+
+def is_enabled():
+    return connection.vendor == 'sqlite'
+
+
+def rowid(model, pk):
+    return (pk << KIND_BITS) | KINDS[model]
+
+
+def document(model, row):
+    """(rowid, title, author, body) of a values_list row of model."""
+    if model is Book:
+        pk, title, author_book, description = row
+        return rowid(Book, pk), title, author_book, description
+    pk, text = row
+    return rowid(model, pk), '', '', text
+
+
+DOCUMENT_FIELDS = {
+    Post: ('pk', 'text'),
+    Book: ('pk', 'title', 'author_book', 'description'),
+    Comment: ('pk', 'text'),
+}
+
+
+def index_object(instance):
+    """Add or replace the document of a saved object."""
+    if not is_enabled():
+        return
+    model = type(instance)
+    row = [getattr(instance, field) for field in DOCUMENT_FIELDS[model]]
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {TABLE} WHERE rowid = %s',
+            [rowid(model, instance.pk)]
+        )
+        cursor.execute(
+            f'INSERT INTO {TABLE} (rowid, title, author, body) '
+            f'VALUES (%s, %s, %s, %s)',
+            document(model, row)
+        )
+
+
+def index_objects(model, pks):
+    """Add or replace the documents of objects of model by pks."""
+    if not is_enabled():
+        return
+    rows = model.objects.filter(pk__in=pks).values_list(
+        *DOCUMENT_FIELDS[model]
+    )
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.executemany(
+            f'DELETE FROM {TABLE} WHERE rowid = %s',
+            [(rowid(model, pk),) for pk in pks]
+        )
+        insert_documents(cursor, [document(model, row) for row in rows])
+
+
+def remove_object(instance):
+    if not is_enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {TABLE} WHERE rowid = %s',
+            [rowid(type(instance), instance.pk)]
+        )
+
+
+def rebuild(batch_size=BATCH_SIZE):
+    """Fill the index from scratch, return the number of documents."""
+    total = 0
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE}')
+        for model, fields in DOCUMENT_FIELDS.items():
+            rows = model.objects.order_by().values_list(*fields)
+            batch = []
+            for row in rows.iterator(chunk_size=batch_size):
+                batch.append(document(model, row))
+                if len(batch) == batch_size:
+                    total += insert_documents(cursor, batch)
+                    batch = []
+            total += insert_documents(cursor, batch)
+        cursor.execute(f"INSERT INTO {TABLE}({TABLE}) VALUES ('optimize')")
+    return total
+
+
+def insert_documents(cursor, documents):
+    cursor.executemany(
+        f'INSERT INTO {TABLE} (rowid, title, author, body) '
+        f'VALUES (%s, %s, %s, %s)',
+        documents
+    )
+    return len(documents)
+
+
+def match_expression(query):
+    """FTS5 query: all words must match, the last one as a prefix."""
+    terms = re.findall(r'\w+', query.lower())
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def search(query, limit, offset=0):
+    """Ranked [(model, pk)] for query."""
+    expression = match_expression(query)
+    if expression is None:
+        return []
+    if not is_enabled():
+        return fallback_search(query, limit, offset)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s '
+            f'ORDER BY bm25({TABLE}, %s, %s, %s) LIMIT %s OFFSET %s',
+            [expression, *WEIGHTS, limit, offset]
+        )
+        rowids = [row[0] for row in cursor.fetchall()]
+    models = {kind: model for model, kind in KINDS.items()}
+    mask = (1 << KIND_BITS) - 1
+    return [(models[value & mask], value >> KIND_BITS) for value in rowids]
+
+
+# Fields of the fallback search, weighted like the columns of the index.
+FALLBACK_FIELDS = {
+    Book: (('title', WEIGHTS[0]), ('author_book', WEIGHTS[1]),
+           ('description', WEIGHTS[2])),
+    Post: (('text', WEIGHTS[2]),),
+    Comment: (('text', WEIGHTS[2]),),
+}
+
+
+def fallback_rows(model, terms, limit):
+    """[(rank, model, pk)] of objects containing all terms.
+
+    The rank sums the weights of the fields every term is found in.
+    """
+    condition = Q()
+    rank = Value(0.0)
+    for term in terms:
+        found = Q()
+        for field, weight in FALLBACK_FIELDS[model]:
+            lookup = Q(**{f'{field}__icontains': term})
+            found |= lookup
+            rank += Case(
+                When(lookup, then=Value(weight)),
+                default=Value(0.0),
+                output_field=FloatField(),
+            )
+        condition &= found
+    rows = model.objects.filter(condition).annotate(
+        rank=rank
+    ).order_by('-rank', '-pk').values_list('rank', 'pk')[:limit]
+    return [(score, model, pk) for score, pk in rows]
+
+
+def fallback_search(query, limit, offset):
+    """Ranked [(model, pk)] for query with icontains lookups."""
+    terms = re.findall(r'\w+', query.lower())
+    found = []
+    for model in FALLBACK_FIELDS:
+        found += fallback_rows(model, terms, offset + limit)
+    found.sort(key=lambda row: -row[0])
+    return [(model, pk) for _, model, pk in found[offset:offset + limit]]
+
+
+def load(found):
+    """Objects for search results, in ranking order."""
+    querysets = {
+        Post: Post.objects.feed(),
+        Book: Book.objects.all(),
+        Comment: Comment.objects.with_author(),
+    }
+    objects = {}
+    for model, queryset in querysets.items():
+        pks = [pk for kind, pk in found if kind is model]
+        if pks:
+            objects[model] = queryset.in_bulk(pks)
+    return [
+        {'kind': model._meta.model_name, 'object': objects[model][pk]}
+        for model, pk in found
+        if pk in objects.get(model, {})
+    ]
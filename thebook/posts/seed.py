@@ -0,0 +1,240 @@
+"""Generate realistic volumes of data for benchmarks.
+
+Rows are written with bulk_create in batches, so signals don't run:
+counters, trend scores, follow timelines and the search index are
+rebuilt at the end, cached lookups and list pages are dropped.
+"""
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+from users.models import Profile
+
+from . import cache, counters, lookups, search, timeline, trending
+from .models import Book, Comment, Follow, Group, Post, User
+
+BATCH_SIZE = 5000
+USERNAME = 'seed_user_{}'
+PASSWORD = 'password'
+WORDS = (
+    'book novel story author reader chapter page hero plot ending '
+    'poem library classic fantasy detective history love war peace '
+    'review quote character translation edition series favourite '
+    'boring brilliant recommend summer winter evening read again'
+).split()
+
+
+@contextmanager
+def manual_dates(*fields):
+    """Let bulk_create store given values of auto_now_add fields."""
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def batches(objects, batch_size):
+    batch = []
+    for obj in objects:
+        batch.append(obj)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def batches_of(count, batch_size):
+    """Sizes of the batches making count."""
+    for start in range(0, count, batch_size):
+        yield min(batch_size, count - start)
+
+
+def sentence(rng, min_words, max_words):
+    words = rng.choices(WORDS, k=rng.randint(min_words, max_words))
+    return ' '.join(words).capitalize() + '.'
+
+
+class Seeder:
+    """Writes users, groups, books, posts, comments and follows.
+
+    Authors are picked with a Zipf-like skew, so a few users write most
+    of the posts, like on a real site. Dates of posts are spread over
+    days and grow with the primary key; comments come after their post.
+    """
+
+    def __init__(self, seed=0, days=365, batch_size=BATCH_SIZE):
+        self.rng = random.Random(seed)
+        self.days = days
+        self.batch_size = batch_size
+        self.start = timezone.now() - timedelta(days=days)
+
+    def create(self, model, objects):
+        created = 0
+        for batch in batches(objects, self.batch_size):
+            with transaction.atomic():
+                model.objects.bulk_create(batch, batch_size=self.batch_size)
+            created += len(batch)
+        return created
+
+    def skewed(self, pks):
+        weights = [1 / rank for rank in range(1, len(pks) + 1)]
+        cumulative = []
+        total = 0
+        for weight in weights:
+            total += weight
+            cumulative.append(total)
+        return lambda: self.rng.choices(pks, cum_weights=cumulative)[0]
+
+    def users(self, count):
+        offset = User.objects.count()
+        password = make_password(PASSWORD)
+        self.create(User, (
+            User(
+                username=USERNAME.format(offset + number),
+                password=password,
+            )
+            for number in range(count)
+        ))
+        counters.recount()
+
+    def groups(self, count):
+        offset = Group.objects.count()
+        self.create(Group, (
+            Group(
+                title=f'Group {offset + number}',
+                slug=f'seed-group-{offset + number}',
+                description=sentence(self.rng, 5, 30),
+            )
+            for number in range(count)
+        ))
+
+    def books(self, count):
+        self.create(Book, (
+            Book(
+                title=sentence(self.rng, 1, 4),
+                author_book=sentence(self.rng, 2, 2),
+                description=sentence(self.rng, 10, 60),
+            )
+            for _ in range(count)
+        ))
+
+    def post_date(self, number, count):
+        return self.start + timedelta(days=self.days * number / count)
+
+    def posts(self, count):
+        author = self.skewed(list(User.objects.values_list('pk', flat=True)))
+        group_ids = list(Group.objects.values_list('pk', flat=True))
+        book_ids = list(Book.objects.values_list('pk', flat=True))
+        with manual_dates(Post._meta.get_field('pub_date')):
+            self.create(Post, (
+                Post(
+                    author_id=author(),
+                    group_id=(
+                        self.rng.choice(group_ids)
+                        if group_ids and self.rng.random() < 0.5 else None
+                    ),
+                    book_id=(
+                        self.rng.choice(book_ids)
+                        if book_ids and self.rng.random() < 0.7 else None
+                    ),
+                    text=sentence(self.rng, 5, 80),
+                    pub_date=self.post_date(number, count),
+                )
+                for number in range(count)
+            ))
+
+    def comments(self, count):
+        user_ids = list(User.objects.values_list('pk', flat=True))
+        bounds = Post.objects.aggregate(first=Min('pk'), last=Max('pk'))
+        if bounds['first'] is None:
+            return
+        now = timezone.now()
+
+        def comments():
+            for batch_size in batches_of(count, self.batch_size):
+                # Recent posts get more comments.
+                post_ids = [
+                    bounds['last'] - int(
+                        (bounds['last'] - bounds['first'])
+                        * self.rng.random() ** 3
+                    )
+                    for _ in range(batch_size)
+                ]
+                dates = dict(Post.objects.filter(
+                    pk__in=set(post_ids)
+                ).values_list('pk', 'pub_date'))
+                for post_id in post_ids:
+                    if post_id not in dates:
+                        continue
+                    age = (now - dates[post_id]).total_seconds()
+                    yield Comment(
+                        author_id=self.rng.choice(user_ids),
+                        post_id=post_id,
+                        text=sentence(self.rng, 2, 30),
+                        created=dates[post_id] + timedelta(
+                            seconds=age * self.rng.random()
+                        ),
+                    )
+
+        with manual_dates(Comment._meta.get_field('created')):
+            self.create(Comment, comments())
+
+    def follows(self, per_user):
+        user_ids = list(User.objects.values_list('pk', flat=True))
+        author = self.skewed(user_ids)
+
+        def follows():
+            for user_id in user_ids:
+                authors = {author() for _ in range(per_user)} - {user_id}
+                for author_id in authors:
+                    yield Follow(user_id=user_id, author_id=author_id)
+
+        for batch in batches(follows(), self.batch_size):
+            Follow.objects.bulk_create(batch, ignore_conflicts=True)
+
+    def finish(self):
+        """Rebuild what signals keep up to date on normal writes."""
+        counters.recount()
+        trending.rebuild()
+        timeline.rebuild()
+        if search.is_enabled():
+            search.rebuild()
+        # Pages of a single post or author aren't dropped: new posts
+        # show up in the feeds, groups and books.
+        cache.bump_versions(
+            cache.FEED, cache.CATALOG, cache.BOOKS, cache.RELATED,
+            cache.AUTHORS,
+            *[
+                cache.GROUP.format(slug=slug)
+                for slug in Group.objects.values_list('slug', flat=True)
+            ],
+            *[
+                cache.BOOK.format(book_id=pk)
+                for pk in Book.objects.values_list('pk', flat=True)
+            ],
+        )
+        lookups.forget_all(self.batch_size)
+
+
+def seed(users=0, groups=0, books=0, posts=0, comments=0, follows=0,
+         **options):
+    seeder = Seeder(**options)
+    seeder.users(users)
+    seeder.groups(groups)
+    seeder.books(books)
+    seeder.posts(posts)
+    seeder.comments(comments)
+    seeder.follows(follows)
+    seeder.finish()
+    return {
+        model.__name__: model.objects.count()
+        for model in (User, Profile, Group, Book, Post, Comment, Follow)
+    }
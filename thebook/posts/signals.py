@@ -0,0 +1,234 @@
+"""Signal handlers for app posts: page and lookup cache invalidation,
+denormalized counters, trend scores, follow timelines and the search
+index.
+"""
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+from users.models import Profile
+
+from . import cache, counters, lookups, search, timeline, trending
+from .models import Book, Comment, Follow, Group, Post, RelatedPost, User
+
+
+@receiver(pre_save, sender=Post)
+def remember_post(sender, instance, raw, **kwargs):
+    """Keep the stored version: a post may move between groups."""
+    if instance.pk and not raw:
+        instance._old_state = Post.objects.filter(
+            pk=instance.pk
+        ).values(
+            'author_id', 'group_id', 'book_id',
+            'group__slug', 'author__username', 'text'
+        ).first()
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    old = getattr(instance, '_old_state', None)
+    new_keys = (instance.author_id, instance.group_id, instance.book_id)
+    if created:
+        counters.change_post_counters(*new_keys, 1)
+        trending.add_post(instance)
+        timeline.fan_out(instance)
+    elif old is not None:
+        counters.move_post_counters(
+            (old['author_id'], old['group_id'], old['book_id']), new_keys
+        )
+        trending.move_post(instance, old['group_id'], old['book_id'])
+    invalidate_post(instance, old)
+
+
+@receiver(pre_delete, sender=Post)
+def remember_neighbour(sender, instance, **kwargs):
+    """Related rows are deleted with the post before post_delete."""
+    instance._is_neighbour = is_neighbour(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    counters.change_post_counters(
+        instance.author_id, instance.group_id, instance.book_id, -1
+    )
+    trending.add_post(instance, -1)
+    invalidate_post(
+        instance, neighbour=getattr(instance, '_is_neighbour', False)
+    )
+
+
+def is_neighbour(post_id):
+    """Whether pages of other posts show the post as related."""
+    return RelatedPost.objects.filter(related_id=post_id).exists()
+
+
+def invalidate_post(post, old=None, neighbour=False):
+    """Pages of the post and lookups with its counters.
+
+    Pages showing the post as related are dropped when it is deleted
+    (neighbour) or its text changed.
+    """
+    if old is not None and old['text'] != post.text:
+        neighbour = is_neighbour(post.pk)
+    keys = [(
+        post.group.slug if post.group else None,
+        post.book_id,
+        post.author.username,
+    )]
+    if old is not None:
+        keys.append(
+            (old['group__slug'], old['book_id'], old['author__username'])
+        )
+    scopes = []
+    for group_slug, book_id, username in keys:
+        scopes += cache.post_scopes(group_slug, book_id, username, post.pk)
+        lookups.GROUPS.forget(group_slug)
+        lookups.BOOKS.forget(book_id)
+        lookups.USERS.forget(username)
+    if neighbour:
+        scopes.append(cache.RELATED)
+    cache.bump_versions(*scopes)
+
+
+@receiver(pre_save, sender=Group)
+def remember_group_slug(sender, instance, raw, **kwargs):
+    if instance.pk and not raw:
+        instance._old_slug = Group.objects.filter(
+            pk=instance.pk
+        ).values_list('slug', flat=True).first()
+
+
+def group_book_scopes(group):
+    """Scopes of the book pages showing posts of the group."""
+    return [
+        cache.BOOK.format(book_id=book_id)
+        for book_id in Post.objects.filter(
+            group=group, book__isnull=False
+        ).order_by().values_list('book_id', flat=True).distinct()
+    ]
+
+
+@receiver(pre_delete, sender=Group)
+def remember_group_books(sender, instance, **kwargs):
+    """Posts lose the group before post_delete."""
+    instance._book_scopes = group_book_scopes(instance)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group(sender, instance, **kwargs):
+    scopes = [
+        cache.FEED, cache.CATALOG, cache.GROUP.format(slug=instance.slug)
+    ]
+    old_slug = getattr(instance, '_old_slug', None)
+    if old_slug:
+        scopes.append(cache.GROUP.format(slug=old_slug))
+    book_scopes = getattr(instance, '_book_scopes', None)
+    if book_scopes is None:
+        book_scopes = group_book_scopes(instance)
+    cache.bump_versions(*scopes, *book_scopes)
+    lookups.GROUPS.forget(instance.slug, old_slug)
+    trending.forget_top(trending.GROUPS)
+
+
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+def invalidate_book(sender, instance, **kwargs):
+    cache.bump_versions(
+        cache.FEED, cache.CATALOG, cache.BOOKS, cache.RELATED,
+        cache.BOOK.format(book_id=instance.pk),
+    )
+    lookups.BOOKS.forget(instance.pk)
+    trending.forget_top(trending.BOOKS)
+
+
+@receiver(pre_save, sender=User)
+def remember_username(sender, instance, raw, update_fields, **kwargs):
+    if update_fields is not None and 'username' not in update_fields:
+        # Logins save last_login only.
+        return
+    if instance.pk and not raw:
+        instance._old_username = User.objects.filter(
+            pk=instance.pk
+        ).values_list('username', flat=True).first()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_user(sender, instance, **kwargs):
+    old_username = getattr(instance, '_old_username', None)
+    lookups.USERS.forget(instance.username, old_username)
+    if old_username and old_username != instance.username:
+        # Pages show the username with posts and comments.
+        cache.bump_versions(
+            cache.AUTHORS,
+            cache.AUTHOR.format(username=old_username),
+            cache.AUTHOR.format(username=instance.username),
+        )
+
+
+@receiver(pre_save, sender=Comment)
+def remember_comment_post(sender, instance, raw, **kwargs):
+    if instance.pk and not raw:
+        instance._old_post_id = Comment.objects.filter(
+            pk=instance.pk
+        ).values_list('post_id', flat=True).first()
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    if created:
+        counters.change(Post, instance.post_id, 'comment_count', 1)
+        trending.add_comment(instance)
+    old_post_id = getattr(instance, '_old_post_id', None)
+    if not created and old_post_id != instance.post_id:
+        counters.change(Post, old_post_id, 'comment_count', -1)
+        counters.change(Post, instance.post_id, 'comment_count', 1)
+        cache.bump_versions(cache.POST.format(post_id=old_post_id))
+    if instance.post_id:
+        cache.bump_versions(cache.POST.format(post_id=instance.post_id))
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    counters.change(Post, instance.post_id, 'comment_count', -1)
+    trending.add_comment(instance, -1)
+    if instance.post_id:
+        cache.bump_versions(cache.POST.format(post_id=instance.post_id))
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        counters.change(
+            Profile, instance.author_id, 'follower_count', 1, key='user_id'
+        )
+        lookups.USERS.forget(instance.author.username)
+        timeline.backfill(instance)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    counters.change(
+        Profile, instance.author_id, 'follower_count', -1, key='user_id'
+    )
+    lookups.USERS.forget(instance.author.username)
+    timeline.remove_author(instance)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Book)
+@receiver(post_save, sender=Comment)
+def index_for_search(sender, instance, raw, **kwargs):
+    if not raw:
+        search.index_object(instance)
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Book)
+@receiver(post_delete, sender=Comment)
+def remove_from_search(sender, instance, **kwargs):
+    search.remove_object(instance)
@@ -0,0 +1,26 @@
+"""Storage of uploaded images named by their content hash.
+"""
+import re
+
+from django.core.files.storage import FileSystemStorage
+
+HASHED_NAME = re.compile(r'(^|/)[0-9a-f]{64}\.\w+$')
+
+
+class DeduplicatingStorage(FileSystemStorage):
+    """Identical uploads share one file: a content-hashed name that
+    already exists is returned as is instead of saving a copy.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        if HASHED_NAME.search(name) and self.exists(name):
+            return name
+        return super().get_available_name(name, max_length)
+
+    def _save(self, name, content):
+        if HASHED_NAME.search(name) and self.exists(name):
+            return name
+        return super()._save(name, content)
+
+
+image_storage = DeduplicatingStorage()
@@ -0,0 +1,16 @@
+"""Trending books and groups on the pages, see posts.trending.
+"""
+from django import template
+
+from .. import trending as ranking
+
+register = template.Library()
+
+
+@register.inclusion_tag('includes/trending.html')
+def trending():
+    """Top books and groups, one cache lookup each."""
+    return {
+        'trending_books': ranking.top(ranking.BOOKS),
+        'trending_groups': ranking.top(ranking.GROUPS),
+    }
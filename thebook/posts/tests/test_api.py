@@ -0,0 +1,143 @@
+"""Tests for the JSON API app posts."""
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from .. import api
+from ..models import Book, Comment, Group, Post
+
+User = get_user_model()
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.group = Group.objects.create(
+            title='group',
+            slug='slug',
+            description='description',
+        )
+        cls.book = Book.objects.create(
+            title='book',
+            author_book='author',
+            description='description',
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.user,
+                text=f'post {number}',
+                group=cls.group if number % 2 else None,
+                book=cls.book,
+            )
+            for number in range(5)
+        ]
+        Comment.objects.create(
+            author=cls.user, post=cls.posts[0], text='comment'
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, name, kwargs=None, **params):
+        address = reverse(f'api_v1:{name}', kwargs=kwargs)
+        return self.client.get(address, params)
+
+    def test_post_pages(self):
+        """Cursor pages of posts, newest first, in one query each."""
+        texts = []
+        cursor = None
+        while True:
+            with self.assertNumQueries(1):
+                data = self.get(
+                    'post_list', limit=2, cursor=cursor or ''
+                ).json()
+            texts += [post['text'] for post in data['results']]
+            cursor = data['next']
+            if cursor is None:
+                break
+        self.assertEqual(texts, [f'post {n}' for n in range(4, -1, -1)])
+
+    def test_sparse_fields_and_compact_format(self):
+        """Only the requested fields are returned."""
+        data = self.get(
+            'post_list', fields='id,author,group', group='slug'
+        ).json()
+        self.assertEqual(
+            data['results'][0],
+            {'id': self.posts[3].pk, 'author': 'user', 'group': 'slug'},
+        )
+        data = self.get(
+            'book_list', fields='title,post_count', format='compact'
+        ).json()
+        self.assertEqual(data['fields'], ['title', 'post_count'])
+        self.assertEqual(data['rows'], [['book', 5]])
+        response = self.get('post_list', fields='id,password')
+        self.assertEqual(response.status_code, 400)
+
+    def test_details(self):
+        """Post, book and comments of a post, missing ones are 404."""
+        post = self.posts[0]
+        data = self.get('post_detail', {'post_id': post.pk}).json()
+        self.assertEqual(data['text'], 'post 0')
+        self.assertEqual(data['pub_date'], post.pub_date.isoformat())
+        data = self.get('book_detail', {'book_id': self.book.pk}).json()
+        self.assertEqual(data['author_book'], 'author')
+        data = self.get('comment_list', {'post_id': post.pk}).json()
+        self.assertEqual(data['results'][0]['text'], 'comment')
+        for name, kwargs in (
+            ('post_detail', {'post_id': 0}),
+            ('book_detail', {'book_id': 0}),
+            ('comment_list', {'post_id': 0}),
+        ):
+            with self.subTest(name=name):
+                self.assertEqual(self.get(name, kwargs).status_code, 404)
+
+    def test_not_modified(self):
+        """Unchanged list answers 304, a new post changes the ETag."""
+        etag = self.get('post_list')['ETag']
+        response = self.client.get(
+            reverse('api_v1:post_list'), HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            Post.objects.create(author=self.user, text='new')
+        response = self.client.get(
+            reverse('api_v1:post_list'), HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.json()['results'][0]['text'], 'new')
+
+    def test_filtered_list_scopes(self):
+        """Filtered lists change with their posts and renames only."""
+        other = User.objects.create_user(username='other')
+        params = [{'author': 'user'}, {'group': 'slug'}]
+        etags = [self.get('post_list', **query)['ETag'] for query in params]
+        with self.captureOnCommitCallbacks(execute=True):
+            Post.objects.create(author=other, text='other post')
+        for query, etag in zip(params, etags):
+            with self.subTest(query=query):
+                response = self.client.get(
+                    reverse('api_v1:post_list'), query,
+                    HTTP_IF_NONE_MATCH=etag,
+                )
+                self.assertEqual(response.status_code, 304)
+        group = Group.objects.get(pk=self.group.pk)
+        group.slug = 'new-slug'
+        with self.captureOnCommitCallbacks(execute=True):
+            group.save()
+        results = self.get('post_list', author='user').json()['results']
+        self.assertIn('new-slug', [post['group'] for post in results])
+
+    def test_encoding_without_orjson(self):
+        """Standard json gives the same document."""
+        data = {'text': 'текст', 'rows': [[1, None]]}
+        with mock.patch.object(api, 'orjson', None):
+            encoded = api.dumps(data)
+        self.assertEqual(
+            encoded, '{"text":"текст","rows":[[1,null]]}'.encode()
+        )
+        self.assertEqual(api.dumps(data), encoded)
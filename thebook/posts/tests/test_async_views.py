@@ -0,0 +1,114 @@
+"""Tests for async views app posts."""
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import AsyncClient, Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Book, Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+@override_settings(ROOT_URLCONF='thebook.async_urls')
+class AsyncViewsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='group',
+            slug='slug',
+            description='description',
+        )
+        cls.book = Book.objects.create(
+            title='book',
+            author_book='author',
+            description='description',
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.user,
+                text=f'post {number}',
+                group=cls.group,
+                book=cls.book,
+            )
+            for number in range(3)
+        ]
+        Comment.objects.create(
+            author=cls.reader, post=cls.posts[0], text='first comment'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+
+    def addresses(self):
+        return [
+            reverse('posts:index'),
+            reverse('posts:books'),
+            reverse('posts:group_list', kwargs={'slug': 'slug'}),
+            reverse('posts:book_list', kwargs={'book_id': self.book.pk}),
+            reverse('posts:profile', kwargs={'username': 'user'}),
+        ]
+
+    async def test_pages_match_sync_views(self):
+        """Async views render the same pages as the sync ones."""
+        for address in self.addresses():
+            with self.subTest(address=address):
+                response = await self.async_client.get(address)
+                await sync_to_async(cache.clear)()
+                sync_response = await sync_to_async(Client().get)(address)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.content, sync_response.content)
+
+    async def test_pages_are_cached(self):
+        """Anonymous async pages come from the page cache."""
+        address = reverse('posts:index')
+        response = await self.async_client.get(address)
+        self.assertTemplateUsed(response, 'posts/index.html')
+        cached_response = await self.async_client.get(address)
+        self.assertEqual(cached_response.templates, [])
+        self.assertEqual(cached_response.content, response.content)
+
+    async def test_not_modified(self):
+        """Async pages answer 304 to a request with their ETag."""
+        address = reverse('posts:index')
+        response = await self.async_client.get(address)
+        response = await self.async_client.get(
+            address, headers={'If-None-Match': response['ETag']}
+        )
+        self.assertEqual(response.status_code, 304)
+
+    async def test_post_detail(self):
+        """Post page shows comments, missing posts are 404."""
+        response = await self.async_client.get(reverse(
+            'posts:post_detail', kwargs={'post_id': self.posts[0].pk}
+        ))
+        self.assertContains(response, 'first comment')
+        response = await self.async_client.get(reverse(
+            'posts:post_detail', kwargs={'post_id': 0}
+        ))
+        self.assertEqual(response.status_code, 404)
+
+    async def test_profile_of_follower(self):
+        """Logged-in users see whether they follow the author."""
+        client = AsyncClient()
+        await sync_to_async(client.force_login)(self.reader)
+        response = await client.get(
+            reverse('posts:profile', kwargs={'username': 'user'})
+        )
+        self.assertTrue(response.context['following'])
+        self.assertFalse(response.context['author_equel_user'])
+
+    def test_cursor_pages(self):
+        """Cursor pages of the async feed follow each other."""
+        client = Client()
+        response = client.get(reverse('posts:index'))
+        cursor = response.context['page_obj'].next_cursor
+        response = client.get(reverse('posts:index'), {'cursor': cursor})
+        self.assertEqual(
+            [post.text for post in response.context['page_obj']],
+            ['post 0']
+        )
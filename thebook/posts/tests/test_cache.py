@@ -0,0 +1,277 @@
+"""Tests for page cache app posts."""
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Book, Comment, Group, Post
+
+User = get_user_model()
+
+
+class PageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.group = Group.objects.create(
+            title='group',
+            slug='slug',
+            description='description',
+        )
+        cls.other_group = Group.objects.create(
+            title='other group',
+            slug='other',
+            description='description',
+        )
+        cls.book = Book.objects.create(
+            title='book',
+            author_book='author',
+            description='description',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='post',
+            group=cls.group,
+            book=cls.book,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.author_client = Client()
+        self.author_client.force_login(self.user)
+
+    def test_anonymous_page_is_cached(self):
+        """Second anonymous request doesn't touch the database."""
+        address = reverse('posts:group_list', kwargs={'slug': 'slug'})
+        response = self.client.get(address)
+        with self.assertNumQueries(0):
+            cached_response = self.client.get(address)
+        self.assertEqual(response.content, cached_response.content)
+
+    def test_authorized_user_is_not_cached(self):
+        """Logged-in users always get a rendered page."""
+        address = reverse('posts:index')
+        self.author_client.get(address)
+        response = self.author_client.get(address)
+        self.assertTemplateUsed(response, 'posts/index.html')
+
+    def test_new_post_invalidates_its_scopes_only(self):
+        """New post of a group drops pages of that group only."""
+        addresses = {
+            reverse('posts:index'): True,
+            reverse('posts:group_list', kwargs={'slug': 'slug'}): True,
+            reverse('posts:group_list', kwargs={'slug': 'other'}): False,
+            reverse('posts:books'): False,
+        }
+        for address in addresses:
+            self.client.get(address)
+        with self.captureOnCommitCallbacks(execute=True):
+            Post.objects.create(
+                author=self.user, text='new', group=self.group
+            )
+        for address, invalidated in addresses.items():
+            with self.subTest(address=address):
+                response = self.client.get(address)
+                self.assertEqual(response.context is not None, invalidated)
+
+    def test_moved_post_invalidates_old_group(self):
+        """Post moved to another group disappears from the old one."""
+        address = reverse('posts:group_list', kwargs={'slug': 'slug'})
+        self.assertContains(self.client.get(address), 'post')
+        self.post.group = self.other_group
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.save()
+        response = self.client.get(address)
+        self.assertNotIn(self.post, response.context['page_obj'])
+
+    def test_book_change_invalidates_book_pages(self):
+        """Edited book is shown on the book list and book page."""
+        addresses = [
+            reverse('posts:books'),
+            reverse('posts:book_list', kwargs={'book_id': self.book.id}),
+        ]
+        for address in addresses:
+            self.client.get(address)
+        self.book.title = 'new title'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book.save()
+        for address in addresses:
+            with self.subTest(address=address):
+                self.assertContains(self.client.get(address), 'new title')
+
+    def test_group_rename_invalidates_book_pages(self):
+        """Book pages with posts of a renamed group are rendered again."""
+        address = reverse('posts:book_list', kwargs={'book_id': self.book.id})
+        self.client.get(address)
+        self.group.title = 'renamed group'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.group.save()
+        self.assertIsNotNone(self.client.get(address).context)
+
+    def test_renamed_user_changes_pages(self):
+        """Pages with posts of a renamed author show the new name."""
+        addresses = [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'slug'}),
+            reverse('posts:book_list', kwargs={'book_id': self.book.id}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}),
+            reverse('posts:comments', kwargs={'post_id': self.post.id}),
+            reverse('api_v1:post_list'),
+        ]
+        Comment.objects.create(author=self.user, post=self.post, text='c')
+        for address in addresses:
+            self.client.get(address)
+        user = User.objects.get(pk=self.user.pk)
+        user.username = 'renamed'
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+        for address in addresses:
+            with self.subTest(address=address):
+                self.assertContains(self.client.get(address), 'renamed')
+
+    def test_page_read_during_write_is_not_kept(self):
+        """A page cached before the write commits isn't served after."""
+        address = reverse('posts:group_list', kwargs={'slug': 'slug'})
+        with self.captureOnCommitCallbacks(execute=True):
+            # As save_form() in the transaction of retry_on_locked.
+            with transaction.atomic():
+                Post.objects.create(
+                    author=self.user, text='new', group=self.group
+                )
+                self.client.get(address)
+        self.assertIsNotNone(self.client.get(address).context)
+
+    def test_cached_page_keeps_headers(self):
+        """Headers set by the view are replayed from the cache."""
+        address = reverse('posts:books')
+        with mock.patch('posts.views.render') as render:
+            render.return_value = HttpResponse(
+                'books', headers={'Content-Language': 'ru', 'Vary': 'Cookie'}
+            )
+            self.client.get(address)
+        response = self.client.get(address)
+        self.assertEqual(response.content, b'books')
+        self.assertEqual(response['Content-Language'], 'ru')
+        self.assertIn('Cookie', response['Vary'])
+
+    def test_comment_keeps_feed_cached(self):
+        """Comments don't invalidate the feeds."""
+        address = reverse('posts:index')
+        self.client.get(address)
+        Comment.objects.create(author=self.user, post=self.post, text='c')
+        with self.assertNumQueries(0):
+            self.client.get(address)
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.group = Group.objects.create(
+            title='group',
+            slug='slug',
+            description='description',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='post',
+            group=cls.group,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.author_client = Client()
+        self.author_client.force_login(self.user)
+
+    def addresses(self):
+        return [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'slug'}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+            reverse('posts:comments', kwargs={'post_id': self.post.pk}),
+        ]
+
+    def test_unchanged_page_is_not_modified(self):
+        """Request with the ETag of the page gets 304 without rendering."""
+        # The comment form sets the CSRF cookie, a part of the ETag.
+        self.author_client.get(self.addresses()[2])
+        for client in (self.client, self.author_client):
+            for address in self.addresses():
+                with self.subTest(address=address):
+                    response = client.get(address)
+                    self.assertIn('no-cache', response['Cache-Control'])
+                    self.assertIn('Last-Modified', response)
+                    response = client.get(
+                        address, HTTP_IF_NONE_MATCH=response['ETag']
+                    )
+                    self.assertEqual(response.status_code, 304)
+                    self.assertEqual(response.templates, [])
+
+    def test_etag_changes_with_scope(self):
+        """New comment changes the ETag of its post page only."""
+        etags = {
+            address: self.client.get(address)['ETag']
+            for address in self.addresses()
+        }
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(author=self.user, post=self.post, text='c')
+        for address, changed in zip(self.addresses(), (0, 0, 1, 1)):
+            with self.subTest(address=address):
+                response = self.client.get(
+                    address, HTTP_IF_NONE_MATCH=etags[address]
+                )
+                self.assertEqual(response.status_code, 200 if changed else 304)
+
+    def test_change_in_same_second_is_seen(self):
+        """If-Modified-Since alone never gets 304."""
+        address = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk}
+        )
+        last_modified = self.client.get(address)['Last-Modified']
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(author=self.user, post=self.post, text='c')
+        response = self.client.get(
+            address, HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_etag_depends_on_user_and_cursor(self):
+        """Users and pages of a feed have their own ETags."""
+        address = reverse('posts:index')
+        etags = {
+            self.client.get(address)['ETag'],
+            self.author_client.get(address)['ETag'],
+            self.client.get(address, {'cursor': 'abc'})['ETag'],
+        }
+        self.assertEqual(len(etags), 3)
+
+    def test_new_csrf_token_changes_etag(self):
+        """A form with the token of an old login isn't answered 304."""
+        address = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk}
+        )
+        self.author_client.get(address)
+        etag = self.author_client.get(address)['ETag']
+        # Login rotates the token.
+        self.author_client.cookies[settings.CSRF_COOKIE_NAME] = 'new'
+        response = self.author_client.get(address, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_group_rename_changes_post_page(self):
+        """Post page shows the group title, so a rename changes it."""
+        address = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk}
+        )
+        etag = self.client.get(address)['ETag']
+        self.group.title = 'new title'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.group.save()
+        response = self.client.get(address, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'new title')
@@ -0,0 +1,327 @@
+"""Tests for management commands app posts."""
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+
+from .. import lookups, search
+from ..benchmarks.cases import build_cases, url_names
+from ..models import Book, Comment, Follow, Group, Post, TimelineEntry
+
+User = get_user_model()
+
+
+class ExplainFeedsCommandTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.group = Group.objects.create(
+            title='group',
+            slug='slug',
+            description='description',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='post',
+            group=cls.group,
+        )
+        Comment.objects.create(author=cls.user, post=cls.post, text='text')
+
+    def test_feed_queries_use_indexes(self):
+        """No feed query scans the whole table or sorts."""
+        out = StringIO()
+        call_command('explain_feeds', '--strict', stdout=out)
+        self.assertIn('post_group_pub_date_idx', out.getvalue())
+        self.assertIn('comment_post_created_idx', out.getvalue())
+
+
+class SeedAndBenchmarkCommandsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command(
+            'seed', users=5, groups=2, books=3, posts=40, comments=60,
+            follows=2, stdout=StringIO()
+        )
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.baseline = os.path.join(directory.name, 'baseline.json')
+
+    def test_seed_keeps_derived_data(self):
+        """Counters and timelines of seeded data are filled."""
+        post = Post.objects.order_by('-comment_count').first()
+        self.assertEqual(post.comment_count, post.comments.count())
+        self.assertEqual(
+            post.author.profile.post_count, post.author.posts.count()
+        )
+        self.assertTrue(TimelineEntry.objects.exists())
+        self.assertTrue(Book.objects.filter(trend_score__gt=0).exists())
+        self.assertFalse(Comment.objects.filter(
+            created__lt=Post.objects.get(pk=post.pk).pub_date, post=post
+        ).exists())
+
+    def test_seed_drops_cached_pages(self):
+        """Pages and lookups cached before seeding show the new posts."""
+        cache.clear()
+        group = Group.objects.order_by('pk').first()
+        address = reverse('posts:group_list', kwargs={'slug': group.slug})
+        self.client.get(address)
+        lookups.GROUPS.get(group.slug)
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command(
+                'seed', users=0, groups=0, books=0, posts=20, comments=0,
+                follows=0, stdout=StringIO()
+            )
+        self.assertIsNotNone(self.client.get(address).context)
+        self.assertEqual(
+            lookups.GROUPS.get(group.slug).post_count,
+            Group.objects.get(pk=group.pk).post_count,
+        )
+
+    def test_every_url_has_a_case(self):
+        """Benchmark covers every url of posts and users."""
+        cases, _ = build_cases()
+        self.assertEqual(
+            {case.name for case in cases}, url_names()
+        )
+
+    def test_benchmark_writes_baseline(self):
+        """Results of every view are saved and writes are rolled back."""
+        comments = Comment.objects.count()
+        call_command(
+            'benchmark', requests=2, warmup=0,
+            save_baseline=self.baseline, stdout=StringIO()
+        )
+        with open(self.baseline) as file:
+            results = json.load(file)
+        self.assertEqual(set(results), url_names())
+        self.assertEqual(results['posts:index']['requests'], 2)
+        self.assertEqual(Comment.objects.count(), comments)
+
+    def test_regression_fails(self):
+        """More queries than in the baseline is an error."""
+        call_command(
+            'benchmark', requests=1, warmup=0, only=['posts:post_detail'],
+            save_baseline=self.baseline, stdout=StringIO()
+        )
+        with open(self.baseline) as file:
+            results = json.load(file)
+        results['posts:post_detail']['queries'] -= 1
+        with open(self.baseline, 'w') as file:
+            json.dump(results, file)
+        with self.assertRaisesMessage(CommandError, 'posts:post_detail'):
+            call_command(
+                'benchmark', requests=1, warmup=0,
+                only=['posts:post_detail'], baseline=self.baseline,
+                stdout=StringIO()
+            )
+
+
+class ImportExportCommandsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.group = Group.objects.create(
+            title='group',
+            slug='slug',
+            description='description',
+        )
+        cls.book = Book.objects.create(
+            title='book',
+            author_book='author',
+            description='description',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='post',
+            group=cls.group,
+            book=cls.book,
+        )
+        Comment.objects.create(author=cls.user, post=cls.post, text='text')
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w') as file:
+            file.write(content)
+        return path
+
+    def test_export_uses_natural_keys(self):
+        """Exported posts refer to author, group and book by name."""
+        out = StringIO()
+        call_command('export_data', 'posts', stdout=out)
+        row = json.loads(out.getvalue())
+        self.assertEqual(row['id'], self.post.pk)
+        self.assertEqual(row['author'], 'user')
+        self.assertEqual(row['group'], 'slug')
+        self.assertEqual(row['book'], 'book')
+
+    def test_import_books_updates_by_title(self):
+        """Known titles are updated, new ones are created."""
+        path = self.write(
+            'books.csv',
+            'title,author_book,description\n'
+            'book,new author,new description\n'
+            'other,author,description\n'
+        )
+        call_command('import_data', 'books', path, stdout=StringIO())
+        self.assertEqual(Book.objects.count(), 2)
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.author_book, 'new author')
+        self.assertEqual(self.book.post_count, 1)
+
+    def test_import_posts_rebuilds_derived_data(self):
+        """Imported posts keep dates, counters and search are rebuilt."""
+        rows = [
+            {
+                'text': 'imported zebra', 'author': 'user', 'group': 'slug',
+                'book': 'book', 'pub_date': '2020-01-02T03:04:05+00:00',
+            },
+            {'text': 'imported', 'author': 'user', 'group': None},
+        ]
+        path = self.write(
+            'posts.jsonl', '\n'.join(json.dumps(row) for row in rows)
+        )
+        call_command(
+            'import_data', 'posts', path, batch_size=1, stdout=StringIO()
+        )
+        post = Post.objects.get(text='imported zebra')
+        self.assertEqual(post.pub_date.year, 2020)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.post_count, 2)
+        self.user.profile.refresh_from_db()
+        self.assertEqual(self.user.profile.post_count, 3)
+        if search.is_enabled():
+            self.assertEqual(search.search('zebra', 10), [(Post, post.pk)])
+
+    def test_import_updates_only_its_rows(self):
+        """Counters and timelines of other rows aren't recomputed."""
+        other = Group.objects.create(
+            title='other', slug='other', description='description'
+        )
+        Group.objects.filter(pk=other.pk).update(post_count=5)
+        reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=reader, author=self.user)
+        path = self.write(
+            'posts.jsonl',
+            json.dumps({'id': self.post.pk, 'text': 'moved',
+                        'author': 'user', 'group': None}),
+        )
+        call_command('import_data', 'posts', path, stdout=StringIO())
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.post_count, 0)
+        other.refresh_from_db()
+        self.assertEqual(other.post_count, 5)
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=reader, post=self.post).exists()
+        )
+
+    def test_import_keeps_date_of_updated_rows(self):
+        """An empty date is now for new rows, stored ones keep theirs."""
+        pub_date = self.post.pub_date
+        path = self.write(
+            'posts.csv',
+            'id,text,pub_date,author\n'
+            f'{self.post.pk},edited,,user\n'
+            ',new,,user\n'
+        )
+        call_command('import_data', 'posts', path, stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.text, 'edited')
+        self.assertEqual(self.post.pub_date, pub_date)
+        new = Post.objects.get(text='new')
+        self.assertGreater(new.pub_date, pub_date)
+
+    def test_import_with_ids_resets_sequence(self):
+        """The pk sequence is moved past explicit ids of new rows."""
+        path = self.write(
+            'posts.jsonl',
+            json.dumps({'id': 1000, 'text': 'post', 'author': 'user'}),
+        )
+        with mock.patch.object(
+            connection.ops, 'sequence_reset_sql', return_value=[]
+        ) as sequence_reset_sql:
+            call_command('import_data', 'posts', path, stdout=StringIO())
+        self.assertEqual(sequence_reset_sql.call_args.args[1], [Post])
+        path = self.write(
+            'posts.jsonl', json.dumps({'text': 'post', 'author': 'user'})
+        )
+        with mock.patch.object(
+            connection.ops, 'sequence_reset_sql', return_value=[]
+        ) as sequence_reset_sql:
+            call_command('import_data', 'posts', path, stdout=StringIO())
+        sequence_reset_sql.assert_not_called()
+
+    def test_comments_round_trip(self):
+        """Exported comments are imported back unchanged."""
+        path = os.path.join(self.directory, 'comments.csv')
+        call_command('export_data', 'comments', path, stdout=StringIO())
+        exported = list(Comment.objects.values_list(
+            'pk', 'text', 'created', 'author', 'post'
+        ))
+        Comment.objects.all().delete()
+        call_command('import_data', 'comments', path, stdout=StringIO())
+        self.assertEqual(
+            list(Comment.objects.values_list(
+                'pk', 'text', 'created', 'author', 'post'
+            )),
+            exported
+        )
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+
+    def test_unknown_author_fails(self):
+        """Rows with unknown foreign keys are reported with the row."""
+        path = self.write(
+            'posts.jsonl', json.dumps({'text': 'post', 'author': 'nobody'})
+        )
+        with self.assertRaisesMessage(CommandError, 'Row 1'):
+            call_command('import_data', 'posts', path, stdout=StringIO())
+
+
+class ConcurrentBenchmarkTest(TransactionTestCase):
+    def test_wsgi_and_asgi_are_compared(self):
+        """Read views are measured under both interfaces."""
+        call_command(
+            'seed', users=3, groups=1, books=1, posts=5, comments=5,
+            follows=1, stdout=StringIO()
+        )
+        out = StringIO()
+        call_command(
+            'benchmark', requests=4, concurrency=2,
+            only=['posts:index', 'posts:post_detail'], stdout=out
+        )
+        for line in (
+            'posts:index wsgi', 'posts:index asgi',
+            'posts:post_detail wsgi', 'posts:post_detail asgi',
+        ):
+            self.assertIn(line, out.getvalue())
+
+    def test_reads_during_writes(self):
+        """Writes and reads running together are both reported."""
+        call_command(
+            'seed', users=3, groups=1, books=1, posts=5, comments=5,
+            follows=1, stdout=StringIO()
+        )
+        out = StringIO()
+        call_command(
+            'benchmark', writers=1, readers=1, duration=0.5, stdout=out
+        )
+        self.assertIn('posts:add_comment write', out.getvalue())
+        self.assertIn('posts:index read', out.getvalue())
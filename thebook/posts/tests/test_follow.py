@@ -0,0 +1,101 @@
+"""Tests for follow feed app posts."""
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Follow, Post, TimelineEntry
+from ..views import PAGES_NUMBER
+
+User = get_user_model()
+
+
+class FollowTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.author = User.objects.create_user(username='author')
+        cls.other_author = User.objects.create_user(username='other')
+        cls.old_post = Post.objects.create(author=cls.author, text='old')
+
+    def setUp(self):
+        self.user_client = Client()
+        self.user_client.force_login(self.user)
+
+    def follow_feed(self, cursor=None):
+        data = {'cursor': cursor} if cursor else {}
+        response = self.user_client.get(reverse('posts:follow_index'), data)
+        return response.context['page_obj']
+
+    def test_follow_and_unfollow(self):
+        """User can follow and unfollow an author."""
+        self.user_client.get(
+            reverse('posts:profile_follow', kwargs={'username': 'author'})
+        )
+        self.assertTrue(
+            Follow.objects.filter(user=self.user, author=self.author).exists()
+        )
+        self.author.profile.refresh_from_db()
+        self.assertEqual(self.author.profile.follower_count, 1)
+        self.user_client.get(
+            reverse('posts:profile_unfollow', kwargs={'username': 'author'})
+        )
+        self.assertFalse(
+            Follow.objects.filter(user=self.user, author=self.author).exists()
+        )
+        self.assertFalse(TimelineEntry.objects.filter(user=self.user))
+
+    def test_user_cannot_follow_himself(self):
+        self.user_client.get(
+            reverse('posts:profile_follow', kwargs={'username': 'user'})
+        )
+        self.assertFalse(Follow.objects.filter(user=self.user).exists())
+
+    def test_new_post_appears_for_followers_only(self):
+        """Post is fanned out to the followers of the author."""
+        Follow.objects.create(user=self.user, author=self.author)
+        post = Post.objects.create(author=self.author, text='new')
+        other_post = Post.objects.create(author=self.other_author, text='x')
+        page_obj = self.follow_feed()
+        self.assertEqual(list(page_obj), [post, self.old_post])
+        self.assertNotIn(other_post, page_obj)
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.user, post=post).exists()
+        )
+
+    @override_settings(FOLLOW_FANOUT_LIMIT=0)
+    def test_popular_author_is_merged_at_read_time(self):
+        """Posts of popular authors aren't copied but still shown."""
+        Follow.objects.create(user=self.user, author=self.other_author)
+        Follow.objects.create(user=self.user, author=self.author)
+        posts = [self.old_post]
+        for i in range(PAGES_NUMBER * 2):
+            author = self.author if i % 2 else self.other_author
+            posts.append(Post.objects.create(author=author, text=f'{i}'))
+        self.assertFalse(TimelineEntry.objects.exists())
+        shown = []
+        page_obj = self.follow_feed()
+        shown += page_obj
+        while page_obj.has_next():
+            page_obj = self.follow_feed(page_obj.next_cursor)
+            shown += page_obj
+        self.assertEqual(shown, posts[::-1])
+
+    @override_settings(FOLLOW_FANOUT_LIMIT=1)
+    def test_author_back_under_limit_keeps_posts(self):
+        """Posts written above the limit stay in the feed after
+        the author drops back to it.
+        """
+        Follow.objects.create(user=self.user, author=self.author)
+        follow = Follow.objects.create(
+            user=self.other_author, author=self.author
+        )
+        post = Post.objects.create(author=self.author, text='popular')
+        self.assertFalse(
+            TimelineEntry.objects.filter(user=self.user, post=post).exists()
+        )
+        follow.delete()
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.user, post=post).exists()
+        )
+        self.assertEqual(list(self.follow_feed()), [post, self.old_post])
@@ -1,8 +1,15 @@
 """Tests for forms app posts."""
+import shutil
+import tempfile
+from io import BytesIO
+
 from django import forms
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from PIL import Image
 
 from ..forms import PostForm
 from ..models import Comment, Group, Post
@@ -216,3 +223,69 @@ class FormTests(TestCase):
         self.assertFalse(
             Comment.objects.filter(**form_comment_data).exists()
         )
+
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def image_upload(size, name='photo.jpg', image_format='JPEG'):
+    content = BytesIO()
+    image = Image.new('RGB', size, 'blue')
+    exif = Image.Exif()
+    exif[0x010F] = 'Phone maker'
+    image.save(content, image_format, exif=exif)
+    return SimpleUploadedFile(name, content.getvalue(), 'image/jpeg')
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT, IMAGE_MAX_SIDE=100, IMAGE_FORMAT='WEBP'
+)
+class ImageIngestionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.author_client = Client()
+        self.author_client.force_login(self.user)
+
+    def create_post(self, text, upload):
+        return self.author_client.post(
+            reverse('posts:post_create'),
+            data={'text': text, 'image': upload},
+        )
+
+    def test_image_is_downscaled_and_reencoded(self):
+        """Upload is stored smaller, as WebP, without exif."""
+        self.create_post('photo', image_upload((400, 200)))
+        post = Post.objects.get(text='photo')
+        self.assertTrue(post.image.name.endswith('.webp'))
+        self.assertEqual((post.image_width, post.image_height), (100, 50))
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.format, 'WEBP')
+            self.assertEqual(image.size, (100, 50))
+            self.assertFalse(image.getexif())
+
+    def test_identical_uploads_share_file(self):
+        """The same image uploaded twice is stored once."""
+        self.create_post('first', image_upload((300, 300)))
+        self.create_post('second', image_upload((300, 300), 'copy.jpg'))
+        first = Post.objects.get(text='first')
+        second = Post.objects.get(text='second')
+        self.assertEqual(first.image.name, second.image.name)
+
+    @override_settings(IMAGE_MAX_PIXELS=100)
+    def test_too_many_pixels_rejected(self):
+        """Image with too many pixels is not accepted."""
+        response = self.create_post('huge', image_upload((20, 20)))
+        self.assertFalse(Post.objects.filter(text='huge').exists())
+        self.assertFormError(
+            response.context['form'], 'image',
+            'The image has too many pixels.'
+        )
@@ -0,0 +1,146 @@
+"""Tests for lookup cache app posts."""
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import Http404
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import lookups
+from ..models import Book, Follow, Group, Post
+
+User = get_user_model()
+
+
+class LocalCacheTests(TestCase):
+    def test_least_recently_used_is_evicted(self):
+        """Over size the entry read longest ago is dropped."""
+        local = lookups.LocalCache()
+        local.set('a', 1, 60, 2)
+        local.set('b', 2, 60, 2)
+        local.get('a')
+        local.set('c', 3, 60, 2)
+        self.assertEqual(local.get('a'), 1)
+        self.assertIsNone(local.get('b'))
+        self.assertEqual(local.get('c'), 3)
+
+    def test_entries_expire(self):
+        """Entries are dropped after their TTL."""
+        local = lookups.LocalCache()
+        with mock.patch('time.monotonic', return_value=100):
+            local.set('a', 1, 10, 2)
+        with mock.patch('time.monotonic', return_value=105):
+            self.assertEqual(local.get('a'), 1)
+        with mock.patch('time.monotonic', return_value=111):
+            self.assertIsNone(local.get('a'))
+
+
+class LookupTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='group',
+            slug='slug',
+            description='description',
+        )
+        cls.book = Book.objects.create(
+            title='book',
+            author_book='author',
+            description='description',
+        )
+
+    def setUp(self):
+        cache.clear()
+        lookups.clear_local()
+
+    def test_objects_are_read_once(self):
+        """The second lookup comes from the process, then the cache."""
+        with self.assertNumQueries(1):
+            lookups.GROUPS.get('slug')
+            self.assertEqual(lookups.GROUPS.get('slug'), self.group)
+        lookups.clear_local()
+        with self.assertNumQueries(0):
+            self.assertEqual(lookups.GROUPS.get('slug'), self.group)
+
+    def test_user_comes_with_profile(self):
+        user = lookups.USERS.get('user')
+        with self.assertNumQueries(0):
+            self.assertEqual(user.profile.post_count, 0)
+
+    def test_missing_object(self):
+        self.assertIsNone(lookups.BOOKS.get(0))
+        with self.assertRaises(Http404):
+            lookups.USERS.get_or_404('nobody')
+
+    @override_settings(LOOKUP_CACHE_TTL=0)
+    def test_without_local_cache(self):
+        """TTL 0 keeps objects in the shared cache only."""
+        lookups.BOOKS.get(self.book.pk)
+        self.assertEqual(lookups.BOOKS.local.entries, {})
+        with self.assertNumQueries(0):
+            lookups.BOOKS.get(self.book.pk)
+
+    def test_changes_drop_objects(self):
+        """Saved objects and changed counters are read again."""
+        lookups.GROUPS.get('slug')
+        lookups.BOOKS.get(self.book.pk)
+        lookups.USERS.get('user')
+        Group.objects.filter(pk=self.group.pk).update(title='renamed')
+        with self.captureOnCommitCallbacks(execute=True):
+            Group.objects.get(pk=self.group.pk).save()
+            Post.objects.create(
+                author=self.user, text='post', book=self.book
+            )
+        self.assertEqual(lookups.GROUPS.get('slug').title, 'renamed')
+        self.assertEqual(lookups.BOOKS.get(self.book.pk).post_count, 1)
+        self.assertEqual(
+            lookups.USERS.get('user').profile.post_count, 1
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.create(user=self.reader, author=self.user)
+        self.assertEqual(
+            lookups.USERS.get('user').profile.follower_count, 1
+        )
+
+    def test_change_in_other_process(self):
+        """The local copy isn't used after another process dropped it."""
+        lookups.GROUPS.get('slug')
+        Group.objects.filter(pk=self.group.pk).update(title='renamed')
+        # What forget() in another process leaves in the shared cache.
+        cache.delete(lookups.GROUPS.key('slug'))
+        cache.set(lookups.GROUPS.version_key('slug'), 0, None)
+        self.assertEqual(lookups.GROUPS.get('slug').title, 'renamed')
+
+    def test_renamed_user(self):
+        """The old username is not found after a rename."""
+        user = User.objects.create_user(username='old')
+        lookups.USERS.get('old')
+        user.username = 'new'
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+        self.assertIsNone(lookups.USERS.get('old'))
+        self.assertEqual(lookups.USERS.get('new'), user)
+
+    def test_pages_use_lookups(self):
+        """Group, book and profile pages read their object once."""
+        client = Client()
+        client.force_login(self.reader)
+        addresses = [
+            reverse('posts:group_list', kwargs={'slug': 'slug'}),
+            reverse('posts:book_list', kwargs={'book_id': self.book.pk}),
+            reverse('posts:profile', kwargs={'username': 'user'}),
+        ]
+        for address in addresses:
+            self.assertEqual(client.get(address).status_code, 200)
+        with self.assertNumQueries(0):
+            lookups.GROUPS.get('slug')
+            lookups.BOOKS.get(self.book.pk)
+            lookups.USERS.get('user')
+        response = client.get(
+            reverse('posts:group_list', kwargs={'slug': 'missing'})
+        )
+        self.assertEqual(response.status_code, 404)
@@ -1,5 +1,8 @@
 """Tests for models app posts."""
+from io import StringIO
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.test import TestCase
 
 from ..models import Book, Comment, Group, Post
@@ -133,3 +136,86 @@ class CommentModelTest(TestCase):
         self.assertEqual(verbose, 'Author')
         verbose = comment._meta.get_field('post').verbose_name
         self.assertEqual(verbose, 'Post')
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='test group',
+            slug='slug',
+            description='description',
+        )
+        cls.other_group = Group.objects.create(
+            title='other group',
+            slug='other',
+            description='description',
+        )
+        cls.book = Book.objects.create(
+            title='test book',
+            author_book='test author',
+            description='test description',
+        )
+
+    def assert_counts(self, post_count, group_count, other_count, book_count):
+        self.user.profile.refresh_from_db()
+        self.group.refresh_from_db()
+        self.other_group.refresh_from_db()
+        self.book.refresh_from_db()
+        self.assertEqual(self.user.profile.post_count, post_count)
+        self.assertEqual(self.group.post_count, group_count)
+        self.assertEqual(self.other_group.post_count, other_count)
+        self.assertEqual(self.book.post_count, book_count)
+
+    def test_post_counters(self):
+        """Counters follow created, moved and deleted posts."""
+        post = Post.objects.create(
+            author=self.user, text='post', group=self.group, book=self.book
+        )
+        self.assert_counts(1, 1, 0, 1)
+        post.group = self.other_group
+        post.book = None
+        post.save()
+        self.assert_counts(1, 0, 1, 0)
+        post.delete()
+        self.assert_counts(0, 0, 0, 0)
+
+    def test_comment_counter(self):
+        """Post.comment_count follows created and deleted comments."""
+        post = Post.objects.create(author=self.user, text='post')
+        comment = Comment.objects.create(
+            author=self.user, post=post, text='comment'
+        )
+        Comment.objects.create(author=self.user, post=post, text='comment')
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 2)
+        comment.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 1)
+
+    def test_recount_repairs_counters(self):
+        """recount command recomputes broken counters."""
+        post = Post.objects.create(
+            author=self.user, text='post', group=self.group, book=self.book
+        )
+        Comment.objects.create(author=self.user, post=post, text='comment')
+        Post.objects.update(comment_count=10)
+        Group.objects.update(post_count=10)
+        Book.objects.update(post_count=10)
+        self.user.profile.delete()
+        call_command('recount', stdout=StringIO())
+        self.user = User.objects.get(pk=self.user.pk)
+        self.assert_counts(1, 1, 0, 1)
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 1)
+
+    def test_save_keeps_counters(self):
+        """Saving a stale instance doesn't overwrite counters."""
+        post = Post.objects.create(author=self.user, text='post')
+        Comment.objects.create(author=self.user, post=post, text='comment')
+        post.text = 'new text'
+        post.save()
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 1)
@@ -0,0 +1,162 @@
+"""Tests for related books and posts app posts."""
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from .. import related
+from ..models import Book, Post, RelatedBook, RelatedPost
+
+User = get_user_model()
+
+
+class SimilarityTests(TestCase):
+    TEXTS = [
+        'dragons and wizards in a castle',
+        'a castle with wizards and dragons',
+        'detective story about a murder',
+        'murder in the library, a detective story',
+        'summer poems',
+    ]
+
+    def test_similar_texts_are_nearest(self):
+        """Both implementations find the texts sharing rare words."""
+        vectors = related.tfidf(self.TEXTS)
+        results = [related.nearest_python(vectors, 2)]
+        if related.sparse is not None:
+            results.append(related.nearest_numpy(vectors, 2))
+        for result in results:
+            self.assertEqual(result[0][0][0], 1)
+            self.assertEqual(result[3][0][0], 2)
+            self.assertEqual(result[4], [])
+        if len(results) == 2:
+            for python_row, numpy_row in zip(*results):
+                self.assertEqual(
+                    [other for other, _ in python_row],
+                    [other for other, _ in numpy_row],
+                )
+
+    def test_vectors_have_unit_length(self):
+        for vector in related.tfidf(self.TEXTS):
+            if vector:
+                self.assertAlmostEqual(
+                    sum(weight ** 2 for weight in vector.values()), 1
+                )
+
+
+class RelatedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.books = [
+            Book.objects.create(
+                title=title, author_book=author, description=description
+            )
+            for title, author, description in (
+                ('Castle', 'Tolkien', 'dragons and wizards'),
+                ('Hobbit', 'tolkien ', 'a journey'),
+                ('Wizards', 'Other', 'wizards and dragons again'),
+                ('Murder', 'Christie', 'a detective story'),
+                ('Poems', 'Poet', 'summer evening'),
+            )
+        ]
+        cls.posts = [
+            Post.objects.create(author=author, text=text, book=book)
+            for author, text, book in (
+                (cls.user, 'dragons in a castle', cls.books[0]),
+                (cls.user, 'a castle full of dragons', cls.books[4]),
+                (cls.reader, 'a detective story', cls.books[3]),
+                (cls.reader, 'summer story', None),
+            )
+        ]
+        related.rebuild(2)
+
+    def setUp(self):
+        cache.clear()
+
+    def neighbours(self, book):
+        return [row.related for row in related.for_book(book.pk)]
+
+    def test_books_by_author_and_text(self):
+        """Books of the same author, with similar text or with posts
+        of the same users are related.
+        """
+        rows = {
+            row.related: row.same_author
+            for row in related.for_book(self.books[0].pk)
+        }
+        self.assertEqual(rows, {self.books[1]: True, self.books[2]: False})
+        self.assertIn(self.books[0], self.neighbours(self.books[4]))
+
+    def test_posts_by_text(self):
+        self.assertEqual(
+            [row.related for row in related.for_post(self.posts[0].pk)],
+            [self.posts[1]],
+        )
+
+    def test_without_numpy(self):
+        """The pure Python fallback stores the same neighbours."""
+        stored = set(RelatedBook.objects.values_list('book', 'related'))
+        with mock.patch.object(related, 'sparse', None):
+            related.rebuild(2)
+        self.assertEqual(
+            set(RelatedBook.objects.values_list('book', 'related')), stored
+        )
+
+    def test_command_replaces_rows(self):
+        out = StringIO()
+        call_command('related', size=1, stdout=out)
+        self.assertEqual(
+            RelatedPost.objects.filter(post=self.posts[0]).count(), 1
+        )
+        self.assertIn('related posts', out.getvalue())
+
+    def test_pages_show_neighbours(self):
+        response = self.client.get(
+            reverse('posts:book_list', kwargs={'book_id': self.books[0].pk})
+        )
+        self.assertContains(response, 'Other books by this author')
+        self.assertContains(response, 'Hobbit')
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.posts[0].pk})
+        )
+        self.assertContains(response, 'Related posts')
+        self.assertContains(response, 'a castle full of dragons')
+
+    def test_rebuild_changes_etags(self):
+        """Pages with neighbours aren't answered 304 after a rebuild."""
+        address = reverse(
+            'posts:post_detail', kwargs={'post_id': self.posts[0].pk}
+        )
+        etag = self.client.get(address)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            related.rebuild(1)
+        response = self.client.get(address, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_changed_neighbour_changes_etags(self):
+        """Editing or deleting a related post changes pages showing it."""
+        address = reverse(
+            'posts:post_detail', kwargs={'post_id': self.posts[0].pk}
+        )
+        neighbour = Post.objects.get(pk=self.posts[1].pk)
+        etag = self.client.get(address)['ETag']
+        neighbour.save()
+        response = self.client.get(address, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        neighbour.text = 'a castle full of wizards'
+        with self.captureOnCommitCallbacks(execute=True):
+            neighbour.save()
+        response = self.client.get(address, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'a castle full of wizards')
+        etag = response['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            neighbour.delete()
+        response = self.client.get(address, HTTP_IF_NONE_MATCH=etag)
+        self.assertNotContains(response, 'a castle full of wizards')
@@ -0,0 +1,100 @@
+"""Tests for search app posts."""
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from .. import search
+from ..models import Book, Comment, Post
+from ..views import MAX_SEARCH_PAGE, SEARCH_PAGE_SIZE
+
+User = get_user_model()
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.book = Book.objects.create(
+            title='Solaris',
+            author_book='Stanislaw Lem',
+            description='Ocean planet',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='I have read Solaris twice',
+            book=cls.book,
+        )
+        cls.comment = Comment.objects.create(
+            author=cls.user,
+            post=cls.post,
+            text='The ocean scenes are the best',
+        )
+
+    def search(self, query, page=1):
+        response = self.client.get(
+            reverse('posts:search'), {'q': query, 'page': page}
+        )
+        return [result['object'] for result in response.context['results']]
+
+    def test_search_finds_all_kinds(self):
+        """Posts, books and comments are found, title ranked first."""
+        self.assertEqual(self.search('solaris'), [self.book, self.post])
+        self.assertEqual(self.search('ocean'), [self.book, self.comment])
+        self.assertEqual(self.search('stanis'), [self.book])
+
+    def test_index_follows_changes(self):
+        """Edited and deleted objects are reindexed."""
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Changed text'
+        post.save()
+        self.assertEqual(self.search('twice'), [])
+        self.assertEqual(self.search('changed'), [post])
+        Comment.objects.get(pk=self.comment.pk).delete()
+        self.assertEqual(self.search('scenes'), [])
+
+    def test_search_pages(self):
+        """Results are split into pages."""
+        posts = [
+            Post.objects.create(author=self.user, text='page')
+            for _ in range(SEARCH_PAGE_SIZE + 1)
+        ]
+        first = self.search('page')
+        second = self.search('page', page=2)
+        self.assertEqual(len(first), SEARCH_PAGE_SIZE)
+        self.assertEqual(set(first + second), set(posts))
+
+    def test_empty_query(self):
+        self.assertEqual(self.search(' "*" '), [])
+
+    def test_rebuild_command(self):
+        """Rebuild restores the index after a bulk load."""
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM posts_search')
+        self.assertEqual(self.search('solaris'), [])
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(self.search('solaris'), [self.book, self.post])
+
+    def test_huge_page(self):
+        """Page numbers past the last page are clamped."""
+        for page in ('99999999999999999999', MAX_SEARCH_PAGE + 1):
+            response = self.client.get(
+                reverse('posts:search'), {'q': 'solaris', 'page': page}
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(
+                response.context['page_number'], MAX_SEARCH_PAGE
+            )
+
+    def test_fallback_search(self):
+        """Without the index all fields are searched, title first."""
+        with mock.patch.object(search, 'is_enabled', return_value=False):
+            self.assertEqual(self.search('solaris'), [self.book, self.post])
+            self.assertEqual(self.search('lem'), [self.book])
+            self.assertEqual(self.search('ocean planet'), [self.book])
+            self.assertEqual(self.search('the ocean'), [self.comment])
@@ -0,0 +1,84 @@
+"""Tests for thumbnails app posts."""
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from .. import lookups
+from ..models import Book, Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def image_file(name='image.png', size=(400, 300)):
+    content = BytesIO()
+    Image.new('RGB', size, 'red').save(content, 'PNG')
+    return SimpleUploadedFile(name, content.getvalue(), 'image/png')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_ASYNC=False)
+class ThumbnailsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        lookups.clear_local()
+        self.author_client = Client()
+        self.author_client.force_login(self.user)
+
+    def test_upload_generates_thumbnails(self):
+        """Thumbnails are made after post_create and shown on the page."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author_client.post(
+                reverse('posts:post_create'),
+                {'text': 'post with image', 'image': image_file()},
+            )
+        post = Post.objects.get(text='post with image')
+        small = post.thumbnails['small']
+        self.assertEqual((small['width'], small['height']), (140, 140))
+        response = self.author_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        )
+        self.assertContains(response, small['url'])
+
+    def test_page_without_thumbnails_shows_image(self):
+        """Before the worker is done the page shows the image itself."""
+        book = Book.objects.create(
+            title='book',
+            author_book='author',
+            description='description',
+            image_book=image_file(),
+        )
+        response = self.author_client.get(
+            reverse('posts:book_list', kwargs={'book_id': book.pk})
+        )
+        self.assertContains(response, book.image_book.url)
+
+    def test_backfill_command(self):
+        """generate_thumbnails fills thumbnails of existing images."""
+        book = Book.objects.create(
+            title='book',
+            author_book='author',
+            description='description',
+            image_book=image_file(),
+        )
+        call_command('generate_thumbnails', '--workers=1', stdout=StringIO())
+        book.refresh_from_db()
+        self.assertIn('small', book.thumbnails)
@@ -0,0 +1,153 @@
+"""Tests for trending books and groups app posts."""
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import transfer, trending
+from ..models import Book, Comment, Group, Post, TrendEpoch
+
+User = get_user_model()
+
+
+@override_settings(TRENDING_HALF_LIFE=1)
+class TrendingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.group = Group.objects.create(
+            title='group',
+            slug='slug',
+            description='description',
+        )
+        cls.books = [
+            Book.objects.create(
+                title=f'book {number}',
+                author_book='author',
+                description='description',
+            )
+            for number in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def write(self, book, count=1, age=timedelta()):
+        posts = [
+            Post.objects.create(
+                author=self.user, text='post', group=self.group, book=book
+            )
+            for _ in range(count)
+        ]
+        Post.objects.filter(pk__in=[post.pk for post in posts]).update(
+            pub_date=timezone.now() - age
+        )
+        return posts
+
+    def score(self, model, pk):
+        return model.objects.get(pk=pk).trend_score
+
+    def test_posts_and_comments_add_scores(self):
+        post, = self.write(self.books[0])
+        self.assertAlmostEqual(
+            self.score(Book, self.books[0].pk), 1, places=2
+        )
+        Comment.objects.create(author=self.user, post=post, text='comment')
+        self.assertAlmostEqual(
+            self.score(Group, self.group.pk), 1.5, places=2
+        )
+        post.delete()
+        self.assertAlmostEqual(
+            self.score(Book, self.books[0].pk), 0.5, places=2
+        )
+
+    def test_moved_post_moves_its_score(self):
+        post, = self.write(self.books[0])
+        post.book = self.books[1]
+        post.save()
+        self.assertAlmostEqual(self.score(Book, self.books[0].pk), 0)
+        self.assertAlmostEqual(
+            self.score(Book, self.books[1].pk), 1, places=2
+        )
+
+    def test_rebase_keeps_order_and_decays(self):
+        """Scores are scaled to the new epoch, the order stays."""
+        self.write(self.books[0], count=2)
+        self.write(self.books[1])
+        TrendEpoch.objects.update(epoch=TrendEpoch.objects.get().epoch - 3600)
+        trending.rebase()
+        self.assertAlmostEqual(
+            self.score(Book, self.books[0].pk), 1, places=2
+        )
+        self.assertAlmostEqual(
+            self.score(Book, self.books[1].pk), 0.5, places=2
+        )
+
+    def test_rebuild_decays_old_posts(self):
+        """Two posts of two half-lives ago weigh half a new one."""
+        self.write(self.books[0], count=2, age=timedelta(hours=2))
+        self.write(self.books[1])
+        trending.rebuild()
+        self.assertAlmostEqual(
+            self.score(Book, self.books[0].pk), 0.5, places=2
+        )
+        self.assertEqual(
+            [book['pk'] for book in trending.compute_top(trending.BOOKS)],
+            [self.books[1].pk, self.books[0].pk],
+        )
+
+    def test_top_comes_from_cache(self):
+        """The top list is read once, until the command refreshes it."""
+        self.write(self.books[2])
+        with self.assertNumQueries(1):
+            trending.top(trending.BOOKS)
+            books = trending.top(trending.BOOKS)
+        self.assertEqual(books[0]['title'], 'book 2')
+        self.write(self.books[1], count=2)
+        self.assertEqual(trending.top(trending.BOOKS), books)
+        call_command('trending', stdout=StringIO())
+        self.assertEqual(
+            trending.top(trending.BOOKS)[0]['title'], 'book 1'
+        )
+
+    def test_imported_posts_get_scores(self):
+        """Imports update the scores of their books and groups."""
+        Post.objects.bulk_create([
+            Post(author=self.user, text='post', book=self.books[2])
+        ])
+        rows = [
+            {'text': 'post', 'author': 'user', 'book': 'book 1'},
+            {'text': 'post', 'author': 'user', 'group': 'slug'},
+        ]
+        transfer.import_rows(Post, rows)
+        self.assertAlmostEqual(
+            self.score(Book, self.books[1].pk), 1, places=2
+        )
+        self.assertAlmostEqual(
+            self.score(Group, self.group.pk), 1, places=2
+        )
+        self.assertEqual(self.score(Book, self.books[2].pk), 0)
+        self.assertEqual(
+            trending.top(trending.BOOKS)[0]['title'], 'book 1'
+        )
+
+    def test_refresh_drops_feed_pages(self):
+        """The cached index shows the refreshed top lists."""
+        self.client.get(reverse('posts:index'))
+        Book.objects.filter(pk=self.books[0].pk).update(trend_score=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            trending.refresh()
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'book 0')
+
+    def test_index_shows_trending(self):
+        self.write(self.books[0])
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Trending books')
+        self.assertContains(response, '#group')
@@ -1,10 +1,15 @@
 """Tests for views app posts."""
+import base64
+from unittest import mock
+
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import Client, TestCase
 from django.urls import reverse
 
-from ..models import Group, Post
-from ..views import PAGES_NUMBER
+from .. import lookups, trending
+from ..models import Book, Comment, Group, Post
+from ..views import COMMENTS_PAGE_SIZE, PAGES_NUMBER
 
 User = get_user_model()
 
@@ -31,6 +36,7 @@ class PostsViewsTests(TestCase):
         )
 
     def setUp(self):
+        cache.clear()
         self.author_client = Client()
         self.author_client.force_login(PostsViewsTests.post.author)
 
@@ -115,6 +121,7 @@ class PaginatorViewsTest(TestCase):
                 author=cls.user))
 
     def setUp(self):
+        cache.clear()
         self.author_client = Client()
         self.author_client.force_login(self.user)
 
@@ -149,5 +156,167 @@ class PaginatorViewsTest(TestCase):
         }
         for address in templates_url_names.values():
             with self.subTest(address=address):
-                response = self.author_client.get((address) + '?page=2')
+                response = self.author_client.get(address)
+                next_cursor = response.context['page_obj'].next_cursor
+                response = self.author_client.get(
+                    address, {'cursor': next_cursor}
+                )
                 self.assertEqual(len(response.context['page_obj']), 1)
+                self.assertFalse(response.context['page_obj'].has_next())
+
+    def test_previous_cursor_returns_first_page(self):
+        """Previous cursor of the second page leads to the first page."""
+        address = reverse('posts:index')
+        first_page = self.author_client.get(address).context['page_obj']
+        second_page = self.author_client.get(
+            address, {'cursor': first_page.next_cursor}
+        ).context['page_obj']
+        page_obj = self.author_client.get(
+            address, {'cursor': second_page.previous_cursor}
+        ).context['page_obj']
+        self.assertEqual(list(page_obj), list(first_page))
+        self.assertEqual(
+            list(page_obj), self.postlist[::-1][:PAGES_NUMBER]
+        )
+
+    def test_invalid_cursor_shows_first_page(self):
+        """Broken cursor falls back to the first page."""
+        response = self.author_client.get(
+            reverse('posts:index'), {'cursor': 'broken'}
+        )
+        self.assertEqual(
+            list(response.context['page_obj']),
+            self.postlist[::-1][:PAGES_NUMBER]
+        )
+
+    def test_crafted_cursor_shows_first_page(self):
+        """Cursors with values that aren't strings are ignored."""
+        addresses = [
+            reverse('posts:index'),
+            reverse('api_v1:post_list'),
+            reverse('api_v1:book_list'),
+        ]
+        for raw in ('["n",[null,null]]', '["n",[[1],[2]]]', '["n",["x","y"]]'):
+            cursor = base64.urlsafe_b64encode(raw.encode()).decode()
+            for address in addresses:
+                with self.subTest(address=address, cursor=raw):
+                    cache.clear()
+                    response = self.author_client.get(
+                        address, {'cursor': cursor}
+                    )
+                    self.assertEqual(response.status_code, 200)
+
+
+class QueryCountViewsTest(TestCase):
+    """Feed and detail views run a fixed number of queries."""
+    POSTS_NUMBER = 6
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='username')
+        cls.group = Group.objects.create(
+            title='group',
+            slug='slug',
+            description='description',
+        )
+        cls.book = Book.objects.create(
+            title='book',
+            author_book='author',
+            description='description',
+        )
+        for i in range(cls.POSTS_NUMBER):
+            cls.post = Post.objects.create(
+                text=f'Test_post{i}',
+                group=cls.group,
+                book=cls.book,
+                author=User.objects.create_user(username=f'author{i}'),
+            )
+            Comment.objects.create(
+                text=f'comment{i}',
+                post=cls.post,
+                author=User.objects.create_user(username=f'commenter{i}'),
+            )
+
+    def test_query_count_does_not_depend_on_page_size(self):
+        """Related objects are joined, not fetched per row."""
+        expected_queries = {
+            reverse('posts:index'): 1,
+            reverse('posts:group_list', kwargs={'slug': 'slug'}): 2,
+            reverse('posts:book_list', kwargs={'book_id': self.book.id}): 3,
+            reverse('posts:profile', kwargs={'username': 'author0'}): 2,
+            reverse(
+                'posts:post_detail', kwargs={'post_id': self.post.id}
+            ): 3,
+        }
+        for page_size in (1, self.POSTS_NUMBER):
+            for address, queries in expected_queries.items():
+                with self.subTest(address=address, page_size=page_size):
+                    cache.clear()
+                    lookups.clear_local()
+                    trending.refresh()
+                    with mock.patch('posts.views.PAGES_NUMBER', page_size):
+                        with self.assertNumQueries(queries):
+                            self.client.get(address)
+
+
+class CommentPagesTest(TestCase):
+    COMMENTS_NUMBER = 25
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.post = Post.objects.create(author=cls.user, text='post')
+        for number in range(cls.COMMENTS_NUMBER):
+            Comment.objects.create(
+                text=f'comment {number}', post=cls.post, author=cls.user
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_post_page_shows_first_comments(self):
+        """Post page has one page of newest comments and a link."""
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        )
+        comments = response.context['comments']
+        self.assertEqual(len(comments), COMMENTS_PAGE_SIZE)
+        self.assertEqual(comments[0].text, 'comment 24')
+        self.assertContains(response, comments.next_cursor)
+
+    def test_fragment_has_next_comments(self):
+        """Comments endpoint continues after the cursor."""
+        first = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        )
+        response = self.client.get(
+            reverse('posts:comments', kwargs={'post_id': self.post.id}),
+            {'cursor': first.context['comments'].next_cursor},
+        )
+        self.assertTemplateUsed(response, 'includes/comments_page.html')
+        self.assertNotContains(response, '<html')
+        self.assertEqual(
+            [comment.text for comment in response.context['comments']],
+            [f'comment {number}' for number in range(4, -1, -1)]
+        )
+        self.assertFalse(response.context['comments'].has_next())
+
+    def test_json_comments(self):
+        """Comments are served as JSON with the next cursor."""
+        response = self.client.get(
+            reverse('posts:comments', kwargs={'post_id': self.post.id}),
+            {'format': 'json'},
+        )
+        data = response.json()
+        self.assertEqual(len(data['comments']), COMMENTS_PAGE_SIZE)
+        self.assertEqual(data['comments'][0]['author'], 'user')
+        self.assertIsNotNone(data['next_cursor'])
+
+    def test_comments_of_missing_post(self):
+        """Comments of a missing post are 404."""
+        response = self.client.get(
+            reverse('posts:comments', kwargs={'post_id': 0})
+        )
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,84 @@
+"""Thumbnails of uploaded images, generated in a background thread pool.
+
+Sizes come from settings.THUMBNAIL_SIZES. Url, width and height of
+every thumbnail are stored in the thumbnails field of the object,
+so templates never decode or resize an image during a request.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from sorl.thumbnail import get_thumbnail
+
+from . import cache
+from .models import Book, Post
+
+logger = logging.getLogger(__name__)
+
+IMAGE_FIELDS = {Post: 'image', Book: 'image_book'}
+
+
+@lru_cache(maxsize=None)
+def get_executor():
+    return ThreadPoolExecutor(
+        max_workers=settings.THUMBNAIL_WORKERS,
+        thread_name_prefix='thumbnails',
+    )
+
+
+def make_thumbnails(image):
+    thumbnails = {}
+    for name, (geometry, options) in settings.THUMBNAIL_SIZES.items():
+        thumbnail = get_thumbnail(image, geometry, **options)
+        thumbnails[name] = {
+            'url': thumbnail.url,
+            'width': thumbnail.width,
+            'height': thumbnail.height,
+        }
+    return thumbnails
+
+
+def invalidate(model, pk):
+    if model is Book:
+        cache.bump_versions(cache.BOOKS, cache.BOOK.format(book_id=pk))
+        return
+    row = Post.objects.filter(pk=pk).values_list(
+        'group__slug', 'book_id', 'author__username'
+    ).first()
+    if row is not None:
+        cache.bump_versions(*cache.post_scopes(*row, pk))
+
+
+def generate(model, pk):
+    """Make and store thumbnails of one object."""
+    instance = model.objects.filter(pk=pk).first()
+    image = getattr(instance, IMAGE_FIELDS[model], None)
+    if not image:
+        return
+    model.objects.filter(pk=pk).update(thumbnails=make_thumbnails(image))
+    invalidate(model, pk)
+
+
+def generate_in_worker(model, pk):
+    close_old_connections()
+    try:
+        generate(model, pk)
+    except Exception:
+        logger.exception('Thumbnails of %s %s failed', model.__name__, pk)
+    finally:
+        close_old_connections()
+
+
+def schedule(instance):
+    """Generate thumbnails once the upload is committed."""
+    model, pk = type(instance), instance.pk
+
+    def submit():
+        if settings.THUMBNAIL_ASYNC:
+            get_executor().submit(generate_in_worker, model, pk)
+        else:
+            generate(model, pk)
+
+    transaction.on_commit(submit)
@@ -0,0 +1,180 @@
+"""Follow feed: a timeline per user filled when a post is written.
+
+Posts of authors with more than FOLLOW_FANOUT_LIMIT followers
+are not copied to the timelines, they are merged in at read time.
+When such an author drops back to the limit, the posts are copied.
+"""
+import heapq
+
+from django.conf import settings
+from django.db import connection, transaction
+from users.models import Profile
+
+from .models import Follow, Post, TimelineEntry
+from .pagination import CursorPaginator
+
+BATCH_SIZE = 1000
+
+
+def follower_count(author_id):
+    return Profile.objects.filter(
+        user_id=author_id
+    ).values_list('follower_count', flat=True).first() or 0
+
+
+def is_fanned_out(author_id):
+    return follower_count(author_id) <= settings.FOLLOW_FANOUT_LIMIT
+
+
+def add_entries(user_ids, posts):
+    """Put (post_id, pub_date) of posts to the timelines of user_ids."""
+    entries = [
+        TimelineEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+        for user_id in user_ids
+        for post_id, pub_date in posts
+    ]
+    TimelineEntry.objects.bulk_create(
+        entries, batch_size=BATCH_SIZE, ignore_conflicts=True
+    )
+
+
+def fan_out(post):
+    """Copy a new post to the timelines of the followers of its author."""
+    if not is_fanned_out(post.author_id):
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    batch = []
+    for user_id in followers.iterator(chunk_size=BATCH_SIZE):
+        batch.append(user_id)
+        if len(batch) == BATCH_SIZE:
+            add_entries(batch, [(post.pk, post.pub_date)])
+            batch = []
+    add_entries(batch, [(post.pk, post.pub_date)])
+
+
+def backfill(follow):
+    """Copy posts of a newly followed author to the follower timeline."""
+    if not is_fanned_out(follow.author_id):
+        return
+    posts = Post.objects.filter(
+        author_id=follow.author_id
+    ).values_list('pk', 'pub_date')
+    batch = []
+    for post in posts.iterator(chunk_size=BATCH_SIZE):
+        batch.append(post)
+        if len(batch) == BATCH_SIZE:
+            add_entries([follow.user_id], batch)
+            batch = []
+    add_entries([follow.user_id], batch)
+
+
+def remove_author(follow):
+    TimelineEntry.objects.filter(
+        user_id=follow.user_id, post__author_id=follow.author_id
+    ).delete()
+    if follower_count(follow.author_id) == settings.FOLLOW_FANOUT_LIMIT:
+        # The author dropped to the limit: posts that were merged in
+        # at read time are copied to the timelines from now on.
+        fan_out_author(follow.author_id)
+
+
+def fan_out_author(author_id):
+    """Copy all posts of author to the timelines of the followers."""
+    quote = connection.ops.quote_name
+    timeline = quote(TimelineEntry._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {timeline} (user_id, post_id, pub_date) '
+            f'SELECT follow.user_id, post.id, post.pub_date '
+            f'FROM {quote(Follow._meta.db_table)} follow '
+            f'JOIN {quote(Post._meta.db_table)} post '
+            f'ON post.author_id = follow.author_id '
+            f'WHERE follow.author_id = %s AND NOT EXISTS ('
+            f'SELECT 1 FROM {timeline} entry '
+            f'WHERE entry.user_id = follow.user_id '
+            f'AND entry.post_id = post.id)',
+            [author_id]
+        )
+        return cursor.rowcount
+
+
+def rebuild():
+    """Fill every timeline from scratch in one statement."""
+    quote = connection.ops.quote_name
+    with transaction.atomic(), connection.cursor() as cursor:
+        TimelineEntry.objects.all().delete()
+        cursor.execute(
+            f'INSERT INTO {quote(TimelineEntry._meta.db_table)} '
+            f'(user_id, post_id, pub_date) '
+            f'SELECT follow.user_id, post.id, post.pub_date '
+            f'FROM {quote(Follow._meta.db_table)} follow '
+            f'JOIN {quote(Profile._meta.db_table)} profile '
+            f'ON profile.user_id = follow.author_id '
+            f'JOIN {quote(Post._meta.db_table)} post '
+            f'ON post.author_id = follow.author_id '
+            f'WHERE profile.follower_count <= %s',
+            [settings.FOLLOW_FANOUT_LIMIT]
+        )
+        return cursor.rowcount
+
+
+def refill_posts(post_ids):
+    """Put posts to the timelines again, e.g. after an import."""
+    quote = connection.ops.quote_name
+    placeholders = ', '.join(['%s'] * len(post_ids))
+    with transaction.atomic(), connection.cursor() as cursor:
+        TimelineEntry.objects.filter(post_id__in=post_ids).delete()
+        cursor.execute(
+            f'INSERT INTO {quote(TimelineEntry._meta.db_table)} '
+            f'(user_id, post_id, pub_date) '
+            f'SELECT follow.user_id, post.id, post.pub_date '
+            f'FROM {quote(Follow._meta.db_table)} follow '
+            f'JOIN {quote(Profile._meta.db_table)} profile '
+            f'ON profile.user_id = follow.author_id '
+            f'JOIN {quote(Post._meta.db_table)} post '
+            f'ON post.author_id = follow.author_id '
+            f'WHERE profile.follower_count <= %s '
+            f'AND post.id IN ({placeholders})',
+            [settings.FOLLOW_FANOUT_LIMIT, *post_ids]
+        )
+        return cursor.rowcount
+
+
+class TimelinePaginator(CursorPaginator):
+    """Cursor pages of the follow feed of user.
+
+    A page is one range scan of the user timeline merged with
+    a range scan of posts of followed authors with too many followers.
+    """
+
+    def __init__(self, user, per_page):
+        super().__init__(Post.objects.feed(), per_page)
+        self.user = user
+
+    def fetch(self, values=None, backwards=False):
+        limit = self.per_page + 1
+        entries = CursorPaginator(
+            TimelineEntry.objects.filter(user=self.user),
+            self.per_page,
+            keys=('pub_date', 'post_id'),
+        ).page_queryset(values, backwards).values_list('pub_date', 'post_id')
+        streams = [entries]
+        celebrities = list(Follow.objects.filter(
+            user=self.user,
+            author__profile__follower_count__gt=settings.FOLLOW_FANOUT_LIMIT,
+        ).values_list('author_id', flat=True))
+        if celebrities:
+            streams.append(CursorPaginator(
+                Post.objects.filter(author_id__in=celebrities),
+                self.per_page,
+            ).page_queryset(values, backwards).values_list('pub_date', 'id'))
+        keys = []
+        for key in heapq.merge(*streams, reverse=not backwards):
+            if not keys or keys[-1] != key:
+                keys.append(key)
+            if len(keys) == limit:
+                break
+        posts = self.queryset.in_bulk([post_id for _, post_id in keys])
+        return [posts[post_id] for _, post_id in keys if post_id in posts]
@@ -0,0 +1,354 @@
+"""Import and export of books, posts and comments.
+
+Rows are JSON Lines or CSV with natural keys instead of foreign keys:
+author username, group slug, book title and post id. Imports are
+written with bulk_create and bulk_update in batches, one transaction
+per batch; derived data of the imported rows is updated at the end.
+"""
+import csv
+import json
+
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import cache, counters, search, timeline, trending
+from .models import Book, Comment, Group, Post, User
+from .seed import batches, manual_dates
+
+BATCH_SIZE = 1000
+FORMATS = ('jsonl', 'csv')
+MODELS = {'books': Book, 'posts': Post, 'comments': Comment}
+# Columns of every model. Books are matched by title,
+# posts and comments by id, when the row has one.
+COLUMNS = {
+    Book: ('title', 'author_book', 'description', 'image_book'),
+    Post: ('id', 'text', 'pub_date', 'author', 'group', 'book', 'image'),
+    Comment: ('id', 'text', 'created', 'author', 'post'),
+}
+# Column -> lookup of the natural key.
+RELATED = {
+    'author': 'author__username',
+    'group': 'group__slug',
+    'book': 'book__title',
+    'post': 'post_id',
+}
+DATE_FIELDS = {Post: 'pub_date', Comment: 'created'}
+
+
+class TransferError(ValueError):
+    pass
+
+
+def export_rows(model, batch_size=BATCH_SIZE):
+    """Rows of model as dicts, streamed from the database."""
+    columns = COLUMNS[model]
+    rows = model.objects.order_by('pk').values_list(
+        *[RELATED.get(column, column) for column in columns]
+    )
+    for values in rows.iterator(chunk_size=batch_size):
+        yield dict(zip(columns, values))
+
+
+def write_rows(rows, file, file_format, columns):
+    """Write rows to file, return their number."""
+    total = 0
+    if file_format == 'csv':
+        writer = csv.DictWriter(file, columns, lineterminator='\n')
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            total += 1
+        return total
+    for row in rows:
+        file.write(json.dumps(row, cls=DjangoJSONEncoder) + '\n')
+        total += 1
+    return total
+
+
+def read_rows(file, file_format):
+    if file_format == 'csv':
+        yield from csv.DictReader(file)
+        return
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+class Lookup:
+    """Natural key -> primary key, loaded for a batch at a time."""
+
+    def __init__(self, model, field):
+        self.model = model
+        self.field = field
+        self.pks = {}
+
+    def load(self, keys):
+        missing = {key for key in keys if key not in (None, '')} - set(
+            self.pks
+        )
+        if not missing:
+            return
+        found = self.model.objects.filter(
+            **{f'{self.field}__in': missing}
+        ).order_by('-pk').values_list(self.field, 'pk')
+        # The oldest row wins when keys are not unique (book titles).
+        for key, pk in found:
+            self.pks[str(key)] = pk
+
+    def get(self, key, number):
+        if key in (None, ''):
+            return None
+        try:
+            return self.pks[str(key)]
+        except KeyError:
+            raise TransferError(
+                f'Row {number}: unknown {self.model.__name__} {key!r}.'
+            )
+
+
+class Importer:
+    """Writes rows of one model in batches."""
+
+    def __init__(self, model, batch_size=BATCH_SIZE):
+        self.model = model
+        self.batch_size = batch_size
+        self.lookups = {
+            'author': Lookup(User, 'username'),
+            'group': Lookup(Group, 'slug'),
+            'book': Lookup(Book, 'title'),
+            'post': Lookup(Post, 'pk'),
+        }
+        self.scopes = {cache.FEED}
+        # Imported pks and pks of the rows they point to, before and
+        # after the import: their counters are recomputed at the end.
+        self.pks = set()
+        self.parents = {User: set(), Group: set(), Book: set(), Post: set()}
+        # Rows created with their own ids, see reset_sequence().
+        self.explicit_pks = False
+        self.created = 0
+        self.updated = 0
+
+    def run(self, rows):
+        try:
+            for batch in batches(enumerate(rows, 1), self.batch_size):
+                self.import_batch(batch)
+        finally:
+            # Batches written before an error stay, keep them consistent.
+            self.finish()
+
+    def import_batch(self, batch):
+        columns = set().union(*(row for _, row in batch))
+        if self.model is Book:
+            self.lookups['book'].load(row.get('title') for _, row in batch)
+        for column, lookup in self.lookups.items():
+            if column in columns and column in COLUMNS[self.model]:
+                lookup.load(row.get(column) for _, row in batch)
+        objects = [self.build(number, row) for number, row in batch]
+        old = self.existing(objects)
+        if old and self.parent_fields():
+            # Rows moved away from their old parents change them too.
+            self.add_parents(
+                self.model.objects.filter(pk__in=list(old)).values_list(
+                    *self.parent_fields()
+                )
+            )
+        fields = [
+            self.model._meta.get_field(column).name
+            for column in COLUMNS[self.model]
+            if column in columns and column != 'id'
+        ]
+        new = [obj for obj in objects if obj.pk not in old]
+        changed = [obj for obj in objects if obj.pk in old]
+        date_field = DATE_FIELDS.get(self.model)
+        if date_field:
+            for obj in new:
+                if getattr(obj, date_field) is None:
+                    setattr(obj, date_field, timezone.now())
+        date_fields = [
+            self.model._meta.get_field(date_field)
+        ] if date_field else []
+        self.explicit_pks |= any(obj.pk is not None for obj in new)
+        with manual_dates(*date_fields), transaction.atomic():
+            self.model.objects.bulk_create(new, batch_size=self.batch_size)
+            self.update(changed, fields)
+        if self.model is Book:
+            for book in new:
+                self.lookups['book'].pks.setdefault(book.title, book.pk)
+        self.created += len(new)
+        self.updated += len(changed)
+        self.pks.update(obj.pk for obj in objects)
+        self.add_parents(
+            [getattr(obj, field) for field in self.parent_fields()]
+            for obj in objects
+        )
+        self.add_scopes(batch, objects, old)
+
+    def build(self, number, row):
+        unknown = set(row) - set(COLUMNS[self.model])
+        if unknown:
+            raise TransferError(
+                f'Row {number}: unknown columns {", ".join(sorted(unknown))}.'
+            )
+        values = {}
+        for column, value in row.items():
+            if column in RELATED:
+                values[f'{column}_id'] = self.lookups[column].get(
+                    value, number
+                )
+            elif column == 'id':
+                values['pk'] = int(value) if value not in (None, '') else None
+            elif column == DATE_FIELDS.get(self.model):
+                values[column] = self.parse_date(value, number)
+            else:
+                values[column] = value if value is not None else ''
+        if self.model is Book:
+            values['pk'] = self.lookups['book'].pks.get(row.get('title'))
+        if 'author_id' in values and values['author_id'] is None:
+            raise TransferError(f'Row {number}: author is required.')
+        return self.model(**values)
+
+    def update(self, objects, fields):
+        """bulk_update objects, rows without a date keep the stored one."""
+        date_field = DATE_FIELDS.get(self.model)
+        dated, undated = [], []
+        for obj in objects:
+            if date_field and getattr(obj, date_field) is None:
+                undated.append(obj)
+            else:
+                dated.append(obj)
+        for group, group_fields in (
+            (dated, fields),
+            (undated, [field for field in fields if field != date_field]),
+        ):
+            if group and group_fields:
+                self.model.objects.bulk_update(
+                    group, group_fields, batch_size=self.batch_size
+                )
+
+    def parse_date(self, value, number):
+        if value in (None, ''):
+            return None
+        date = parse_datetime(value)
+        if date is None:
+            raise TransferError(f'Row {number}: bad date {value!r}.')
+        if timezone.is_naive(date):
+            return timezone.make_aware(date)
+        return date
+
+    def existing(self, objects):
+        """Stored versions of objects: pk -> scopes of their pages."""
+        pks = [obj.pk for obj in objects if obj.pk is not None]
+        if not pks:
+            return {}
+        if self.model is Post:
+            return {
+                pk: cache.post_scopes(slug, book_id, username, pk)
+                for pk, slug, book_id, username in Post.objects.filter(
+                    pk__in=pks
+                ).values_list(
+                    'pk', 'group__slug', 'book_id', 'author__username'
+                )
+            }
+        if self.model is Comment:
+            return {
+                pk: [cache.POST.format(post_id=post_id)]
+                for pk, post_id in Comment.objects.filter(
+                    pk__in=pks
+                ).values_list('pk', 'post_id')
+            }
+        return {
+            pk: [cache.BOOKS, cache.BOOK.format(book_id=pk)]
+            for pk in Book.objects.filter(pk__in=pks).values_list(
+                'pk', flat=True
+            )
+        }
+
+    def add_scopes(self, batch, objects, old):
+        """Pages to invalidate: the old and the new places of rows."""
+        for scopes in old.values():
+            self.scopes.update(scopes)
+        for (_, row), obj in zip(batch, objects):
+            if self.model is Post:
+                self.scopes.update(cache.post_scopes(
+                    row.get('group') or None, obj.book_id,
+                    row.get('author'), obj.pk
+                ))
+            elif self.model is Comment:
+                self.scopes.add(cache.POST.format(post_id=obj.post_id))
+            else:
+                self.scopes.update(
+                    [cache.BOOKS, cache.BOOK.format(book_id=obj.pk)]
+                )
+
+    def parent_fields(self):
+        return [
+            f'{column}_id' for column in RELATED
+            if column in COLUMNS[self.model]
+        ]
+
+    def add_parents(self, rows):
+        """Remember the pks of parent_fields() rows."""
+        models = [
+            self.model._meta.get_field(field).related_model
+            for field in self.parent_fields()
+        ]
+        for row in rows:
+            for model, pk in zip(models, row):
+                if pk is not None:
+                    self.parents[model].add(pk)
+
+    def finish(self):
+        """Update what signals keep up to date on normal writes,
+        for the imported rows and the rows they point to.
+        """
+        if self.explicit_pks:
+            self.reset_sequence()
+        for model, pks in self.parents.items():
+            for batch in batches(pks, self.batch_size):
+                counters.recount({model: batch})
+        for batch in batches(self.pks, self.batch_size):
+            if self.model is Post:
+                timeline.refill_posts(batch)
+            search.index_objects(self.model, batch)
+        if self.model is not Book:
+            for kind, pks in self.trend_parents().items():
+                for batch in batches(pks, self.batch_size):
+                    trending.recompute(kind, batch)
+            trending.refresh()
+        cache.bump_versions(*self.scopes)
+
+    def reset_sequence(self):
+        """Move the pk sequence past the imported ids: PostgreSQL
+        doesn't advance it for explicit ids and would reuse them.
+        """
+        statements = connection.ops.sequence_reset_sql(
+            no_style(), [self.model]
+        )
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+    def trend_parents(self):
+        """Groups and books whose trend scores the import changed."""
+        groups = set(self.parents[Group])
+        books = set(self.parents[Book])
+        for batch in batches(self.parents[Post], self.batch_size):
+            for group_id, book_id in Post.objects.filter(
+                pk__in=batch
+            ).values_list('group_id', 'book_id'):
+                groups.add(group_id)
+                books.add(book_id)
+        return {
+            trending.GROUPS: groups - {None},
+            trending.BOOKS: books - {None},
+        }
+
+
+def import_rows(model, rows, batch_size=BATCH_SIZE):
+    """Import rows, return the numbers of created and updated objects."""
+    importer = Importer(model, batch_size)
+    importer.run(rows)
+    return importer.created, importer.updated
@@ -0,0 +1,222 @@
+"""Trending books and groups: time-decayed activity scores.
+
+A post adds POST_WEIGHT to its book and group, a comment
+COMMENT_WEIGHT, and the contribution halves every
+TRENDING_HALF_LIFE hours. Scores aren't decayed on every event:
+an event at time t adds weight * exp((t - epoch) / tau), so newer
+events weigh more and the order of the stored scores is the order
+of the decayed ones. python manage.py trending moves the epoch to
+now and scales the scores down, so they stay small.
+
+The top books and groups are kept in the cache, a page reads them
+with one cache lookup (posts/templatetags/trending.py).
+"""
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Subquery, Value
+from django.db.models.functions import Coalesce, Exp
+
+from .cache import FEED, bump_versions
+from .models import Book, Comment, Group, Post, TrendEpoch
+
+POST_WEIGHT = 1.0
+COMMENT_WEIGHT = 0.5
+# Scores decayed below this are set to zero by rebase().
+MIN_SCORE = 1e-3
+TOP_KEY = 'posts:trending:{}'
+
+BOOKS = 'books'
+GROUPS = 'groups'
+MODELS = {BOOKS: Book, GROUPS: Group}
+TOP_FIELDS = {
+    BOOKS: ('pk', 'title', 'author_book'),
+    GROUPS: ('slug', 'title'),
+}
+POST_FIELDS = {BOOKS: 'book', GROUPS: 'group'}
+
+
+def tau():
+    """Seconds in which a contribution falls e times."""
+    return settings.TRENDING_HALF_LIFE * 3600 / math.log(2)
+
+
+def get_epoch():
+    epoch = TrendEpoch.objects.values_list('epoch', flat=True).first()
+    if epoch is None:
+        return TrendEpoch.objects.create(pk=1, epoch=time.time()).epoch
+    return epoch
+
+
+def boost(timestamp, weight):
+    """Contribution of an event at timestamp, in the database.
+
+    The epoch is read in the same statement: an update racing
+    with rebase() is scaled with the epoch it is stored against.
+    The epoch row is created by migration 0008; without it
+    the event time is the epoch.
+    """
+    epoch = Coalesce(
+        Subquery(TrendEpoch.objects.filter(pk=1).values('epoch')),
+        Value(timestamp),
+    )
+    return Value(weight) * Exp((Value(timestamp) - epoch) / Value(tau()))
+
+
+def add(timestamp, weight, group_id=None, book_id=None):
+    """Add weight of an event to a group and a book.
+
+    A negative weight takes back an event of a deleted post or comment.
+    """
+    for model, pk in ((Group, group_id), (Book, book_id)):
+        if pk is not None:
+            model.objects.filter(pk=pk).update(
+                trend_score=F('trend_score') + boost(timestamp, weight)
+            )
+
+
+def add_post(post, sign=1):
+    add(
+        post.pub_date.timestamp(), sign * POST_WEIGHT,
+        post.group_id, post.book_id,
+    )
+
+
+def move_post(post, old_group_id, old_book_id):
+    """Move the contribution of an edited post to its new group and book.
+    """
+    timestamp = post.pub_date.timestamp()
+    if old_group_id != post.group_id:
+        add(timestamp, -POST_WEIGHT, group_id=old_group_id)
+        add(timestamp, POST_WEIGHT, group_id=post.group_id)
+    if old_book_id != post.book_id:
+        add(timestamp, -POST_WEIGHT, book_id=old_book_id)
+        add(timestamp, POST_WEIGHT, book_id=post.book_id)
+
+
+def add_comment(comment, sign=1):
+    """Comments count for the group and book of their post."""
+    if comment.post_id is None:
+        return
+    change = boost(comment.created.timestamp(), sign * COMMENT_WEIGHT)
+    for model in (Group, Book):
+        model.objects.filter(posts=comment.post_id).update(
+            trend_score=F('trend_score') + change
+        )
+
+
+def rebase():
+    """Move the epoch to now and scale the scores to it."""
+    with transaction.atomic():
+        now = time.time()
+        factor = math.exp((get_epoch() - now) / tau())
+        for model in MODELS.values():
+            model.objects.exclude(trend_score=0).update(
+                trend_score=F('trend_score') * factor
+            )
+            model.objects.filter(trend_score__lt=MIN_SCORE).exclude(
+                trend_score=0
+            ).update(trend_score=0)
+        TrendEpoch.objects.filter(pk=1).update(epoch=now)
+
+
+def add_up(scores, rows, weight, epoch):
+    """Decayed weights of (group_id, book_id, created) rows by id."""
+    for group_id, book_id, created in rows:
+        score = weight * math.exp((created.timestamp() - epoch) / tau())
+        for kind, pk in ((GROUPS, group_id), (BOOKS, book_id)):
+            if pk is not None:
+                scores[kind][pk] = scores[kind].get(pk, 0) + score
+
+
+def compute_scores(epoch, posts, comments):
+    """Scores by kind and id of the posts and comments querysets."""
+    scores = {BOOKS: {}, GROUPS: {}}
+    add_up(
+        scores,
+        posts.values_list(
+            'group_id', 'book_id', 'pub_date'
+        ).order_by().iterator(),
+        POST_WEIGHT, epoch,
+    )
+    add_up(
+        scores,
+        comments.filter(post__isnull=False).values_list(
+            'post__group_id', 'post__book_id', 'created'
+        ).order_by().iterator(),
+        COMMENT_WEIGHT, epoch,
+    )
+    return scores
+
+
+def store_scores(rows, scores):
+    """Set the scores of rows, zero for the ones not in scores."""
+    rows.update(trend_score=0)
+    rows.model.objects.bulk_update(
+        [rows.model(pk=pk, trend_score=score) for pk, score in scores.items()],
+        ['trend_score'],
+        batch_size=500,
+    )
+
+
+def rebuild():
+    """Recompute the scores from all posts and comments."""
+    with transaction.atomic():
+        now = time.time()
+        TrendEpoch.objects.update_or_create(pk=1, defaults={'epoch': now})
+        scores = compute_scores(
+            now, Post.objects.all(), Comment.objects.all()
+        )
+        for kind, model in MODELS.items():
+            store_scores(model.objects.all(), scores[kind])
+
+
+def recompute(kind, pks):
+    """Recompute the scores of some books or groups, e.g. after an import.
+    """
+    field = POST_FIELDS[kind]
+    with transaction.atomic():
+        scores = compute_scores(
+            get_epoch(),
+            Post.objects.filter(**{f'{field}__in': pks}),
+            Comment.objects.filter(**{f'post__{field}__in': pks}),
+        )
+        store_scores(MODELS[kind].objects.filter(pk__in=pks), scores[kind])
+
+
+def compute_top(kind):
+    return list(
+        MODELS[kind].objects.filter(trend_score__gt=0)
+        .order_by('-trend_score', 'pk')
+        .values(*TOP_FIELDS[kind])[:settings.TRENDING_SIZE]
+    )
+
+
+def refresh():
+    """Store the top books and groups in the cache.
+
+    The feed shows them, its cached pages are dropped.
+    """
+    cache.set_many(
+        {TOP_KEY.format(kind): compute_top(kind) for kind in MODELS},
+        settings.TRENDING_CACHE_TIMEOUT,
+    )
+    bump_versions(FEED)
+
+
+def top(kind):
+    """Top TRENDING_SIZE books or groups as dicts of TOP_FIELDS."""
+    key = TOP_KEY.format(kind)
+    rows = cache.get(key)
+    if rows is None:
+        rows = compute_top(kind)
+        cache.set(key, rows, settings.TRENDING_CACHE_TIMEOUT)
+    return rows
+
+
+def forget_top(kind):
+    """Drop a top list, e.g. after a title changed."""
+    cache.delete(TOP_KEY.format(kind))
@@ -1,13 +1,22 @@
 """Views for app posts.
 """
+from core.sqlite import retry_on_locked
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 
+from . import cache, lookups, related, search, thumbnails
 from .forms import BookForm, CommentForm, PostForm
-from .models import Book, Group, Post, User
+from .models import Book, Comment, Follow, Post
+from .pagination import CursorPaginator
+from .timeline import TimelinePaginator
 
 PAGES_NUMBER = 2
+SEARCH_PAGE_SIZE = 10
+# Deeper pages are clamped, the offset must fit a database integer.
+MAX_SEARCH_PAGE = 1000
+COMMENTS_PAGE_SIZE = 20
 
 
 def user_author(request, author):
@@ -20,26 +29,56 @@ def is_user_author(request, author):
     return request.user != author
 
 
+@retry_on_locked
+def save_form(form, **fields):
+    """Save the object of a valid form with fields set."""
+    obj = form.save(commit=False)
+    for name, value in fields.items():
+        setattr(obj, name, value)
+    obj.save()
+    form.save_m2m()
+    return obj
+
+
 def paginator(request, posts, pages_numder):
     paginator = Paginator(posts, pages_numder)
     page_number = request.GET.get('page')
     return paginator.get_page(page_number)
 
 
+def feed_paginator(request, posts, pages_numder):
+    """Cursor page of a post feed ordered by (pub_date, id)."""
+    paginator = CursorPaginator(posts, pages_numder)
+    return paginator.get_page(request.GET.get('cursor'))
+
+
+def comments_paginator(post_id):
+    """Newest comments first, by the index on (post, created, id)."""
+    return CursorPaginator(
+        Comment.objects.with_author().filter(post_id=post_id),
+        COMMENTS_PAGE_SIZE,
+        keys=('created', 'id'),
+    )
+
+
+@cache.conditional_page(cache.FEED, cache.AUTHORS)
+@cache.cache_anonymous_page(cache.FEED, cache.AUTHORS)
 def index(request):
     """Main page with list of posts.
     """
     template = 'posts/index.html'
     title = 'Last changes.'
-    posts = Post.objects.all()
-    page_obj = paginator(request, posts, PAGES_NUMBER)
+    posts = Post.objects.feed()
+    page_obj = feed_paginator(request, posts, PAGES_NUMBER)
     context = {
         'title': title,
         'page_obj': page_obj,
+        'index': True,
     }
     return render(request, template, context)
 
 
+@cache.cache_anonymous_page(cache.BOOKS)
 def books(request):
     """Page with list of all sbooks.
     """
@@ -55,14 +94,16 @@ def books(request):
 
 
 # Group page
+@cache.conditional_page(cache.GROUP, cache.AUTHORS)
+@cache.cache_anonymous_page(cache.GROUP, cache.AUTHORS)
 def group_posts(request, slug):
     """Group page.
     """
     template = 'posts/group_list.html'
-    title = f'Записи сообщества {get_object_or_404(Group, slug=slug)}'
-    group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    page_obj = paginator(request, posts, PAGES_NUMBER)
+    group = lookups.GROUPS.get_or_404(slug)
+    title = f'Записи сообщества {group}'
+    posts = group.posts.feed()
+    page_obj = feed_paginator(request, posts, PAGES_NUMBER)
     context = {
         'title': title,
         'group': group,
@@ -71,18 +112,21 @@ def group_posts(request, slug):
     return render(request, template, context)
 
 
+@cache.conditional_page(cache.BOOK, cache.RELATED, cache.AUTHORS)
+@cache.cache_anonymous_page(cache.BOOK, cache.RELATED, cache.AUTHORS)
 def book_posts(request, book_id):
     """Book page with posts about this book.
     """
     template = 'posts/book_list.html'
-    title = f'Posts about {get_object_or_404(Book, pk=book_id)}'
-    book = get_object_or_404(Book, pk=book_id)
-    posts = book.posts.all()
-    page_obj = paginator(request, posts, PAGES_NUMBER)
+    book = lookups.BOOKS.get_or_404(book_id)
+    title = f'Posts about {book}'
+    posts = book.posts.feed()
+    page_obj = feed_paginator(request, posts, PAGES_NUMBER)
     context = {
         'title': title,
         'book': book,
         'page_obj': page_obj,
+        'related_books': list(related.for_book(book.pk)),
     }
     return render(request, template, context)
 
@@ -90,39 +134,103 @@ def book_posts(request, book_id):
 def profile(request, username):
     """Author page with his posts.
     """
-    title = (
-        f'Author '
-        f'{get_object_or_404(User, username=username)}'
-    )
-    author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
+    author = lookups.USERS.get_or_404(username)
+    title = f'Author {author}'
+    posts = author.posts.feed()
     author_equel_user = user_author(request, author)
-    page_obj = paginator(request, posts, PAGES_NUMBER)
+    page_obj = feed_paginator(request, posts, PAGES_NUMBER)
+    following = request.user.is_authenticated and Follow.objects.filter(
+        user=request.user, author=author
+    ).exists()
     context = {
         'title': title,
         'author': author,
-        'num_post_list': posts.count,
+        'num_post_list': author.profile.post_count,
         'page_obj': page_obj,
-        'author_equel_user': author_equel_user
+        'author_equel_user': author_equel_user,
+        'following': following,
     }
     return render(request, 'posts/profile.html', context)
 
 
+@cache.conditional_page(
+    cache.POST, cache.CATALOG, cache.RELATED, cache.AUTHORS
+)
 def post_detail(request, post_id):
     """Post detail page."""
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(Post.objects.feed(), pk=post_id)
     author_equel_user = user_author(request, post.author)
     form = CommentForm()
-    comments = post.comments.all()
+    comments = comments_paginator(post_id).get_page(
+        request.GET.get('cursor')
+    )
     context = {
         'post': post,
+        'post_id': post.pk,
         'author_equel_user': author_equel_user,
         'form': form,
         'comments': comments,
+        'related_posts': list(related.for_post(post.pk)),
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+@cache.conditional_page(cache.POST, cache.AUTHORS)
+@cache.cache_anonymous_page(cache.POST, cache.AUTHORS)
+def comments(request, post_id):
+    """Next page of comments of a post: HTML fragment,
+    or JSON with ?format=json.
+    """
+    page_obj = comments_paginator(post_id).get_page(
+        request.GET.get('cursor')
+    )
+    if not page_obj and not Post.objects.filter(pk=post_id).exists():
+        raise Http404('No Post found.')
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'comments': [
+                {
+                    'id': comment.pk,
+                    'author': comment.author.username,
+                    'text': comment.text,
+                    'created': comment.created,
+                }
+                for comment in page_obj
+            ],
+            'next_cursor': page_obj.next_cursor,
+        })
+    context = {
+        'comments': page_obj,
+        'post_id': post_id,
+    }
+    return render(request, 'includes/comments_page.html', context)
+
+
+def search_results(request):
+    """Search in posts, books and comments.
+    """
+    query = request.GET.get('q', '').strip()
+    try:
+        page_number = min(
+            max(int(request.GET.get('page', 1)), 1), MAX_SEARCH_PAGE
+        )
+    except ValueError:
+        page_number = 1
+    found = search.search(
+        query,
+        SEARCH_PAGE_SIZE + 1,
+        (page_number - 1) * SEARCH_PAGE_SIZE
+    )
+    context = {
+        'title': f'Search: {query}',
+        'query': query,
+        'results': search.load(found[:SEARCH_PAGE_SIZE]),
+        'page_number': page_number,
+        'has_next': len(found) > SEARCH_PAGE_SIZE,
+    }
+    return render(request, 'posts/search.html', context)
+
+
 @login_required
 def post_create(request):
     """Post create page.
@@ -130,9 +238,9 @@ def post_create(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
     if not form.is_valid():
         return render(request, 'posts/post_create.html', {'form': form})
-    post = form.save(commit=False)
-    post.author = request.user
-    post.save()
+    post = save_form(form, author=request.user)
+    if post.image:
+        thumbnails.schedule(post)
     return redirect('posts:profile', post.author.username)
 
 
@@ -143,9 +251,9 @@ def book_create(request):
     form = BookForm(request.POST or None, files=request.FILES or None)
     if not form.is_valid():
         return render(request, 'posts/book_create.html', {'form': form})
-    book = form.save(commit=False)
-    book.author = request.user
-    book.save()
+    book = save_form(form, author=request.user)
+    if book.image_book:
+        thumbnails.schedule(book)
     return redirect('posts:profile', book.author.username)
 
 
@@ -162,7 +270,12 @@ def post_edit(request, post_id):
         return render(
             request, 'posts/post_create.html', {'form': form, 'is_edit': True}
         )
-    form.save()
+    image_changed = 'image' in form.changed_data
+    if image_changed:
+        post.thumbnails = {}
+    save_form(form)
+    if image_changed and post.image:
+        thumbnails.schedule(post)
     return redirect('posts:post_detail', post.pk)
 
 
@@ -178,7 +291,12 @@ def book_edit(request, book_id):
         return render(
             request, 'posts/book_create.html', {'form': form, 'is_edit': True}
         )
-    form.save()
+    image_changed = 'image_book' in form.changed_data
+    if image_changed:
+        book.thumbnails = {}
+    save_form(form)
+    if image_changed and book.image_book:
+        thumbnails.schedule(book)
     return redirect('posts:profile', request.user.username)
 
 
@@ -188,8 +306,39 @@ def add_comment(request, post_id):
     post = get_object_or_404(Post, id=post_id)
     form = CommentForm(request.POST or None)
     if form.is_valid():
-        comment = form.save(commit=False)
-        comment.author = request.user
-        comment.post = post
-        comment.save()
+        save_form(form, author=request.user, post=post)
     return redirect('posts:post_detail', post_id=post_id)
+
+
+@login_required
+def follow_index(request):
+    """Posts of the authors the user follows.
+    """
+    paginator = TimelinePaginator(request.user, PAGES_NUMBER)
+    page_obj = paginator.get_page(request.GET.get('cursor'))
+    context = {
+        'page_obj': page_obj,
+        'follow': True,
+    }
+    return render(request, 'posts/follow.html', context)
+
+
+@login_required
+@retry_on_locked
+def profile_follow(request, username):
+    """Follow the author."""
+    author = lookups.USERS.get_or_404(username)
+    if request.user != author:
+        Follow.objects.get_or_create(user=request.user, author=author)
+    return redirect('posts:profile', username=username)
+
+
+@login_required
+@retry_on_locked
+def profile_unfollow(request, username):
+    """Unfollow the author."""
+    author = lookups.USERS.get_or_404(username)
+    follow = Follow.objects.filter(user=request.user, author=author).first()
+    if follow is not None:
+        follow.delete()
+    return redirect('posts:profile', username=username)
@@ -9,8 +9,15 @@ https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 
 import os
 
+from django.conf import settings
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'thebook.settings')
+# Serve the async read-only views, see thebook/async_urls.py.
+os.environ.setdefault('ASYNC_VIEWS', 'True')
 
 application = get_asgi_application()
+
+if settings.STATIC_PIPELINE:
+    from core.static import StaticFilesASGI
+    application = StaticFilesASGI(application)
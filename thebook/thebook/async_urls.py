@@ -0,0 +1,14 @@
+"""
+URL configuration of ASGI: thebook/urls.py with the async
+read-only views of app posts.
+"""
+from django.urls import include, path
+
+from .urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    path('', include('posts.async_urls', namespace='posts')),
+] + [
+    pattern for pattern in sync_urlpatterns
+    if getattr(pattern, 'namespace', None) != 'posts'
+]
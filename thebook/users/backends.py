@@ -0,0 +1,35 @@
+"""Authentication backend with the users of sessions in the cache.
+"""
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+USER_KEY = 'users:user:{}'
+
+
+def user_key(user_id):
+    return USER_KEY.format(user_id)
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend that keeps the user of a session in the cache,
+    so authenticated requests don't read auth_user.
+
+    The cached user is dropped when it is saved or deleted
+    (users.signals). Changes made with QuerySet.update() go unseen
+    for up to settings.AUTH_USER_CACHE_TIMEOUT, a new password
+    set that way doesn't end the other sessions until then.
+    Users are cached only with settings.AUTH_USER_CACHE, on by
+    default for caches shared by the processes.
+    """
+
+    def get_user(self, user_id):
+        if not settings.AUTH_USER_CACHE:
+            return super().get_user(user_id)
+        key = user_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+        return user
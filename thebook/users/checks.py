@@ -0,0 +1,23 @@
+"""System checks for app users.
+"""
+from django.conf import settings
+from django.core.checks import Error, register
+
+LOCMEM_CACHE = 'django.core.cache.backends.locmem.LocMemCache'
+
+
+@register()
+def check_session_cache(app_configs, **kwargs):
+    """Sessions only in the locmem cache would be lost between workers."""
+    backend = settings.CACHES[settings.SESSION_CACHE_ALIAS]['BACKEND']
+    if (
+        settings.SESSION_ENGINE == 'django.contrib.sessions.backends.cache'
+        and backend == LOCMEM_CACHE
+    ):
+        return [Error(
+            'SESSION_ENGINE=cache keeps sessions in the locmem cache '
+            'of one process.',
+            hint='Set CACHE_BACKEND=file or SESSION_ENGINE=cached_db.',
+            id='users.E001',
+        )]
+    return []
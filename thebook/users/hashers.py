@@ -0,0 +1,16 @@
+"""Password hashers of app users.
+"""
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """PBKDF2 with settings.PASSWORD_HASH_ITERATIONS iterations.
+
+    Hashes made with another count still verify and are
+    rehashed with the current one at the next login.
+    """
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_HASH_ITERATIONS
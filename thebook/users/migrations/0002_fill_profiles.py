@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.db import migrations
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_profiles(apps, schema_editor):
+    app_label, model_name = settings.AUTH_USER_MODEL.split('.')
+    User = apps.get_model(app_label, model_name)
+    Post = apps.get_model('posts', 'Post')
+    Profile = apps.get_model('users', 'Profile')
+    Profile.objects.bulk_create(
+        [
+            Profile(user_id=user_id)
+            for user_id in User.objects.values_list('pk', flat=True)
+        ],
+        ignore_conflicts=True,
+    )
+    Profile.objects.update(
+        post_count=Coalesce(
+            Subquery(
+                Post.objects.filter(author=OuterRef('user_id'))
+                .order_by()
+                .values('author')
+                .annotate(count=Count('pk'))
+                .values('count')
+            ),
+            0
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_profile'),
+        ('posts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_profiles, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+"""Models of app users: Profile with counters of the user.
+"""
+from django.contrib.auth import get_user_model
+from django.db import models
+
+User = get_user_model()
+
+
+class Profile(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='profile'
+    )
+    post_count = models.PositiveIntegerField(default=0)
+    follower_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f'Profile of {self.user}'
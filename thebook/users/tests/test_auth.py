@@ -0,0 +1,83 @@
+"""Tests for authentication app users."""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import checks
+
+User = get_user_model()
+
+
+@override_settings(PASSWORD_HASH_ITERATIONS=1000)
+class AuthTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='user', password='old-password'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def user_queries(self):
+        """Queries of auth_user of the second request of a session."""
+        address = reverse('posts:follow_index')
+        self.client.get(address)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(address)
+        self.assertEqual(response.wsgi_request.user, self.user)
+        return [
+            query for query in queries if 'FROM "auth_user"' in query['sql']
+        ]
+
+    @override_settings(AUTH_USER_CACHE=True)
+    def test_user_of_session_is_cached(self):
+        """Second request of a session doesn't read auth_user."""
+        self.assertFalse(self.user_queries())
+
+    @override_settings(AUTH_USER_CACHE=False)
+    def test_user_without_cache(self):
+        """With a cache of one process users are read every time."""
+        self.assertTrue(self.user_queries())
+
+    @override_settings(
+        SESSION_ENGINE='django.contrib.sessions.backends.cache'
+    )
+    def test_sessions_in_locmem_cache_are_refused(self):
+        self.assertEqual(
+            [error.id for error in checks.check_session_cache(None)],
+            ['users.E001'],
+        )
+
+    @override_settings(AUTH_USER_CACHE=True)
+    def test_new_password_ends_other_sessions(self):
+        """Cached user is dropped when the password changes."""
+        user = User.objects.create_user(username='other', password='old')
+        client = Client()
+        client.force_login(user)
+        address = reverse('posts:follow_index')
+        client.get(address)
+        user.set_password('new-password')
+        user.save()
+        response = client.get(address)
+        self.assertRedirects(
+            response, f'{reverse("users:login")}?next={address}'
+        )
+
+    def test_iterations_from_settings(self):
+        """Passwords are hashed and rehashed with the setting."""
+        self.assertTrue(make_password('secret').startswith(
+            'pbkdf2_sha256$1000$'
+        ))
+        user = User.objects.create(
+            username='other', password=make_password('secret')
+        )
+        with self.settings(PASSWORD_HASH_ITERATIONS=2000):
+            self.assertTrue(user.check_password('secret'))
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$2000$'))